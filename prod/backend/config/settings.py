@@ -2,6 +2,9 @@
 # IMPORTANT: Keep ONLY settings in this file. URL patterns belong in config/urls.py.
 import os
 from pathlib import Path
+
+from corsheaders.defaults import default_headers
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv("SECRET_KEY", "dev")
 DEBUG = os.getenv("DEBUG", "0") == "1"
@@ -19,6 +22,9 @@ INSTALLED_APPS = [
     "tracker",
 ]
 MIDDLEWARE = [
+    "tracker.metrics.MetricsMiddleware",
+    "tracker.slowqueries.SlowQueryMiddleware",
+    "tracker.routers.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -43,6 +49,12 @@ TEMPLATES = [{
     },
 }]
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
+
+# SERVER_MODE=asgi: run under uvicorn workers (config.asgi) and route fx_rate /
+# summary to the async views in tracker/async_views.py.
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+ASYNC_VIEWS = SERVER_MODE == "asgi"
 
 DATABASES = {
     "default": {
@@ -54,6 +66,86 @@ DATABASES = {
     }
 }
 
+# --- DB connections ---
+# DB_POOL=1: psycopg 3 connection pool (one per worker process). Connections are
+#   health-checked on checkout and recycled after DB_POOL_MAX_LIFETIME seconds.
+# Otherwise: persistent connections kept for DB_CONN_MAX_AGE seconds (0 = per request).
+#   Under SERVER_MODE=asgi it is always 0: sync ORM calls run on executor threads,
+#   and a persistent connection left on one of them is never closed or reused.
+# Django rejects CONN_MAX_AGE together with a pool, so it is one or the other.
+if os.getenv("DB_POOL", "0") == "1":
+    from psycopg_pool import ConnectionPool
+
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "6")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+            "check": ConnectionPool.check_connection,
+        },
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0 if ASYNC_VIEWS else int(os.getenv("DB_CONN_MAX_AGE", "60"))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# --- Read replica (optional) ---
+# DB_REPLICA_HOST (plus DB_REPLICA_NAME/USER/PASSWORD if they differ) adds a
+# "replica" alias; tracker.routers sends GETs of opted-in views there and
+# keeps writes, post-write reads and recent writers on the primary.
+if os.getenv("DB_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("DB_REPLICA_HOST"),
+        "NAME": os.getenv("DB_REPLICA_NAME", DATABASES["default"]["NAME"]),
+        "USER": os.getenv("DB_REPLICA_USER", DATABASES["default"]["USER"]),
+        "PASSWORD": os.getenv("DB_REPLICA_PASSWORD", DATABASES["default"]["PASSWORD"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DB_ALIAS = "replica"
+else:
+    REPLICA_DB_ALIAS = None
+DATABASE_ROUTERS = ["tracker.routers.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+
+# --- Cache (no extra service needed; works offline) ---
+# CACHE_BACKEND=file (default): shared by all gunicorn workers on the host, and
+#   with the job worker through the cache volume in docker-compose.yml.
+# CACHE_BACKEND=locmem: per-process; only safe with a single worker, since a
+#   logout seen by one worker would not evict the session cached in another.
+#   The job worker can't see it either, so recent-currency picks are written
+#   straight to the DB instead of buffered for the recents.flush job.
+if os.getenv("CACHE_BACKEND", "file") == "locmem":
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    RECENTS_WRITE_BEHIND = False
+else:
+    RECENTS_WRITE_BEHIND = True
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_DIR", "/tmp/spendtracker-cache"),
+        }
+    }
+
+# --- Sessions / auth lookups ---
+# SESSION_MODE=cached_db (default) reads sessions from the cache and writes
+# through to the DB; SESSION_MODE=db is the plain Django DB backend.
+if os.getenv("SESSION_MODE", "cached_db") == "cached_db":
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+else:
+    SESSION_ENGINE = "django.contrib.sessions.backends.db"
+
+# CachedModelBackend caches the session's User row (see tracker/auth.py).
+# ModelBackend stays listed so sessions created before the switch remain valid.
+AUTHENTICATION_BACKENDS = [
+    "tracker.auth.CachedModelBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+USER_CACHE_TIMEOUT = int(os.getenv("USER_CACHE_TIMEOUT", "300"))
+# How long a saved Idempotency-Key response can be replayed
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = "en-us"
@@ -62,6 +154,26 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = "static/"
+STATIC_ROOT = BASE_DIR / "staticfiles"  # static_volume in docker-compose
+MEDIA_URL = "/media/"
+MEDIA_ROOT = BASE_DIR / "media"         # media_volume in docker-compose
+
+# --- Receipt attachments (tracker/receipts.py) ---
+# Kept under MEDIA_ROOT (same volume) but never served from /media/: nginx only
+# hands them out on an X-Accel-Redirect to RECEIPTS_ACCEL_PREFIX, an internal
+# location. RECEIPTS_ACCEL_PREFIX="" makes Django send the files itself (runserver).
+RECEIPTS_ROOT = MEDIA_ROOT / "receipts"
+RECEIPTS_ACCEL_PREFIX = os.getenv("RECEIPTS_ACCEL_PREFIX", "/protected/receipts/")
+RECEIPT_MAX_BYTES = int(os.getenv("RECEIPT_MAX_BYTES", str(25 * 1024 * 1024)))
+RECEIPT_CHUNK_BYTES = int(os.getenv("RECEIPT_CHUNK_BYTES", str(1024 * 1024)))  # keep under nginx client_max_body_size
+RECEIPT_UPLOAD_TTL = int(os.getenv("RECEIPT_UPLOAD_TTL", str(24 * 3600)))      # abandoned uploads are removed after this
+
+# --- Expense exports (the "expenses.export" job, tracker/jobs.py) ---
+# Written by the worker to their own volume, outside MEDIA_ROOT, and served only
+# through /api/jobs/<id>/file/ (owner and ledger checked) as an X-Accel-Redirect
+# to EXPORTS_ACCEL_PREFIX; "" makes Django send the file itself (runserver).
+EXPORTS_ROOT = Path(os.getenv("EXPORTS_ROOT", str(BASE_DIR / "exports")))   # exports_volume in docker-compose
+EXPORTS_ACCEL_PREFIX = os.getenv("EXPORTS_ACCEL_PREFIX", "/protected/exports/")
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # --- CORS/CSRF (TEMP: hardcoded to prove the path) ---
@@ -72,6 +184,9 @@ CORS_ALLOWED_ORIGINS = [
 ]
 CORS_ALLOW_ALL_ORIGINS = False
 CORS_ALLOW_CREDENTIALS = True
+# ledger selection (tracker/ledgers.py), retry-safe writes (tracker/idempotency.py), receipt chunks (tracker/receipts.py)
+CORS_ALLOW_HEADERS = (*default_headers, "x-ledger", "idempotency-key", "upload-offset")
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed"]
 
 CSRF_TRUSTED_ORIGINS = [
     "https://dev-travelspending.tranquilcs.com",
@@ -92,6 +207,24 @@ else:
 
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
+# --- Metrics (/api/metrics/) ---
+# Set PROMETHEUS_MULTIPROC_DIR (an empty dir, cleared on start) to aggregate
+# across gunicorn workers. METRICS_WORKER_DIR is the job worker's own
+# PROMETHEUS_MULTIPROC_DIR (on a shared volume); its counters, e.g.
+# tracker_fx_upstream_total, are merged into the same scrape.
+# METRICS_TOKEN lets Prometheus scrape without a session.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_WORKER_DIR = os.getenv("METRICS_WORKER_DIR", "")
+
+# --- Slow-query sampler (tracker/slowqueries.py; `manage.py slow_queries` reads the log) ---
+# SLOW_QUERY_MS="" turns it off. EXPLAIN ANALYZE re-runs the statement, so keep the rate low.
+_slow_query_ms = os.getenv("SLOW_QUERY_MS", "250")
+SLOW_QUERY_MS = float(_slow_query_ms) if _slow_query_ms else None
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0.1"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", str(BASE_DIR / "logs" / "slow_queries.jsonl"))
+SLOW_QUERY_LOG_BYTES = int(os.getenv("SLOW_QUERY_LOG_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
@@ -0,0 +1,45 @@
+# --- backend/gunicorn.conf.py ---
+# Used by docker-compose: `python -m gunicorn -c gunicorn.conf.py`
+import os
+
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+
+bind = "0.0.0.0:8000"
+workers = int(os.getenv("WEB_CONCURRENCY", "3"))
+timeout = 120
+if SERVER_MODE == "asgi":
+    wsgi_app = "config.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "config.wsgi:application"
+
+# Load Django once in the master and fork already-initialised workers.
+preload_app = True
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded, before workers fork."""
+    from django.db import connections
+    from django.urls import get_resolver
+
+    # Resolving the URLconf imports tracker.views/serializers and DRF, which
+    # would otherwise happen on each worker's first request.
+    get_resolver().url_patterns
+    import rest_framework.renderers, rest_framework.parsers, rest_framework.negotiation  # noqa: E401,F401
+    import tracker.serializers  # noqa: F401
+
+    # Never hand a DB connection opened in the master to forked workers.
+    connections.close_all()
+    server.log.info("Django warmed up in master (pid %s)", os.getpid())
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    # write any buffered recent-currency picks before the container stops
+    from tracker import recents
+    recents.flush()
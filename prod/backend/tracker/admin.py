@@ -1,29 +1,189 @@
 # backend/tracker/admin.py
-from django.contrib import admin
-from .models import Party, Person, Expense, Settlement, FxRate, UserRecentCurrency
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db.models import Min
+from rest_framework.exceptions import ValidationError
+from . import balances, money, revalue
+from .models import (
+    Ledger, Party, Person, Expense, Settlement, PeriodClose, Job, Receipt, Budget,
+)
+
+@admin.register(Ledger)
+class LedgerAdmin(admin.ModelAdmin):
+    list_display = ("name", "slug", "created_at")
+    search_fields = ("name", "slug")
+    filter_horizontal = ("members",)
 
 @admin.register(Party)
 class PartyAdmin(admin.ModelAdmin):
-    list_display = ("name", "slug", "is_household")
+    list_display = ("name", "slug", "is_household", "ledger")
     search_fields = ("name", "slug")
-    list_filter = ("is_household",)
+    list_filter = ("ledger", "is_household")
 
 @admin.register(Person)
 class PersonAdmin(admin.ModelAdmin):
-    list_display = ("name", "party")
-    list_filter = ("party",)
+    list_display = ("name", "party", "ledger")
+    list_filter = ("ledger", "party")
     search_fields = ("name",)
 
+class OpenPeriodForm(forms.ModelForm):
+    """Neither the stored date nor the new one may fall inside a closed period."""
+    def clean(self):
+        cleaned = super().clean()
+        ledger = cleaned.get("ledger")
+        try:
+            if self.instance.pk is not None:  # not yet overwritten with the form's values
+                balances.ensure_open(self.instance.ledger_id, self.instance.date)
+            if ledger is not None:
+                balances.ensure_open(ledger.pk, cleaned.get("date"))
+        except ValidationError as e:
+            self.add_error("date", e.detail["date"])
+        return cleaned
+
+class ClosedPeriodReadOnly:
+    """
+    Rows inside a closed period are view-only here too (the API rejects those
+    edits). The permissions only hide the buttons; saves and deletes, bulk ones
+    included, check the table again through balances.ensure_open.
+    """
+    form = OpenPeriodForm
+
+    def _closed(self, obj):
+        if obj is None:
+            return False
+        through = balances.closed_through(obj.ledger_id)
+        return through is not None and obj.date <= through
+
+    def _ensure_open(self, rows):
+        """rows: (ledger_id, date) pairs. The form reports this nicely; this catches a close made since."""
+        for ledger_id, day in rows:
+            try:
+                balances.ensure_open(ledger_id, day)
+            except ValidationError as e:
+                raise PermissionDenied(e.detail["date"])
+
+    def has_change_permission(self, request, obj=None):
+        return not self._closed(obj) and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return not self._closed(obj) and super().has_delete_permission(request, obj)
+
+    def save_model(self, request, obj, form, change):
+        stored = type(obj).objects.filter(pk=obj.pk).values_list("ledger_id", "date") if change else []
+        self._ensure_open([*stored, (obj.ledger_id, obj.date)])
+        super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        self._ensure_open([(obj.ledger_id, obj.date)])
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        # the earliest row per ledger decides
+        self._ensure_open(queryset.order_by().values("ledger_id").annotate(first=Min("date"))
+                          .values_list("ledger_id", "first"))
+        super().delete_queryset(request, queryset)
+
+class ExpenseAdminForm(OpenPeriodForm):
+    """amount and fx_to_cad as decimals, stored in integer units as the API does (ExpenseSerializer.validate)."""
+    amount = forms.DecimalField(max_digits=16, decimal_places=4)
+    fx_to_cad = forms.DecimalField(max_digits=18, decimal_places=money.FX_PLACES, initial=1)
+
+    class Meta:
+        model = Expense
+        exclude = ("amount_minor", "amount_exponent", "fx_to_cad_e8")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk is not None:
+            self.initial["amount"] = self.instance.amount
+            self.initial["fx_to_cad"] = self.instance.fx_to_cad
+
+    def clean(self):
+        cleaned = super().clean()
+        currency, amount, fx = cleaned.get("currency"), cleaned.get("amount"), cleaned.get("fx_to_cad")
+        if currency is None or amount is None or fx is None:
+            return cleaned  # already reported
+        cleaned["currency"] = self.instance.currency = currency.upper().strip()
+        places = money.exponent(cleaned["currency"])
+        try:
+            minor = money.to_minor(amount, places)
+        except ValueError:
+            self.add_error("amount", f"{cleaned['currency']} amounts have at most {places} decimal places.")
+            return cleaned
+        fx_e8 = money.to_minor(fx, money.FX_PLACES)
+        if abs(minor * fx_e8) > money.BIGINT_MAX:
+            self.add_error("amount", "Amount is too large.")
+            return cleaned
+        self.instance.amount_minor, self.instance.amount_exponent, self.instance.fx_to_cad_e8 = minor, places, fx_e8
+        return cleaned
+
+
 @admin.register(Expense)
-class ExpenseAdmin(admin.ModelAdmin):
-    list_display = ("date", "description", "currency", "amount", "paid_by")
-    list_filter = ("category", "currency", "paid_by__party")
+class ExpenseAdmin(ClosedPeriodReadOnly, admin.ModelAdmin):
+    form = ExpenseAdminForm
+    list_display = ("date", "description", "currency", "amount", "fx_to_cad", "paid_by")
+    list_filter = ("ledger", "category", "currency", "paid_by__party")
     search_fields = ("description", "notes")
+    actions = ["revalue_fx"]
+
+    @admin.action(description="Revalue selected at stored FX rates (queueing fetches for missing ones)",
+                  permissions=["change"])
+    def revalue_fx(self, request, queryset):
+        # no upstream calls in the request: missing rates go to the job worker
+        try:
+            report = revalue.revalue(queryset)
+        except RuntimeError as e:
+            self.message_user(request, str(e), messages.ERROR)
+            return
+        self.message_user(request, f"Revalued {len(report['changed'])} expense(s).", messages.SUCCESS)
+        if report["closed"]:
+            self.message_user(request, f"Skipped {report['closed']} in closed periods.", messages.WARNING)
+        if report["missing"]:
+            revalue.queue_missing(report["missing"], user=request.user)
+            pairs = ", ".join(f"{d} {c}" for d, c in report["missing"][:10])
+            self.message_user(request, f"Rates pending (fetch queued): {pairs}. Run this again once they are in.",
+                              messages.WARNING)
 
 @admin.register(Settlement)
-class SettlementAdmin(admin.ModelAdmin):
+class SettlementAdmin(ClosedPeriodReadOnly, admin.ModelAdmin):
     list_display = ("date", "from_party", "to_party", "amount_cad")
-    list_filter = ("from_party", "to_party")
+    list_filter = ("ledger", "from_party", "to_party")
+
+@admin.register(PeriodClose)
+class PeriodCloseAdmin(admin.ModelAdmin):
+    list_display = ("ledger", "through", "net_bev_owes", "closed_by", "closed_at")
+    list_filter = ("ledger",)
+    readonly_fields = ("bev_owes", "household_owes", "bev_to_house", "house_to_bev",
+                       "category_totals", "closed_by", "closed_at")
+
+    @admin.display(description="Net (Bev owes)")
+    def net_bev_owes(self, obj):
+        return obj.bev_owes - obj.household_owes - (obj.bev_to_house - obj.house_to_bev)
+
+    def has_add_permission(self, request):
+        return False  # close periods through the API so the totals are computed
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "attempts", "run_after", "finished_at")
+    list_filter = ("status", "kind")
+    readonly_fields = ("locked_at", "locked_by", "last_error", "result", "created_by", "created_at", "finished_at")
+
+@admin.register(Receipt)
+class ReceiptAdmin(admin.ModelAdmin):
+    list_display = ("filename", "expense_id", "ledger", "uploaded_by", "created_at")
+    list_filter = ("ledger",)
+    search_fields = ("filename", "blob__sha256")
+    readonly_fields = ("ledger", "expense", "blob", "uploaded_by", "created_at")
+
+    def has_add_permission(self, request):
+        return False  # files arrive through the chunked upload API
+
+@admin.register(Budget)
+class BudgetAdmin(admin.ModelAdmin):
+    list_display = ("ledger", "category", "period", "party", "amount_cad_cents", "thresholds")
+    list_filter = ("ledger", "period")
 
 # Optional, usually hidden from admin, but you can expose them if you want:
 # admin.site.register(FxRate)
@@ -0,0 +1,210 @@
+# --- backend/tracker/anomalies.py ---
+"""
+Unusual expenses, found over whole arrays.
+
+load() reads the columns the checks need for an Expense queryset in one query
+and turns them into NumPy arrays; detect() then flags rows in one vectorized
+pass, with no per-row Python:
+
+- outliers: robust z-scores, 0.6745 * (x - median) / MAD (Iglewicz and
+  Hoaglin), of the log10 CAD amount within each category, each currency and
+  each (category, weekday), and of the log10 FX rate within each currency.
+  Logs because spend is roughly log-normal: a hotel night is 10x a meal, not
+  a fixed amount more. A THB amount saved with a CAD rate of 1 costs ~25x any
+  other THB row, and its rate is ~25x every other THB rate.
+- duplicates: rows sharing date, currency and amount.
+
+Medians and MADs come from one sort per grouping: after sorting by
+(group, value) each group's median sits at a known offset. Groups smaller
+than MIN_GROUP have no meaningful spread and are skipped. Results are cached
+under the ledger's data version (tracker/versions.py), like the category
+report.
+"""
+from datetime import date
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+
+from . import money, versions
+from .models import Expense
+
+THRESHOLD = 3.5     # |z| above which a row is flagged (Iglewicz and Hoaglin's cut-off)
+MIN_GROUP = 8
+TIMEOUT = 60 * 60   # entries for old versions just age out
+_COLUMNS = ("id", "date", "category", "currency", "amount_minor", "amount_exponent", "fx_to_cad_e8")
+
+
+# -------------------------
+# Arrays
+# -------------------------
+def load(expenses):
+    """
+    {column: ndarray} for an Expense queryset, from one query. Dates become
+    ordinals and categories/currencies codes into "*_names": converting
+    100k Python dates to datetime64 alone takes longer than all the checks.
+    """
+    rows = expenses.order_by().values_list(*_COLUMNS)
+    sql, params = rows.query.sql_with_params()
+    with connection.cursor() as cur:  # plain tuples: no per-row work left for the ORM to do
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    if not rows:
+        return None
+    ids, dates, categories, currencies, minor, places, fx = zip(*rows)
+    n = len(rows)
+    if not isinstance(dates[0], date):
+        dates = map(date.fromisoformat, dates)  # SQLite returns text
+    category_codes, currency_codes = {}, {}
+    return {
+        "id": np.fromiter(ids, np.int64, n),
+        "day": np.fromiter((d.toordinal() for d in dates), np.int64, n),
+        "category": np.fromiter((category_codes.setdefault(c, len(category_codes)) for c in categories), np.int64, n),
+        "category_names": list(category_codes),
+        "currency": np.fromiter((currency_codes.setdefault(c, len(currency_codes)) for c in currencies), np.int64, n),
+        "currency_names": list(currency_codes),
+        "minor": np.fromiter(minor, np.int64, n),
+        "places": np.fromiter(places, np.int64, n),
+        "fx": np.fromiter(fx, np.int64, n),
+    }
+
+
+def _group_median(group, values, n_groups):
+    """Median of `values` within each group id (0..n_groups-1); NaN for empty groups."""
+    # one float sort key, each group in its own range: a third of the time of lexsort((values, group))
+    low = values.min()
+    v = values[np.argsort(group * (values.max() - low + 1.0) + (values - low))]
+    counts = np.bincount(group, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    filled = counts > 0
+    out = np.full(n_groups, np.nan)
+    lo, hi = starts + (counts - 1) // 2, starts + counts // 2
+    out[filled] = (v[lo[filled]] + v[hi[filled]]) / 2
+    return out
+
+
+def robust_z(group, values):
+    """
+    (z, median) per row within its group. Where more than half a group is
+    identical (MAD 0), the mean absolute deviation stands in, scaled to match.
+    """
+    n_groups = int(group.max()) + 1
+    median = _group_median(group, values, n_groups)[group]
+    dev = np.abs(values - median)
+    mad = _group_median(group, dev, n_groups)[group]
+    counts = np.bincount(group, minlength=n_groups)
+    mean_ad = (np.bincount(group, weights=dev, minlength=n_groups) / np.maximum(counts, 1))[group]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(mad > 0, 0.6745 * (values - median) / mad, (values - median) / (1.2533 * mean_ad))
+    z = np.nan_to_num(z, nan=0.0, posinf=0.0, neginf=0.0)  # a group of equal values: nothing stands out
+    z[counts[group] < MIN_GROUP] = 0.0
+    return z, median
+
+
+# -------------------------
+# Checks
+# -------------------------
+def detect(a, threshold=THRESHOLD):
+    """
+    {"outliers": [(row, score, [(check, z, typical), ...]), ...] worst first,
+    "duplicates": [[row, ...], ...]} over load()'s arrays, as row indexes.
+    `typical` is the group's median CAD amount (or FX rate for "fx_rate").
+    """
+    cad = a["minor"] * (a["fx"] / 10.0 ** (a["places"] + money.FX_PLACES))
+    log_cad = np.log10(np.maximum(cad, 0.01))
+    log_fx = np.log10(np.maximum(a["fx"], 1) / money.FX_SCALE)
+    weekday = (a["day"] - 1) % 7  # ordinal 1 (0001-01-01) was a Monday
+    checks = [
+        ("category", a["category"], log_cad),
+        ("currency", a["currency"], log_cad),
+        ("category_weekday", a["category"] * 7 + weekday, log_cad),
+        ("fx_rate", a["currency"], log_fx),
+    ]
+    zs, typical = [], []
+    for _, group, values in checks:
+        z, median = robust_z(group, values)
+        zs.append(z)
+        typical.append(10 ** median)
+    zs = np.vstack(zs)
+    flagged = np.abs(zs) > threshold
+    score = np.where(flagged, np.abs(zs), 0).max(axis=0)
+    rows = np.flatnonzero(score)
+    rows = rows[np.argsort(-score[rows], kind="stable")]
+    outliers = [(int(i), float(score[i]),
+                 [(checks[c][0], float(zs[c, i]), float(typical[c][i])) for c in np.flatnonzero(flagged[:, i])])
+                for i in rows]
+    return {"outliers": outliers, "duplicates": duplicates(a)}
+
+
+def duplicates(a):
+    """Row-index groups with the same date, currency and amount (most recent first)."""
+    # date, currency and exponent packed into one int64, so the sort has two keys, not four
+    packed = (a["day"] * len(a["currency_names"]) + a["currency"]) * 8 + a["places"]
+    order = np.lexsort((a["minor"], packed))
+    keys = np.vstack([packed, a["minor"]])[:, order]
+    new = np.ones(len(order), dtype=bool)
+    new[1:] = (keys[:, 1:] != keys[:, :-1]).any(axis=0)
+    group = np.cumsum(new) - 1
+    sizes = np.bincount(group)
+    dup = sizes[group] > 1
+    if not dup.any():
+        return []
+    rows, group = order[dup], group[dup]
+    bounds = np.flatnonzero(np.diff(group)) + 1
+    return sorted((sorted(g.tolist()) for g in np.split(rows, bounds)), key=lambda g: -a["day"][g[0]])
+
+
+# -------------------------
+# Report
+# -------------------------
+def _row(a, i, descriptions):
+    places = int(a["places"][i])
+    minor, fx = int(a["minor"][i]), int(a["fx"][i])
+    return {
+        "id": int(a["id"][i]),
+        "date": date.fromordinal(int(a["day"][i])).isoformat(),
+        "description": descriptions.get(int(a["id"][i]), ""),
+        "category": a["category_names"][a["category"][i]],
+        "currency": a["currency_names"][a["currency"][i]],
+        "amount": money.fmt_amount(minor, places),
+        "fx_to_cad": money.fmt(fx, money.FX_PLACES),
+        "amount_cad": money.fmt(money.cad_cents(minor, places, fx), money.CAD_EXPONENT),
+    }
+
+
+def _typical(check, value):
+    return f"{value:.6g}" if check == "fx_rate" else f"{value:.2f}"
+
+
+def report(expenses, threshold=THRESHOLD, limit=100):
+    """
+    {"count", "threshold", "outliers", "duplicates"} for an Expense queryset:
+    the `limit` highest-scoring outliers and most recent duplicate groups.
+    Two queries: the arrays, then descriptions for the rows reported.
+    """
+    a = load(expenses)
+    if a is None:
+        return {"count": 0, "threshold": threshold, "outliers": [], "duplicates": []}
+    found = detect(a, threshold)
+    outliers, groups = found["outliers"][:limit], found["duplicates"][:limit]
+    shown = {int(a["id"][i]) for i, _, _ in outliers} | {int(a["id"][i]) for g in groups for i in g}
+    descriptions = dict(Expense.objects.filter(id__in=shown).values_list("id", "description")) if shown else {}
+    return {
+        "count": len(a["id"]),
+        "threshold": threshold,
+        "outliers": [{**_row(a, i, descriptions), "score": round(score, 1),
+                      "reasons": [{"check": check, "z": round(z, 1), "typical": _typical(check, typical)}
+                                  for check, z, typical in reasons]}
+                     for i, score, reasons in outliers],
+        "duplicates": [[_row(a, i, descriptions) for i in g] for g in groups],
+    }
+
+
+def cached_report(ledger_id, expenses, threshold=THRESHOLD, limit=100, key=""):
+    """report() cached under the ledger's data version; `key` identifies the queryset's filters."""
+    cache_key = f"reports:anomalies:{ledger_id}:{versions.get(ledger_id)}:{threshold}:{limit}:{key}"
+    result = cache.get(cache_key)
+    if result is None:
+        result = report(expenses, threshold, limit)
+        cache.set(cache_key, result, TIMEOUT)
+    return result
@@ -2,4 +2,11 @@
 from django.apps import AppConfig
 class TrackerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "tracker"
\ No newline at end of file
+    name = "tracker"
+
+    def ready(self):
+        # connect signal receivers: auth cache invalidation, per-connection query counter and
+        # slow-query sampler, closed-period and ledger cache invalidation,
+        # per-ledger data versions, live-update NOTIFYs, budget spend totals,
+        # expense fingerprints
+        from . import auth, balances, budgets, duplicates, ledgers, live, metrics, slowqueries, versions  # noqa: F401
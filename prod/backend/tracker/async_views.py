@@ -0,0 +1,90 @@
+# --- backend/tracker/async_views.py ---
+"""
+Async variants of the views that wait on I/O, used when SERVER_MODE=asgi.
+
+These are plain Django async views (DRF has no async support), so auth and
+rendering are done by hand and kept identical to the DRF versions in views.py.
+"""
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import balances, fxmatrix, ledgers, live
+from .metrics import FX_CACHE
+from .routers import replica_reads
+from .models import Party, FxRate
+from .views import _fx_query, _fx_miss, _fx_payload, _report_currency
+
+
+def _json(data, status=200):
+    # DRF's encoder, so Decimals render exactly as in the sync views
+    return JsonResponse(data, status=status, encoder=JSONEncoder)
+
+
+async def fx_rate(request):
+    """Return (and cache) the FX rate for a given date/base/quote."""
+    if request.method != "GET":
+        return _json({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    try:
+        query_date, base, quote = _fx_query(request.GET)
+    except Exception:
+        return _json({"detail": "Invalid date"}, status=400)
+
+    # check cache first
+    existing = await FxRate.objects.filter(date=query_date, base=base, quote=quote).afirst()
+    if existing:
+        FX_CACHE.labels("hit").inc()
+        return _json(_fx_payload(existing.date, existing.base, existing.quote, existing.rate, "cache"))
+    FX_CACHE.labels("miss").inc()
+
+    # --- fetch in a worker, exactly as the sync view does ---
+    user = await request.auser()
+    payload, code = await sync_to_async(_fx_miss)(query_date, base, quote, user)
+    return _json(payload, status=code)
+
+
+@replica_reads
+async def summary(request):
+    if request.method != "GET":
+        return _json({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _json({"detail": "Authentication credentials were not provided."}, status=403)
+
+    try:
+        ledger = await ledgers.aresolve(ledgers.requested_slug(request), user)
+    except NotFound as e:
+        return _json({"detail": e.detail}, status=404)
+    household, bev = balances.household_and_bev([p async for p in Party.objects.filter(ledger=ledger)])
+    if not household or not bev:
+        return _json({"detail": "Parties not bootstrapped yet."}, status=400)
+    payload = await balances.asummary(ledger.pk, household, bev)
+    code = _report_currency(request.GET)
+    if code != fxmatrix.HUB:
+        rate = await sync_to_async(fxmatrix.rate_from_cad)(code)
+        if rate is None:
+            return _json({"detail": f"No FX rates for {code}."}, status=400)
+        payload = balances.in_currency(payload, code, rate)
+    return _json(payload)
+
+
+async def events(request):
+    """Server-Sent Events for the request's ledger (see tracker/live.py)."""
+    if request.method != "GET":
+        return _json({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _json({"detail": "Authentication credentials were not provided."}, status=403)
+    try:
+        ledger = await ledgers.aresolve(ledgers.requested_slug(request), user)
+    except NotFound as e:
+        return _json({"detail": e.detail}, status=404)
+    if connection.vendor != "postgresql":
+        return _json({"detail": "Live updates need PostgreSQL (LISTEN/NOTIFY)."}, status=501)
+
+    response = StreamingHttpResponse(live.stream(ledger.pk), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: pass events through unbuffered
+    return response
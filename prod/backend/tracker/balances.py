@@ -0,0 +1,230 @@
+# --- backend/tracker/balances.py ---
+"""
+Household/Bev balances for one ledger, with closed periods.
+
+Closing a period writes a PeriodClose snapshot: running totals (and per-category
+CAD totals) for everything dated up to `through`. Balances are then the latest
+snapshot plus an aggregate over the rows dated after it, so the summary scans
+open activity only. Expenses and settlements inside a closed period are
+read-only; deleting the latest PeriodClose reopens it.
+"""
+from decimal import Decimal
+from fractions import Fraction
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum, F, Q, BigIntegerField, ExpressionWrapper
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import serializers
+
+from . import money
+from .models import Expense, Settlement, PeriodClose
+
+EXPENSE_KEYS = ("bev_owes", "household_owes")
+SETTLEMENT_KEYS = ("bev_to_house", "house_to_bev")
+_MISSING = object()
+
+EIGHTPLACES = Decimal("0.00000001")
+
+# amount * fx_to_cad scaled by 10**(amount_exponent + FX_PLACES): one bigint product per row
+SCALED_CAD = ExpressionWrapper(F("amount_minor") * F("fx_to_cad_e8"), output_field=BigIntegerField())
+
+
+def household_and_bev(parties):
+    """
+    Pick the two sides out of a ledger's already-fetched parties: the household
+    and "bev" (the party with that slug, else the first other party).
+    """
+    household = min((p for p in parties if p.is_household), key=lambda p: p.pk, default=None)
+    others = sorted((p for p in parties if p is not household), key=lambda p: (p.slug != "bev", p.pk))
+    return household, (others[0] if others else None)
+
+
+def expense_groups(expenses, household, bev):
+    """
+    Integer sums of SCALED_CAD paid by each side, one row per (exponent, weights)
+    group: the database only adds integers, and the weighted split and scaling
+    are done in Python over those few groups (expense_totals).
+    """
+    return (expenses.order_by().values("amount_exponent", "weight_household", "weight_bev")
+            .annotate(by_household=Sum(SCALED_CAD, filter=Q(paid_by__party=household)),
+                      by_bev=Sum(SCALED_CAD, filter=Q(paid_by__party=bev))))
+
+
+def expense_totals(groups):
+    """{"bev_owes", "household_owes"} in CAD from expense_groups() rows."""
+    bev_owes = household_owes = Fraction(0)
+    for g in groups:
+        w_household, w_bev = g["weight_household"], g["weight_bev"]
+        if not w_household + w_bev:
+            continue
+        scale = (w_household + w_bev) * 10 ** (g["amount_exponent"] + money.FX_PLACES)
+        bev_owes += Fraction(int(g["by_household"] or 0) * w_bev, scale)
+        household_owes += Fraction(int(g["by_bev"] or 0) * w_household, scale)
+    return {"bev_owes": _decimal(bev_owes), "household_owes": _decimal(household_owes)}
+
+
+def settlement_aggregates(household, bev):
+    """aggregate() kwargs for Settlement: integer cents each way."""
+    return {
+        "bev_to_house": Sum("amount_cad_cents", filter=Q(from_party=bev, to_party=household)),
+        "house_to_bev": Sum("amount_cad_cents", filter=Q(from_party=household, to_party=bev)),
+    }
+
+
+def settlement_totals(sums):
+    return {k: money.to_decimal(int(v or 0), money.CAD_EXPONENT) for k, v in sums.items()}
+
+
+def _decimal(fraction):
+    return (Decimal(fraction.numerator) / fraction.denominator).quantize(EIGHTPLACES)
+
+
+def _plus(snap, totals, keys):
+    """Aggregate results (None for no rows) plus the snapshot's running totals."""
+    return {k: (totals[k] or Decimal("0")) + (getattr(snap, k) if snap else Decimal("0")) for k in keys}
+
+
+def payload(snap, exp, st):
+    """Summary response from the open-period aggregates and the latest snapshot (or None)."""
+    exp = _plus(snap, exp, EXPENSE_KEYS)
+    st = _plus(snap, st, SETTLEMENT_KEYS)
+    net = exp["bev_owes"] - exp["household_owes"] - (st["bev_to_house"] - st["house_to_bev"])
+    return {
+        "bev_owes_from_expenses": exp["bev_owes"],
+        "household_owes_from_expenses": exp["household_owes"],
+        "settlements_bev_to_household": st["bev_to_house"],
+        "settlements_household_to_bev": st["house_to_bev"],
+        "net": net,
+        "closed_through": snap.through if snap else None,
+    }
+
+
+MONEY_KEYS = ("bev_owes_from_expenses", "household_owes_from_expenses",
+              "settlements_bev_to_household", "settlements_household_to_bev", "net")
+
+
+def in_currency(summary, code, rate):
+    """A summary payload re-expressed in `code`, given `rate` units of it per CAD."""
+    out = {k: (summary[k] * rate).quantize(Decimal("0.01")) for k in MONEY_KEYS}
+    return {**summary, **out, "currency": code, "rate_from_cad": rate}
+
+
+def _open(snap):
+    return Q(date__gt=snap.through) if snap else Q()
+
+
+# -------------------------
+# Latest snapshot per ledger (cached for reads)
+# -------------------------
+# Closes also run in the job worker, whose cache is not this process's, so the
+# cached copy is only trusted for CLOSE_CACHE_TIMEOUT. For summaries an older
+# snapshot is still exact (it is summed with every row dated after it); only
+# `closed_through` lags. The write guard, ensure_open(), reads the table.
+CLOSE_CACHE_TIMEOUT = 60
+
+
+def _latest_key(ledger_id):
+    return f"balances:latest-close:{ledger_id}"
+
+
+def _latest(ledger_id):
+    return PeriodClose.objects.filter(ledger_id=ledger_id).order_by("-through")
+
+
+def latest_close(ledger_id):
+    snap = cache.get(_latest_key(ledger_id), _MISSING)
+    if snap is _MISSING:
+        snap = _latest(ledger_id).first()
+        cache.set(_latest_key(ledger_id), snap, CLOSE_CACHE_TIMEOUT)
+    return snap
+
+
+async def alatest_close(ledger_id):
+    snap = await cache.aget(_latest_key(ledger_id), _MISSING)
+    if snap is _MISSING:
+        snap = await _latest(ledger_id).afirst()
+        await cache.aset(_latest_key(ledger_id), snap, CLOSE_CACHE_TIMEOUT)
+    return snap
+
+
+@receiver(post_save, sender=PeriodClose)
+@receiver(post_delete, sender=PeriodClose)
+def _close_changed(sender, instance, **kwargs):
+    key = _latest_key(instance.ledger_id)
+    cache.delete(key)
+    # again once committed, in case a reader refilled it from the old state meanwhile
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+# -------------------------
+# Summary
+# -------------------------
+def summary(ledger_id, household, bev):
+    snap = latest_close(ledger_id)
+    open_rows = Q(ledger_id=ledger_id) & _open(snap)
+    groups = expense_groups(Expense.objects.filter(open_rows), household, bev)
+    return payload(
+        snap,
+        expense_totals(groups),
+        settlement_totals(Settlement.objects.filter(open_rows).aggregate(**settlement_aggregates(household, bev))),
+    )
+
+
+async def asummary(ledger_id, household, bev):
+    snap = await alatest_close(ledger_id)
+    open_rows = Q(ledger_id=ledger_id) & _open(snap)
+    groups = expense_groups(Expense.objects.filter(open_rows), household, bev)
+    sums = await Settlement.objects.filter(open_rows).aaggregate(**settlement_aggregates(household, bev))
+    return payload(snap, expense_totals([g async for g in groups]), settlement_totals(sums))
+
+
+# -------------------------
+# Closing / the closed-period guard
+# -------------------------
+def closed_through(ledger_id):
+    """The ledger's latest close date, from the table (one indexed row), never the cache."""
+    return _latest(ledger_id).values_list("through", flat=True).first()
+
+
+def ensure_open(ledger_id, *dates):
+    """
+    Raise a 400 if any of `dates` falls inside one of the ledger's closed
+    periods. Asks the table, not the cache: a close just made by another
+    process must hold here at once.
+    """
+    through = closed_through(ledger_id)
+    if through and any(d and d <= through for d in dates):
+        raise serializers.ValidationError(
+            {"date": f"Closed through {through}; reopen the period to change it."})
+
+
+@transaction.atomic
+def close_period(ledger, through, household, bev, user=None):
+    """
+    Snapshot running totals through `through`. Only the rows between the
+    previous close and `through` are aggregated; the rest comes from the
+    previous snapshot.
+    """
+    prev = PeriodClose.objects.select_for_update().filter(ledger=ledger).order_by("-through").first()
+    if prev and through <= prev.through:
+        raise serializers.ValidationError({"through": f"Already closed through {prev.through}."})
+
+    span = Q(ledger=ledger, date__lte=through) & _open(prev)
+    exp = _plus(prev, expense_totals(expense_groups(Expense.objects.filter(span), household, bev)), EXPENSE_KEYS)
+    sums = Settlement.objects.filter(span).aggregate(**settlement_aggregates(household, bev))
+    st = _plus(prev, settlement_totals(sums), SETTLEMENT_KEYS)
+
+    categories = {c: Decimal(v) for c, v in (prev.category_totals if prev else {}).items()}
+    rows = (Expense.objects.filter(span).order_by()
+            .values("category", "amount_exponent").annotate(total=Sum(SCALED_CAD)))
+    for row in rows:
+        cad = money.to_decimal(int(row["total"] or 0), row["amount_exponent"] + money.FX_PLACES)
+        categories[row["category"]] = categories.get(row["category"], Decimal("0")) + cad.quantize(EIGHTPLACES)
+
+    return PeriodClose.objects.create(
+        ledger=ledger, through=through, closed_by=user,
+        category_totals={c: str(v) for c, v in sorted(categories.items())},
+        **exp, **st,
+    )
@@ -0,0 +1,304 @@
+# --- backend/tracker/budgets.py ---
+"""
+Budgets, checked against spend totals that are kept up to date on every write.
+
+SpendTotal holds running CAD cents per (ledger, category, period, start, side):
+for the expense's category and for "" (every category); for the calendar
+month, the ISO week (starting Monday) and the whole ledger ("total", start
+date.min); and for the whole amount ("") plus the household and bev shares.
+Saving or deleting an expense turns the old and new row into deltas for those
+keys (18 per row, up to 36 when an edit moves it), applied with a single
+INSERT ... ON CONFLICT DO UPDATE ... RETURNING inside the writing transaction.
+The old row is read FOR UPDATE in that transaction, never taken from the
+instance, so two writers starting from the same stale copy can't drift.
+A budget's status is then one indexed row per budget, never an aggregate over
+expenses.
+
+The totals RETURNING hands back are compared with the ledger's budgets
+(cached until a budget changes). When a write takes a total across one of a
+budget's thresholds (percents of its amount), a "budget.crossed" live event
+is queued (tracker/live.py) and, once committed, `threshold_crossed` is sent.
+
+Writes that skip model signals (bulk_create, queryset update) call rebuild()
+for their ledger, or apply(deltas(old, new)) for the rows they changed.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, Case, DateField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from . import live, money
+from .models import Budget, Expense, Party, SpendTotal
+
+log = logging.getLogger(__name__)
+
+ALL = ""                  # category/side key for "every category" / "the whole amount"
+TOTAL_START = date.min    # start of the one "total" period
+PERIODS = (Budget.MONTH, Budget.WEEK, Budget.TOTAL)
+# the Expense fields a row's contribution depends on
+ROW_FIELDS = ("ledger_id", "date", "category", "amount_minor", "amount_exponent", "fx_to_cad_e8",
+              "weight_household", "weight_bev")
+
+# sent on commit: sender=Budget, ledger_id, budget_id, threshold (percent), start (period), spent_cents
+threshold_crossed = Signal()
+
+
+# -------------------------
+# Periods
+# -------------------------
+def period_start(period, day):
+    if period == Budget.MONTH:
+        return day.replace(day=1)
+    if period == Budget.WEEK:
+        return day - timedelta(days=day.weekday())
+    return TOTAL_START
+
+
+def period_end(period, start):
+    """First day after the period; None for "total"."""
+    if period == Budget.MONTH:
+        return (start + timedelta(days=32)).replace(day=1)
+    if period == Budget.WEEK:
+        return start + timedelta(days=7)
+    return None
+
+
+# -------------------------
+# Deltas
+# -------------------------
+def _contributions(row):
+    """{key: cents} an expense (a dict of ROW_FIELDS) adds to the totals."""
+    cents = money.cad_cents(row["amount_minor"], row["amount_exponent"], row["fx_to_cad_e8"])
+    household, bev = money.split(cents, row["weight_household"], row["weight_bev"])
+    shares = {ALL: cents, "household": household, "bev": bev}
+    out = {}
+    for category in (row["category"], ALL):
+        for period in PERIODS:
+            start = period_start(period, row["date"])
+            for side, v in shares.items():
+                out[(row["ledger_id"], category, period, start, side)] = v
+    return out
+
+
+def deltas(old=None, new=None):
+    """{key: cents} that turns the totals for row `old` into those for row `new` (either may be None)."""
+    out = defaultdict(int)
+    for row, sign in ((old, -1), (new, 1)):
+        if row is not None:
+            for key, v in _contributions(row).items():
+                out[key] += sign * v
+    return {key: v for key, v in out.items() if v}
+
+
+def totals(rows):
+    """{key: cents} from scratch for an iterable of expense rows (rebuild() and the 0012 migration)."""
+    out = defaultdict(int)
+    for row in rows:
+        for key, v in _contributions(row).items():
+            out[key] += v
+    return out
+
+
+def row_of(expense):
+    return {f: getattr(expense, f) for f in ROW_FIELDS}
+
+
+def apply(changes):
+    """
+    Add {key: cents} to the stored totals in one upsert; returns {key: new total}
+    and fires any thresholds crossed. Call inside the writing transaction.
+    """
+    if not changes:
+        return {}
+    table = SpendTotal._meta.db_table
+    keys = sorted(changes)  # same lock order in every writer
+    params = []
+    for key in keys:
+        ledger_id, category, period, start, side = key
+        params += [ledger_id, category, period, connection.ops.adapt_datefield_value(start), side, changes[key]]
+    sql = f"""
+        INSERT INTO {table} (ledger_id, category, period, start, side, cents)
+        VALUES {", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(keys))}
+        ON CONFLICT (ledger_id, category, period, start, side)
+        DO UPDATE SET cents = {table}.cents + excluded.cents
+        RETURNING ledger_id, category, period, start, side, cents
+    """
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    after = {}
+    for ledger_id, category, period, start, side, cents in rows:
+        if not isinstance(start, date):
+            start = date.fromisoformat(start)  # SQLite hands RETURNING dates back as text
+        after[(ledger_id, category, period, start, side)] = cents
+    _check(changes, after)
+    return after
+
+
+# -------------------------
+# Thresholds
+# -------------------------
+def _budgets_key(ledger_id):
+    return f"budgets:{ledger_id}"
+
+
+def side_of(budget):
+    if budget.party_id is None:
+        return ALL
+    return "household" if budget.party.is_household else "bev"
+
+
+def ledger_budgets(ledger_id):
+    """(id, category, period, side, amount_cad_cents, thresholds) per budget of the ledger, cached."""
+    rows = cache.get(_budgets_key(ledger_id))
+    if rows is None:
+        rows = [(b.pk, b.category, b.period, side_of(b), b.amount_cad_cents, tuple(b.thresholds))
+                for b in Budget.objects.filter(ledger_id=ledger_id).select_related("party")]
+        cache.set(_budgets_key(ledger_id), rows, None)
+    return rows
+
+
+def crossed(amount, thresholds, before, after):
+    """The thresholds (percents of `amount`) that `after` reaches and `before` did not."""
+    return [t for t in thresholds if before * 100 < amount * t <= after * 100]
+
+
+def _check(changes, after):
+    by_ledger = defaultdict(list)
+    for key in after:
+        by_ledger[key[0]].append(key)
+    for ledger_id, keys in by_ledger.items():
+        for budget_id, category, period, side, amount, thresholds in ledger_budgets(ledger_id):
+            for key in keys:
+                if key[1:3] != (category, period) or key[4] != side:
+                    continue
+                total = after[key]
+                for t in crossed(amount, thresholds, total - changes[key], total):
+                    _emit(ledger_id, budget_id, t, key[3], total)
+
+
+def _emit(ledger_id, budget_id, threshold, start, cents):
+    log.info("budget %s: %s%% reached for the period from %s", budget_id, threshold, start)
+    live.notify(ledger_id, "budget.crossed", budget_id)
+    transaction.on_commit(lambda: threshold_crossed.send(
+        sender=Budget, ledger_id=ledger_id, budget_id=budget_id, threshold=threshold, start=start,
+        spent_cents=cents))
+
+
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+@receiver(post_save, sender=Party)
+def _budgets_changed(sender, instance, **kwargs):
+    key = _budgets_key(instance.ledger_id)
+    cache.delete(key)
+    # again once committed, in case a writer refilled it from the old state meanwhile
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+# -------------------------
+# Keeping the totals current
+# -------------------------
+def _stored_row(instance, using):
+    """
+    The row as committed, locked until the writing transaction ends (Expense.save
+    and deletes run in one), so a concurrent write of the same expense waits
+    and then sees this one's values instead of the ones both started from.
+    """
+    return (Expense.objects.using(using).select_for_update().filter(pk=instance.pk)
+            .values(*ROW_FIELDS).first())
+
+
+@receiver(pre_save, sender=Expense)
+def _before_save(sender, instance, raw=False, update_fields=None, using=None, **kwargs):
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not set(update_fields) & {f.removesuffix("_id") for f in ROW_FIELDS}:
+        return
+    instance._spend_before = _stored_row(instance, using)
+
+
+@receiver(post_save, sender=Expense)
+def _saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return  # loaddata: run rebuild_spend_totals afterwards
+    if not created and not hasattr(instance, "_spend_before"):
+        return  # update_fields that leave the totals alone
+    apply(deltas(instance.__dict__.pop("_spend_before", None), row_of(instance)))
+
+
+@receiver(pre_delete, sender=Expense)
+def _before_delete(sender, instance, using=None, **kwargs):
+    instance._spend_before = _stored_row(instance, using)
+
+
+@receiver(post_delete, sender=Expense)
+def _deleted(sender, instance, **kwargs):
+    # None when a concurrent delete got there first: nothing left to subtract
+    apply(deltas(old=instance.__dict__.pop("_spend_before", None)))
+
+
+def rebuild(ledger_id):
+    """
+    Recompute a ledger's totals from its expenses, for after writes that skip
+    the signals. On PostgreSQL the table lock holds off concurrent writers'
+    upserts until the new totals are committed, so none of their deltas is lost.
+    Returns the number of totals stored.
+    """
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cur:
+                cur.execute(f"LOCK TABLE {SpendTotal._meta.db_table} IN EXCLUSIVE MODE")
+        fresh = totals(Expense.objects.filter(ledger_id=ledger_id).order_by().values(*ROW_FIELDS)
+                       .iterator(chunk_size=2000))
+        SpendTotal.objects.filter(ledger_id=ledger_id).delete()
+        SpendTotal.objects.bulk_create(
+            [SpendTotal(ledger_id=l, category=c, period=p, start=s, side=side, cents=v)
+             for (l, c, p, s, side), v in fresh.items()], batch_size=1000)
+    return len(fresh)
+
+
+# -------------------------
+# Status
+# -------------------------
+def with_spent(budgets, on):
+    """Annotate budgets with their current `period_start` (as of day `on`) and `spent_cents`, in the same query."""
+    side = Case(When(party__isnull=True, then=Value(ALL)),
+                When(party__is_household=True, then=Value("household")),
+                default=Value("bev"))
+    start = Case(*[When(period=p, then=Value(period_start(p, on), output_field=DateField())) for p in PERIODS])
+    spent = SpendTotal.objects.filter(ledger=OuterRef("ledger"), category=OuterRef("category"),
+                                      period=OuterRef("period"), start=OuterRef("period_start"),
+                                      side=OuterRef("side")).values("cents")[:1]
+    return budgets.annotate(side=side, period_start=start).annotate(
+        spent_cents=Coalesce(Subquery(spent), Value(0), output_field=BigIntegerField()))
+
+
+def status(budget, on):
+    """
+    Spend against a with_spent() budget as of day `on`, in CAD cents. The
+    projection extends the period's spend so far at the same daily rate to
+    its end; a "total" budget has no end, so its projection is what is spent.
+    """
+    start, spent, amount = budget.period_start, budget.spent_cents, budget.amount_cad_cents
+    end = period_end(budget.period, start)
+    projected = spent
+    if end is not None:
+        days = (end - start).days
+        elapsed = min(max((on - start).days + 1, 1), days)
+        projected = money.div_round(spent * days, elapsed)
+    return {
+        "period_start": None if end is None else start,
+        "period_end": None if end is None else end - timedelta(days=1),
+        "spent_cents": spent,
+        "remaining_cents": amount - spent,
+        "percent": round(spent * 100 / amount, 1) if amount else None,
+        "reached": max((t for t in budget.thresholds if spent * 100 >= amount * t), default=None),
+        "projected_cents": projected,
+        "projected_overrun_cents": max(projected - amount, 0),
+    }
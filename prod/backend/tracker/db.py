@@ -0,0 +1,34 @@
+# --- backend/tracker/db.py ---
+from django.db import connections
+
+
+def pool_stats(alias="default"):
+    """
+    Counters for this worker's psycopg pool, or None when DB_POOL is off.
+    Pools are per process, so each gunicorn worker reports its own.
+    """
+    conn = connections[alias]
+    if conn.vendor != "postgresql" or not conn.settings_dict.get("OPTIONS", {}).get("pool"):
+        return None
+    s = conn.pool.get_stats()
+    size = s.get("pool_size", 0)
+    available = s.get("pool_available", 0)
+    served = s.get("requests_num", 0)
+    wait_ms = s.get("requests_wait_ms", 0)
+    return {
+        "min_size": s.get("pool_min", 0),
+        "max_size": s.get("pool_max", 0),
+        "size": size,
+        "in_use": size - available,
+        "available": available,
+        "waiting": s.get("requests_waiting", 0),
+        # checkouts that found no idle connection and had to queue
+        "overflow": s.get("requests_queued", 0),
+        "requests": served,
+        "wait_ms_total": wait_ms,
+        "wait_ms_avg": round(wait_ms / served, 2) if served else 0,
+        "timeouts": s.get("requests_errors", 0),
+        "connections_opened": s.get("connections_num", 0),
+        "connections_lost": s.get("connections_lost", 0),
+        "returns_bad": s.get("returns_bad", 0),
+    }
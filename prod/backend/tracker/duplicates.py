@@ -0,0 +1,87 @@
+# --- backend/tracker/duplicates.py ---
+"""
+Possible duplicate expenses, flagged as they are entered.
+
+Every expense stores a fingerprint: a hash of its date, amount (normalized,
+so 12.5 and 12.50 agree), currency and the words of its description with
+case, accents, punctuation, word order and filler words ("at", "the", ...)
+dropped. When two people both enter the shared dinner as "Dinner at Som Tam"
+and "som tam - dinner", both rows get the same fingerprint, and finding the
+other one is a lookup on the (ledger, fingerprint) index: no scan of the
+ledger's expenses here, and no need for the client to download them all.
+
+Creates and bulk imports (ExpenseViewSet) answer with "possible_duplicates"
+per row. Nothing is rejected: two identical coffees on one day happen.
+
+The pre_save receiver keeps the fingerprint current on save(), and
+Expense.save adds it to update_fields that name one of its inputs
+(Expense.FINGERPRINT_FIELDS); bulk_create callers set it with of(). Changing the normalization means recomputing the
+stored fingerprints (see migration 0013).
+"""
+import hashlib
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from . import money
+from .models import Expense
+
+STOPWORDS = frozenset("a an and at for from in of on the to with".split())
+_WORD = re.compile(r"\w+")
+
+
+def tokens(description):
+    """The description's distinct words, sorted: lowercased, accents stripped, filler words dropped."""
+    text = unicodedata.normalize("NFKD", description.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return sorted({w for w in _WORD.findall(text) if w not in STOPWORDS})
+
+
+def fingerprint(day, amount_minor, amount_exponent, currency, description):
+    amount = money.to_decimal(amount_minor, amount_exponent).normalize()
+    key = f"{day}|{amount:f}|{currency.upper()}|{' '.join(tokens(description))}"
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def of(expense):
+    return fingerprint(expense.date, expense.amount_minor, expense.amount_exponent, expense.currency,
+                       expense.description)
+
+
+@receiver(pre_save, sender=Expense)
+def _fingerprint(sender, instance, **kwargs):
+    instance.fingerprint = of(instance)
+
+
+# -------------------------
+# Lookup
+# -------------------------
+def summary(expense):
+    return {
+        "id": expense.pk,
+        "date": str(expense.date),
+        "description": expense.description,
+        "amount": money.fmt_amount(expense.amount_minor, expense.amount_exponent),
+        "currency": expense.currency,
+        "paid_by": expense.paid_by.name,
+    }
+
+
+def attach(ledger_id, expenses):
+    """
+    Set `possible_duplicates` (summary() of each other stored expense with the
+    same fingerprint, oldest first) on saved `expenses`, in one indexed query.
+    Rows saved together match each other too.
+    """
+    matches = defaultdict(list)
+    # equal fingerprints mean equal dates, so the date filter changes nothing but prunes partitions
+    found = (Expense.objects.filter(ledger_id=ledger_id, fingerprint__in={e.fingerprint for e in expenses},
+                                    date__in={e.date for e in expenses})
+             .select_related("paid_by").order_by("id"))
+    for other in found:
+        matches[other.fingerprint].append(other)
+    for expense in expenses:
+        expense.possible_duplicates = [summary(o) for o in matches[expense.fingerprint] if o.pk != expense.pk]
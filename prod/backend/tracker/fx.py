@@ -0,0 +1,38 @@
+# --- backend/tracker/fx.py ---
+"""
+Frankfurter upstream client (no key required).
+
+fetch_rate() runs in the fx.fetch job (tracker/jobs.py) and revalue_expenses
+--fetch, never inside a request; its session keeps connections alive between
+lookups.
+"""
+from decimal import Decimal, InvalidOperation
+
+import requests
+
+FRANKFURTER_URL = "https://api.frankfurter.app/{date}?from={base}&to={quote}"
+TIMEOUT = 10
+
+_session = requests.Session()  # keep-alive pool for the job worker
+
+
+def _url(query_date, base, quote):
+    return FRANKFURTER_URL.format(date=query_date.isoformat(), base=base, quote=quote)
+
+
+def _parse(data, quote) -> Decimal:
+    # Frankfurter returns e.g. {"amount":1.0,"base":"CAD","date":"2025-10-23","rates":{"THB":25.3829}}
+    rate_raw = (data.get("rates") or {}).get(quote)
+    if rate_raw is None:
+        raise RuntimeError(f"Missing rate for {quote}: {data}")
+    try:
+        return Decimal(str(rate_raw))
+    except InvalidOperation:
+        raise RuntimeError(f"Invalid rate value: {rate_raw}")
+
+
+def fetch_rate(query_date, base, quote) -> Decimal:
+    r = _session.get(_url(query_date, base, quote), timeout=TIMEOUT)
+    r.raise_for_status()
+    return _parse(r.json(), quote)
+
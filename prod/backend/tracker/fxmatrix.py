@@ -0,0 +1,159 @@
+# --- backend/tracker/fxmatrix.py ---
+"""
+In-memory FX rate matrix for reporting in any currency.
+
+FxRate rows are loaded into a dense NumPy array: one row per calendar day, one
+column per currency. Each cell holds the CAD value of one unit of that currency
+(CAD is the hub). Days without a stored rate carry the last known rate forward;
+days before the first rate use the first one. Converting N rows to a reporting
+currency then takes a few array operations instead of N rate lookups.
+
+Each process (gunicorn workers, the job worker that fetches rates) keeps its
+own matrix and checks it against the table itself, not a cache: one
+COUNT/MAX(updated_at) query per call. Rows saved since the last check are
+merged in; a count that doesn't add up (a delete) reloads the whole table.
+Writes that skip auto_now (queryset update) must set updated_at themselves.
+"""
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import Count, Max
+
+from .models import FxRate
+
+HUB = "CAD"
+
+
+class RateMatrix:
+    def __init__(self):
+        self.start = None                        # date of row 0
+        self.codes = [HUB]
+        self.col = {HUB: 0}
+        self.raw = np.full((0, 1), np.nan)       # stored rates only (NaN = none that day)
+        self.filled = self.raw                   # raw, gaps filled
+        self.ids = set()                         # every FxRate row merged in, hub pair or not
+
+    @property
+    def end(self):
+        return self.start + timedelta(days=len(self.raw) - 1) if self.start else None
+
+    def add(self, rows):
+        """Merge (id, date, base, quote, rate) rows. Only hub pairs (X->CAD or CAD->X) are used."""
+        rows = list(rows)
+        self.ids.update(r[0] for r in rows)
+        rows = [r for r in rows if HUB in (r[2], r[3]) and r[2] != r[3] and r[4]]
+        if not rows:
+            return
+        _, dates, bases, quotes, rates = zip(*rows)
+
+        for code in (*bases, *quotes):
+            if code not in self.col:
+                self.col[code] = len(self.codes)
+                self.codes.append(code)
+        if self.raw.shape[1] < len(self.codes):
+            self.raw = np.pad(self.raw, ((0, 0), (0, len(self.codes) - self.raw.shape[1])),
+                              constant_values=np.nan)
+
+        lo, hi = min(dates), max(dates)
+        if self.start is None:
+            self.start = lo
+            self.raw = np.full(((hi - lo).days + 1, len(self.codes)), np.nan)
+        else:
+            before = max((self.start - lo).days, 0)
+            after = max((hi - self.end).days, 0)
+            if before or after:
+                self.raw = np.pad(self.raw, ((before, after), (0, 0)), constant_values=np.nan)
+                self.start -= timedelta(days=before)
+
+        day = np.array([(d - self.start).days for d in dates])
+        to_hub = np.array([q == HUB for q in quotes])
+        col = np.array([self.col[b] if t else self.col[q] for b, q, t in zip(bases, quotes, to_hub)])
+        value = np.array([float(r) for r in rates])
+        self.raw[day, col] = np.where(to_hub, value, 1.0 / value)   # CAD per unit
+        self._fill()
+
+    def _fill(self):
+        raw = self.raw.copy()
+        raw[:, 0] = 1.0
+        rows = np.arange(len(raw))[:, None]
+        seen = ~np.isnan(raw)
+        # forward fill: index of the last observed row at or before each row
+        last = np.maximum.accumulate(np.where(seen, rows, 0), axis=0)
+        filled = np.take_along_axis(raw, last, axis=0)
+        # leading gaps: the first observed value in each column
+        first = np.argmax(seen, axis=0)
+        lead = np.isnan(filled) & (rows < first)
+        filled[lead] = np.broadcast_to(raw[first, np.arange(raw.shape[1])], filled.shape)[lead]
+        self.filled = filled
+
+    def day_index(self, dates):
+        """Row for each date (numpy datetime64[D] or date list), clamped to the loaded range."""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        offset = (dates - np.datetime64(self.start, "D")).astype(int)
+        return np.clip(offset, 0, len(self.filled) - 1)
+
+    def cad_per_unit(self, code, dates):
+        """CAD value of one `code` on each date; NaN where the currency has no rates at all."""
+        if code not in self.col or self.start is None:
+            return np.full(len(dates), np.nan)
+        return self.filled[self.day_index(dates), self.col[code]]
+
+    def from_cad(self, cad_amounts, dates, code):
+        """Convert CAD amounts booked on `dates` into `code` at each date's rate."""
+        return np.asarray(cad_amounts, dtype=float) / self.cad_per_unit(code, dates)
+
+
+_matrix = RateMatrix()
+_seen = None        # (row count, latest updated_at) of FxRate when _matrix was last brought up to date
+_lock = threading.Lock()
+
+
+def _state():
+    state = FxRate.objects.aggregate(count=Count("id"), latest=Max("updated_at"))
+    return state["count"], state["latest"]
+
+
+def _load(matrix, since=None):
+    rows = FxRate.objects.order_by("id")
+    if since is not None:
+        rows = rows.filter(updated_at__gte=since)  # >=: rows saved in the same instant as the last check
+    matrix.add(rows.values_list("id", "date", "base", "quote", "rate").iterator(chunk_size=5000))
+    return matrix
+
+
+def get():
+    """This process's matrix, brought up to date with FxRate."""
+    global _matrix, _seen
+    current = _state()
+    if current == _seen:
+        return _matrix
+    with _lock:
+        if _seen is None or _seen[1] is None or current[0] < _seen[0]:
+            _matrix = _load(RateMatrix())
+        else:
+            _load(_matrix, since=_seen[1])      # inserts and updates
+            if len(_matrix.ids) != current[0]:  # a delete (or a row saved with an older clock)
+                _matrix = _load(RateMatrix())
+        _seen = current
+    return _matrix
+
+
+def rate_from_cad(code, on=None):
+    """Units of `code` per CAD on a date (default: the latest loaded day), as a Decimal; None if unknown."""
+    if code == HUB:
+        return Decimal("1")
+    matrix = get()
+    if matrix.start is None:
+        return None
+    per_unit = matrix.cad_per_unit(code, [on or matrix.end])[0]
+    if np.isnan(per_unit):
+        return None
+    return Decimal(repr(1.0 / float(per_unit))).quantize(Decimal("0.00000001"))
+
+
+def invalidate():
+    """Reload this process's matrix on the next get(); other processes notice changed rows by themselves."""
+    global _seen
+    _seen = None
@@ -0,0 +1,82 @@
+# --- backend/tracker/idempotency.py ---
+"""
+Idempotency-Key support for mutating API calls.
+
+The first request with a given key runs normally. Its response is saved in the
+same transaction as its writes, keyed by (user, key). A retry with the same key
+gets that response back (with Idempotent-Replayed: true) without running
+validation or writes again. A concurrent retry blocks on the unique key until
+the first request commits, then replays it.
+
+Errors (exceptions, 5xx) roll the record back with everything else, so the
+retry runs for real. Reusing a key for a different request returns 422.
+Records expire after IDEMPOTENCY_TTL seconds.
+"""
+import hashlib
+import json
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyRecord
+
+HEADER = "Idempotency-Key"
+PRUNE_CHANCE = 0.01  # fraction of keyed writes that also delete expired records
+
+
+def _fingerprint(request):
+    h = hashlib.sha256()
+    for part in (request.method, request.get_full_path(), request.body):
+        h.update(part if isinstance(part, bytes) else part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return Response({"detail": f"{HEADER} was already used for a different request."}, status=422)
+    return Response(record.response_body, status=record.status_code, headers={"Idempotent-Replayed": "true"})
+
+
+def run(request, handler):
+    """Call `handler()` (a DRF view method) at most once per Idempotency-Key."""
+    key = request.headers.get(HEADER)
+    if not key:
+        return handler()
+    if len(key) > 255:
+        return Response({"detail": f"{HEADER} is too long."}, status=400)
+
+    fingerprint = _fingerprint(request)
+    cutoff = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_TTL)
+    existing = IdempotencyRecord.objects.filter(user=request.user, key=key).first()
+    if existing and existing.created_at >= cutoff:
+        return _replay(existing, fingerprint)
+    if existing:
+        existing.delete()
+    if random.random() < PRUNE_CHANCE:
+        IdempotencyRecord.objects.filter(created_at__lt=cutoff).delete()
+
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                record = IdempotencyRecord.objects.create(
+                    user=request.user, key=key, fingerprint=fingerprint,
+                    method=request.method, path=request.path[:255])
+        except IntegrityError:
+            # a concurrent request with this key just committed
+            return _replay(IdempotencyRecord.objects.get(user=request.user, key=key), fingerprint)
+
+        response = handler()
+        if response.status_code >= 500:
+            transaction.set_rollback(True)
+            return response
+        record.status_code = response.status_code
+        # as DRF would render it (Decimals from method fields become numbers, etc.)
+        record.response_body = json.loads(json.dumps(response.data, cls=JSONEncoder))
+        record.save(update_fields=["status_code", "response_body"])
+    return response
@@ -0,0 +1,229 @@
+# --- backend/tracker/jobs.py ---
+"""
+Postgres-backed job queue.
+
+enqueue() inserts a Job row; `manage.py run_jobs` workers claim ready jobs with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers can poll the same
+table without blocking each other or double-running a job. The claim commits
+straight away (status=running) and the handler runs outside that transaction.
+
+Failures are retried with exponential backoff until max_attempts (a
+ValidationError fails the job at once: it would fail again); a job whose
+worker died mid-run is reclaimed once it has been running for STALE_AFTER.
+
+Handlers are plain functions registered with @handler("kind"); the ones marked
+public=True may also be enqueued through POST /api/jobs/, each with a payload
+serializer in serializers.JOB_PAYLOADS that is checked before it is queued.
+"""
+import csv
+import logging
+import random
+import secrets
+import traceback
+from datetime import date as dte, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from rest_framework import serializers
+
+from . import balances, fx, money, receipts, recents
+from .metrics import FX_UPSTREAM
+from .models import Expense, FxRate, Job, Ledger, Party
+
+log = logging.getLogger(__name__)
+
+BACKOFF_BASE = 5          # seconds before the first retry; doubles per attempt
+BACKOFF_MAX = 15 * 60
+STALE_AFTER = 10 * 60     # a running job older than this is assumed orphaned
+
+HANDLERS = {}
+PUBLIC_KINDS = set()
+
+
+def handler(kind, public=False):
+    def register(fn):
+        HANDLERS[kind] = fn
+        if public:
+            PUBLIC_KINDS.add(kind)
+        return fn
+    return register
+
+
+def enqueue(kind, payload=None, key=None, run_after=None, user=None, max_attempts=5):
+    """
+    Queue a job. With `key`, an already queued/running job for the same key is
+    returned instead of adding a duplicate.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"unknown job kind {kind!r}")
+    fields = dict(kind=kind, payload=payload or {}, key=key, max_attempts=max_attempts,
+                  run_after=run_after or timezone.now(),
+                  created_by=user if user is not None and user.is_authenticated else None)
+    if key is None:
+        return Job.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Job.objects.create(**fields)
+    except IntegrityError:
+        existing = Job.objects.filter(key=key, status__in=[Job.QUEUED, Job.RUNNING]).first()
+        if existing is None:  # finished between our insert and this lookup
+            return Job.objects.create(**fields)
+        return existing
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return timedelta(seconds=delay * random.uniform(1.0, 1.1))
+
+
+def claim(worker):
+    """Lock the next ready job for `worker`, or None. One short transaction."""
+    now = timezone.now()
+    ready = (Q(status=Job.QUEUED, run_after__lte=now)
+             | Q(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=STALE_AFTER)))
+    with transaction.atomic():
+        job = (Job.objects.select_for_update(skip_locked=True)
+               .filter(ready).order_by("run_after", "id").first())
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.locked_at = now
+        job.locked_by = worker
+        job.save(update_fields=["status", "attempts", "locked_at", "locked_by"])
+    return job
+
+
+def run(job):
+    """Run a claimed job and record the outcome (done, retry later, or failed)."""
+    try:
+        result = HANDLERS[job.kind](**job.payload)
+    except Exception as e:
+        log.warning("job %s (%s) attempt %s failed: %s", job.pk, job.kind, job.attempts, e)
+        job.last_error = "".join(traceback.format_exception_only(type(e), e)).strip()
+        # a ValidationError will fail the same way every time (e.g. the period got closed meanwhile)
+        if (job.attempts < job.max_attempts and job.kind in HANDLERS
+                and not isinstance(e, serializers.ValidationError)):
+            job.status = Job.QUEUED
+            job.run_after = timezone.now() + backoff(job.attempts)
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = Job.DONE
+        job.result = result
+        job.finished_at = timezone.now()
+    job.locked_at = None
+    job.save(update_fields=["status", "result", "last_error", "run_after", "locked_at", "finished_at"])
+    return job
+
+
+def run_next(worker):
+    """Claim and run one job; returns it, or None when nothing is ready."""
+    job = claim(worker)
+    return run(job) if job is not None else None
+
+
+# -------------------------
+# Handlers
+# -------------------------
+def fx_key(query_date, base, quote):
+    """Dedupe key of the fx.fetch job for one rate, so every caller shares the one fetch."""
+    return f"fx:{query_date.isoformat()}:{base}:{quote}"
+
+
+@handler("fx.fetch")
+def fetch_fx(date, base, quote):
+    """Fetch one rate from Frankfurter into the FxRate cache (queued by the fx-rate view on a miss, and by revalue)."""
+    query_date = dte.fromisoformat(date)
+    try:
+        rate = fx.fetch_rate(query_date, base, quote)
+    except Exception:
+        FX_UPSTREAM.labels("error").inc()
+        raise
+    FX_UPSTREAM.labels("ok").inc()
+    FxRate.objects.update_or_create(date=query_date, base=base, quote=quote, defaults={"rate": rate})
+    return {"rate": str(rate)}
+
+
+@handler("recents.flush")
+def flush_recents(user=None):
+    """Write one user's buffered recent currencies (queued by recents.touch)."""
+    return {"flushed": recents.flush(user)}
+
+
+@handler("periods.close", public=True)
+def close_period(ledger, through, user=None):
+    """
+    Roll a ledger's balances up through `through` into a PeriodClose snapshot.
+    The payload was checked when queued (PeriodClosePayload); what may have
+    changed since is checked again here.
+    """
+    ledger = Ledger.objects.get(pk=ledger)
+    user = get_user_model().objects.filter(pk=user).first() if user else None
+    if user is not None and not user.is_staff:
+        raise serializers.ValidationError("Only editors can close periods.")
+    household, bev = balances.household_and_bev(list(Party.objects.filter(ledger=ledger)))
+    if not household or not bev:
+        raise serializers.ValidationError("Parties not bootstrapped yet.")
+    snap = balances.close_period(ledger, dte.fromisoformat(through), household, bev, user=user)
+    return {"period": snap.pk}
+
+
+@handler("expenses.export", public=True)
+def export_expenses(ledger, user=None):
+    """
+    Write a ledger's expenses to EXPORTS_ROOT as CSV. The file is private: it is
+    downloaded from /api/jobs/<id>/file/ (export_response), never from /media/.
+    """
+    ledger = Ledger.objects.get(pk=ledger)
+    out_dir = Path(settings.EXPORTS_ROOT)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    name = f"{ledger.slug}-expenses-{timezone.now():%Y%m%d-%H%M%S}-{secrets.token_hex(4)}.csv"
+    columns = ["id", "date", "description", "category", "currency", "amount_minor", "amount_exponent",
+               "fx_to_cad_e8", "paid_by__name", "paid_by__party__name", "weight_household", "weight_bev", "notes"]
+    rows = Expense.objects.filter(ledger=ledger).order_by("date", "id").values_list(*columns)
+    with open(out_dir / name, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "date", "description", "category", "currency", "amount", "fx_to_cad",
+                         "paid_by__name", "paid_by__party__name", "weight_household", "weight_bev", "notes"])
+        for row in rows.iterator(chunk_size=2000):
+            amount, fx_rate = money.fmt_amount(row[5], row[6]), money.fmt(row[7], money.FX_PLACES)
+            writer.writerow([*row[:5], amount, fx_rate, *row[8:]])
+    return {"file": name, "ledger": ledger.slug}
+
+
+def export_response(job):
+    """
+    The CSV of a finished "expenses.export" job, for an already-authorised
+    request: an X-Accel-Redirect for nginx, or the file itself without
+    EXPORTS_ACCEL_PREFIX.
+    """
+    name = job.result["file"]
+    prefix = settings.EXPORTS_ACCEL_PREFIX
+    if prefix:
+        response = HttpResponse(content_type="text/csv")
+        response["X-Accel-Redirect"] = f"{prefix.rstrip('/')}/{name}"
+    else:
+        response = FileResponse(open(Path(settings.EXPORTS_ROOT) / name, "rb"), content_type="text/csv")
+    response["Content-Disposition"] = content_disposition_header(True, name)
+    response["Cache-Control"] = "private, no-store"
+    return response
+
+
+@handler("receipts.thumbnail")
+def receipt_thumbnail(sha256):
+    """Thumbnail for a newly stored receipt image (queued when its upload completes)."""
+    return {"thumbnail": receipts.make_thumbnail(sha256)}
+
+
+@handler("receipts.cleanup")
+def receipt_cleanup():
+    """Remove abandoned uploads and unused receipt files (queued, one at a time, as uploads start)."""
+    return receipts.cleanup()
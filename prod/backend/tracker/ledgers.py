@@ -0,0 +1,103 @@
+# --- backend/tracker/ledgers.py ---
+"""
+Which ledger (trip) a request works in.
+
+Clients pick one with the X-Ledger header or ?ledger=<slug>; without either the
+request goes to the user's oldest ledger, so single-ledger clients keep working
+unchanged. Only ledgers the user is a member of (Ledger.members) resolve; any
+other slug is a 404, the same answer as for a slug that doesn't exist.
+
+Lookups are cached per user and slug under a generation counter that every
+ledger or membership change bumps, so a removed member loses access at once.
+Management commands pass no user and may reach every ledger.
+"""
+import time
+
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.exceptions import NotFound
+
+from .models import Ledger
+
+DEFAULT_SLUG = "default"
+CACHE_TIMEOUT = 300
+GENERATION_KEY = "ledgers:generation"
+
+
+def _generation():
+    gen = cache.get(GENERATION_KEY)
+    if gen is None:
+        cache.add(GENERATION_KEY, time.time_ns() // 1000, None)  # restarts from the clock, as versions.get does
+        gen = cache.get(GENERATION_KEY)
+    return gen
+
+
+def _key(gen, user, slug):
+    return f"ledgers:{gen}:{'*' if user is None else user.pk}:{slug or ''}"
+
+
+def requested_slug(request):
+    return request.META.get("HTTP_X_LEDGER") or request.GET.get("ledger") or None
+
+
+def _candidates(slug, user):
+    if user is not None and not user.is_authenticated:
+        return None
+    qs = Ledger.objects.all() if user is None else Ledger.objects.filter(members=user)
+    return qs.filter(slug=slug) if slug else qs.order_by("pk")
+
+
+def _missing(slug):
+    return NotFound(f"No ledger {slug!r}." if slug else "No ledger yet; run bootstrap_tracker.")
+
+
+def resolve(slug=None, user=None):
+    key = _key(_generation(), user, slug)
+    ledger = cache.get(key)
+    if ledger is None:
+        qs = _candidates(slug, user)
+        ledger = qs.first() if qs is not None else None
+        if ledger is None:
+            raise _missing(slug)
+        cache.set(key, ledger, CACHE_TIMEOUT)
+    return ledger
+
+
+async def aresolve(slug=None, user=None):
+    gen = await cache.aget(GENERATION_KEY)
+    if gen is None:
+        await cache.aadd(GENERATION_KEY, time.time_ns() // 1000, None)
+        gen = await cache.aget(GENERATION_KEY)
+    key = _key(gen, user, slug)
+    ledger = await cache.aget(key)
+    if ledger is None:
+        qs = _candidates(slug, user)
+        ledger = await qs.afirst() if qs is not None else None
+        if ledger is None:
+            raise _missing(slug)
+        await cache.aset(key, ledger, CACHE_TIMEOUT)
+    return ledger
+
+
+def for_request(request):
+    return resolve(requested_slug(request), request.user)
+
+
+def bump():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:  # not set; the next lookup starts a fresh generation
+        pass
+
+
+@receiver(post_save, sender=Ledger)
+@receiver(post_delete, sender=Ledger)
+def _ledger_changed(sender, instance, **kwargs):
+    bump()
+
+
+@receiver(m2m_changed, sender=Ledger.members.through)
+def _members_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump()
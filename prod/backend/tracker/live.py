@@ -0,0 +1,208 @@
+# --- backend/tracker/live.py ---
+"""
+Live ledger updates over Server-Sent Events (GET /api/events/).
+
+Writers: Expense/Settlement signals call pg_notify() inside the writing
+transaction, so Postgres delivers the event when (and only if) the write
+commits. Payloads are tiny: {"ledger", "type", "id"}. Inside batch() (bulk
+imports) the per-row events are skipped and one "ledger.changed" is sent
+instead, so readers recompute the summary once, not once per row.
+
+Readers: each ASGI worker process keeps one LISTEN connection (the Hub),
+shared by all of its SSE clients. For each notification the hub computes the
+ledger's summary once and puts {"type", "id", "summary"} on the queue of every
+client watching that ledger. A client's stream is an async generator waiting
+on its queue, so an idle connection costs a coroutine, not a worker thread or
+a DB connection. After the LISTEN connection drops, clients get a "resync"
+event since they may have missed changes.
+
+Needs PostgreSQL and SERVER_MODE=asgi (under WSGI each stream would pin a
+worker, so the sync view answers 501).
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import psycopg
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection, connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import balances
+from .models import Expense, Party, Settlement
+
+log = logging.getLogger(__name__)
+
+_batching = ContextVar("live_batching", default=frozenset())  # ledger ids inside batch()
+
+CHANNEL = "tracker_ledger"
+KEEPALIVE = 15        # seconds between comment lines, so proxies keep the stream open
+QUEUE_SIZE = 100      # events buffered per client before it is told to resync
+RETRY_MS = 5000       # EventSource reconnect delay
+
+
+# -------------------------
+# Writers
+# -------------------------
+def notify(ledger_id, kind, pk=None):
+    """Queue a change event; sent on commit of the current transaction."""
+    if connection.vendor != "postgresql":
+        return
+    payload = json.dumps({"ledger": ledger_id, "type": kind, "id": pk}, separators=(",", ":"))
+    with connection.cursor() as cur:
+        cur.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+
+
+@contextmanager
+def batch(ledger_id):
+    """
+    Write many rows of a ledger as one change: row signals inside skip their
+    events (and data-version bumps, see versions.py), then one
+    "ledger.changed" is queued. Use inside the writing transaction.
+    """
+    token = _batching.set(_batching.get() | {ledger_id})
+    try:
+        yield
+    finally:
+        _batching.reset(token)
+    notify(ledger_id, "ledger.changed")
+
+
+def batching(ledger_id):
+    return ledger_id in _batching.get()
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=Settlement)
+def _saved(sender, instance, created, **kwargs):
+    if batching(instance.ledger_id):
+        return
+    notify(instance.ledger_id, f"{sender._meta.model_name}.{'created' if created else 'updated'}", instance.pk)
+
+
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Settlement)
+def _deleted(sender, instance, **kwargs):
+    if batching(instance.ledger_id):
+        return
+    notify(instance.ledger_id, f"{sender._meta.model_name}.deleted", instance.pk)
+
+
+# -------------------------
+# Readers
+# -------------------------
+async def ledger_summary(ledger_id):
+    await sync_to_async(close_old_connections)()  # no request cycle around the hub's queries
+    household, bev = balances.household_and_bev([p async for p in Party.objects.filter(ledger_id=ledger_id)])
+    if not household or not bev:
+        return None
+    return await balances.asummary(ledger_id, household, bev)
+
+
+def _conninfo():
+    s = connections["default"].settings_dict
+    return {"dbname": s["NAME"], "user": s["USER"], "password": s["PASSWORD"],
+            "host": s["HOST"] or None, "port": s["PORT"] or None}
+
+
+class Hub:
+    """One LISTEN connection per event loop, fanned out to per-client queues."""
+
+    def __init__(self):
+        self.queues = defaultdict(set)
+        self.task = None
+        self.listening = None  # asyncio.Event, set while LISTEN is active
+
+    def subscribe(self, ledger_id):
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.listening = asyncio.Event()
+            self.task = loop.create_task(self._listen())
+        queue = asyncio.Queue(QUEUE_SIZE)
+        self.queues[ledger_id].add(queue)
+        return queue
+
+    def unsubscribe(self, ledger_id, queue):
+        subscribers = self.queues.get(ledger_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self.queues[ledger_id]
+        if not self.queues and self.task is not None:
+            self.task.cancel()  # last client gone: release the connection
+            self.task = None
+
+    def _put(self, queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:  # slow client: drop its backlog, have it reload
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"type": "resync"})
+
+    async def _dispatch(self, payload):
+        ledger_id = payload.get("ledger")
+        if not self.queues.get(ledger_id):
+            return
+        event = {"type": payload.get("type"), "id": payload.get("id"), "summary": await ledger_summary(ledger_id)}
+        for queue in list(self.queues.get(ledger_id, ())):
+            self._put(queue, event)
+
+    async def _listen(self):
+        delay, reconnect = 1, False
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(**_conninfo(), autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    self.listening.set()
+                    delay = 1
+                    if reconnect:
+                        for subscribers in list(self.queues.values()):
+                            for queue in list(subscribers):
+                                self._put(queue, {"type": "resync"})
+                    async for note in conn.notifies():
+                        try:
+                            await self._dispatch(json.loads(note.payload))
+                        except Exception:
+                            log.exception("live: dropping event %s", note.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("live: LISTEN connection lost (%s); retrying in %ss", e, delay)
+            self.listening.clear()
+            reconnect = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+hub = Hub()
+
+
+def _sse(event):
+    return f"data: {json.dumps(event, cls=JSONEncoder, separators=(',', ':'))}\n\n"
+
+
+async def stream(ledger_id):
+    """The text/event-stream body for one client: a "ready" event with the summary, then changes."""
+    queue = hub.subscribe(ledger_id)  # before the first summary, so nothing falls in between
+    try:
+        try:
+            await asyncio.wait_for(hub.listening.wait(), KEEPALIVE)
+        except asyncio.TimeoutError:
+            pass  # DB unreachable for now; the hub sends "resync" once it reconnects
+        yield f"retry: {RETRY_MS}\n" + _sse({"type": "ready", "ledger": ledger_id,
+                                             "summary": await ledger_summary(ledger_id)})
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield _sse(event)
+    finally:
+        hub.unsubscribe(ledger_id, queue)
@@ -0,0 +1,60 @@
+# --- backend/tracker/management/commands/bench_auth_queries.py ---
+import uuid
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from tracker.models import FxRate
+
+MODES = {
+    "before (db sessions, uncached user)": {
+        "SESSION_ENGINE": "django.contrib.sessions.backends.db",
+        "AUTHENTICATION_BACKENDS": ["django.contrib.auth.backends.ModelBackend"],
+    },
+    "after (cached_db sessions, cached user)": {
+        "SESSION_ENGINE": "django.contrib.sessions.backends.cached_db",
+        "AUTHENTICATION_BACKENDS": ["tracker.auth.CachedModelBackend"],
+    },
+}
+
+
+class Command(BaseCommand):
+    help = ("Measure SQL queries per authenticated request for cheap endpoints "
+            "with DB vs cache-backed sessions. Runs in a rolled-back transaction.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Warm requests per endpoint (averaged).")
+
+    def handle(self, *args, **opts):
+        repeat = opts["repeat"]
+        today = date.today()
+        endpoints = [
+            ("whoami", "/api/whoami/"),
+            ("fx_rate (cache hit)", f"/api/fx-rate/?date={today.isoformat()}&base=BNC&quote=CAD"),
+        ]
+
+        with transaction.atomic():
+            password = uuid.uuid4().hex
+            user = User.objects.create_user(f"bench-{uuid.uuid4().hex[:8]}", password=password)
+            FxRate.objects.create(date=today, base="BNC", quote="CAD", rate=1)
+
+            for label, overrides in MODES.items():
+                with override_settings(ALLOWED_HOSTS=["*"], **overrides):
+                    client = Client()  # new client: middleware picks up SESSION_ENGINE
+                    client.login(username=user.username, password=password)
+                    self.stdout.write(self.style.MIGRATE_HEADING(label))
+                    for name, url in endpoints:
+                        client.get(url)  # warm session/user caches
+                        counts = []
+                        for _ in range(repeat):
+                            with CaptureQueriesContext(connection) as ctx:
+                                client.get(url)
+                            counts.append(len(ctx.captured_queries))
+                        self.stdout.write(f"  {name:<22} {sum(counts) / len(counts):.1f} queries/request")
+                    client.logout()
+
+            transaction.set_rollback(True)
@@ -1,22 +1,27 @@
 # --- backend/tracker/management/commands/bootstrap_tracker.py ---
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from tracker.models import Party
+from tracker.models import Ledger, Party
 
 class Command(BaseCommand):
-    help = "Create default parties (Household, Bev) and an admin user if missing."
+    help = "Create a ledger with default parties (Household, Bev) and an admin user if missing."
 
     def add_arguments(self, parser):
         parser.add_argument("--admin-email", default="chris@example.com")
         parser.add_argument("--admin-password", default="changeme")
+        parser.add_argument("--ledger", default="default", help="Ledger slug; run again with a new slug per trip.")
+        parser.add_argument("--ledger-name", default=None)
 
     def handle(self, *args, **opts):
-        # Parties
-        Party.objects.get_or_create(name="Household (Chris+Tressa)", slug="household", defaults={"is_household": True})
-        Party.objects.get_or_create(name="Bev", slug="bev", defaults={"is_household": False})
-        self.stdout.write(self.style.SUCCESS("Parties ensured."))
+        # Ledger + parties
+        ledger, _ = Ledger.objects.get_or_create(
+            slug=opts["ledger"], defaults={"name": opts["ledger_name"] or opts["ledger"].title()})
+        Party.objects.get_or_create(ledger=ledger, name="Household (Chris+Tressa)", slug="household", defaults={"is_household": True})
+        Party.objects.get_or_create(ledger=ledger, name="Bev", slug="bev", defaults={"is_household": False})
+        self.stdout.write(self.style.SUCCESS(f"Ledger {ledger.slug!r} and parties ensured."))
         # Admin
-        if not User.objects.filter(username="admin").exists():
+        u = User.objects.filter(username="admin").first()
+        if u is None:
             u = User.objects.create_user("admin", opts["admin_email"], opts["admin_password"]) 
             u.is_staff = True
             u.is_superuser = True
@@ -24,3 +29,5 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS("Admin user created: admin / <provided>"))
         else:
             self.stdout.write("Admin user already exists.")
+        ledger.members.add(u)  # add everyone else to the ledger in the admin
+        self.stdout.write(f"admin is a member of {ledger.slug!r}.")
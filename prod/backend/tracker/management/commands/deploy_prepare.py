@@ -0,0 +1,65 @@
+# --- backend/tracker/management/commands/deploy_prepare.py ---
+import hashlib
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from tracker import partitioning
+
+STAMP_NAME = ".static-fingerprint"
+IGNORE = ["CVS", ".*", "*~"]  # collectstatic's defaults
+
+
+def static_fingerprint():
+    """sha256 over every file collectstatic would copy (path + contents)."""
+    h = hashlib.sha256(str(settings.STATIC_URL).encode())
+    entries = []
+    for finder in get_finders():
+        for path, storage in finder.list(IGNORE):
+            entries.append((path, storage.path(path)))
+    for rel, full in sorted(entries):
+        h.update(rel.encode())
+        with open(full, "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+
+class Command(BaseCommand):
+    help = ("Container start step: run collectstatic only if static sources changed, "
+            "migrate only if there are unapplied migrations, and add upcoming expense partitions.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Run both steps regardless.")
+
+    def handle(self, *args, **opts):
+        force = opts["force"]
+
+        # --- static ---
+        stamp = Path(settings.STATIC_ROOT) / STAMP_NAME
+        fingerprint = static_fingerprint()
+        if not force and stamp.exists() and stamp.read_text().strip() == fingerprint:
+            self.stdout.write("collectstatic: unchanged, skipped.")
+        else:
+            call_command("collectstatic", interactive=False, verbosity=0)
+            stamp.write_text(fingerprint)
+            self.stdout.write(self.style.SUCCESS("collectstatic: done."))
+
+        # --- migrations: one read of django_migrations against the on-disk graph ---
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if not force and not plan:
+            self.stdout.write("migrate: nothing to apply, skipped.")
+        else:
+            self.stdout.write(f"migrate: applying {len(plan)} migration(s).")
+            call_command("migrate", interactive=False)
+
+        # --- expense partitions (only if the table was converted) ---
+        if partitioning.is_partitioned():
+            created = partitioning.ensure_partitions(years_ahead=1)
+            if created:
+                self.stdout.write(f"partitions: created {', '.join(created)}.")
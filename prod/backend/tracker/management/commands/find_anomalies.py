@@ -0,0 +1,48 @@
+# --- backend/tracker/management/commands/find_anomalies.py ---
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import NotFound
+from tracker import anomalies, ledgers
+from tracker.models import Expense
+
+
+class Command(BaseCommand):
+    help = ("List expenses that stand out (robust z-scores of the CAD amount by category, currency and "
+            "weekday, and of the FX rate by currency) and likely duplicates. Read-only.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ledger", help="Ledger slug (default: the default ledger).")
+        parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("--z", type=float, default=anomalies.THRESHOLD, help="Flag |z| above this.")
+        parser.add_argument("--limit", type=int, default=50)
+
+    def handle(self, *args, **opts):
+        try:
+            ledger = ledgers.resolve(opts["ledger"])
+        except NotFound as e:
+            raise CommandError(str(e.detail))
+        expenses = Expense.objects.filter(ledger=ledger)
+        if opts["date_from"]:
+            expenses = expenses.filter(date__gte=opts["date_from"])
+        if opts["date_to"]:
+            expenses = expenses.filter(date__lte=opts["date_to"])
+
+        t0 = time.perf_counter()
+        result = anomalies.report(expenses, opts["z"], opts["limit"])
+        elapsed = (time.perf_counter() - t0) * 1000
+
+        for o in result["outliers"]:
+            self.stdout.write(f"  #{o['id']} {o['date']} {o['amount']} {o['currency']} @ {o['fx_to_cad']} "
+                              f"= {o['amount_cad']} CAD  {o['category']}  {o['description']!r}  score {o['score']}")
+            for r in o["reasons"]:
+                self.stdout.write(f"      {r['check']}: z {r['z']} (typical {r['typical']})")
+        for group in result["duplicates"]:
+            first = group[0]
+            ids = ", ".join(f"#{row['id']}" for row in group)
+            self.stdout.write(f"  duplicate? {first['date']} {first['amount']} {first['currency']}: {ids}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(result['outliers'])} outlier(s), {len(result['duplicates'])} duplicate group(s) "
+            f"in {result['count']} expenses ({elapsed:.0f} ms)."))
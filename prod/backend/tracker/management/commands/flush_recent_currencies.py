@@ -0,0 +1,10 @@
+# --- backend/tracker/management/commands/flush_recent_currencies.py ---
+from django.core.management.base import BaseCommand
+from tracker import recents
+
+class Command(BaseCommand):
+    help = "Write buffered recent-currency picks to the DB now instead of when their flush jobs come due."
+
+    def handle(self, *args, **opts):
+        n = recents.flush()
+        self.stdout.write(self.style.SUCCESS(f"Flushed {n} recent-currency rows."))
@@ -0,0 +1,33 @@
+# --- backend/tracker/management/commands/partition_expenses.py ---
+from django.core.management.base import BaseCommand, CommandError
+from tracker import partitioning
+
+class Command(BaseCommand):
+    help = ("Postgres only. --convert turns tracker_expense into a table range-partitioned "
+            "by year (one-off); otherwise creates upcoming yearly partitions.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--convert", action="store_true", help="Rebuild the table as partitioned (locks it).")
+        parser.add_argument("--years-ahead", type=int, default=1)
+        parser.add_argument("--years-back", type=int, default=partitioning.YEARS_BACK,
+                            help="Oldest yearly partition; earlier rows stay in the DEFAULT partition.")
+        parser.add_argument("--status", action="store_true", help="List partitions and exit.")
+
+    def handle(self, *args, **opts):
+        try:
+            if opts["convert"]:
+                if partitioning.convert(opts["years_ahead"], opts["years_back"]):
+                    self.stdout.write(self.style.SUCCESS("tracker_expense converted to a partitioned table."))
+                else:
+                    self.stdout.write("tracker_expense is already partitioned.")
+            elif not partitioning.is_partitioned():
+                raise CommandError("tracker_expense is not partitioned; run with --convert first.")
+            elif not opts["status"]:
+                created = partitioning.ensure_partitions(opts["years_ahead"], years_back=opts["years_back"])
+                self.stdout.write(self.style.SUCCESS(f"Created: {', '.join(created) or 'nothing (up to date)'}"))
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        if partitioning.is_partitioned():
+            for name, bounds in partitioning.partitions():
+                self.stdout.write(f"  {name}: {bounds}")
@@ -0,0 +1,23 @@
+# --- backend/tracker/management/commands/rebuild_spend_totals.py ---
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import NotFound
+from tracker import budgets, ledgers
+from tracker.models import Ledger
+
+
+class Command(BaseCommand):
+    help = ("Recompute the budget spend totals from the expenses (after loaddata, bulk imports "
+            "or anything else that wrote expenses without the model signals).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ledger", help="Ledger slug (default: all ledgers).")
+
+    def handle(self, *args, **opts):
+        try:
+            targets = [ledgers.resolve(opts["ledger"])] if opts["ledger"] else list(Ledger.objects.order_by("pk"))
+        except NotFound as e:
+            raise CommandError(str(e.detail))
+        for ledger in targets:
+            n = budgets.rebuild(ledger.pk)
+            self.stdout.write(f"  {ledger.slug}: {n} total(s)")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt spend totals for {len(targets)} ledger(s)."))
@@ -0,0 +1,45 @@
+# --- backend/tracker/management/commands/revalue_expenses.py ---
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import NotFound
+from tracker import ledgers, revalue
+
+
+class Command(BaseCommand):
+    help = ("Postgres only. Reset fx_to_cad on open (not closed-period) expenses from the stored "
+            "FxRate for each row's date and currency, in one UPDATE ... FROM.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ledger", help="Ledger slug (default: all ledgers).")
+        parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("--currency", action="append", help="Repeatable; default: every non-CAD currency.")
+        parser.add_argument("--fallback", action="store_true",
+                            help="Only rows still at the fallback rate of 1 (saved while Frankfurter was down).")
+        parser.add_argument("--fetch", action="store_true", help="Fetch missing rates from Frankfurter first.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change, then roll back.")
+
+    def handle(self, *args, **opts):
+        try:
+            ledger = ledgers.resolve(opts["ledger"]) if opts["ledger"] else None
+        except NotFound as e:
+            raise CommandError(str(e.detail))
+        expenses = revalue.select(ledger, opts["date_from"], opts["date_to"], opts["currency"], opts["fallback"])
+        try:
+            report = revalue.revalue(expenses, fetch=opts["fetch"], dry_run=opts["dry_run"])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        if opts["verbosity"] > 1:
+            for pk, day, currency, old, new in report["changed"]:
+                self.stdout.write(f"  expense {pk} {day} {currency}: {old} -> {new}")
+        if report["fetched"]:
+            self.stdout.write(f"Fetched {report['fetched']} missing rate(s).")
+        if report["closed"]:
+            self.stdout.write(f"Skipped {report['closed']} row(s) in closed periods.")
+        if report["missing"]:
+            self.stdout.write(self.style.WARNING(
+                f"No stored rate for {len(report['missing'])} date/currency pair(s); run with --fetch."))
+        verb = "Would revalue" if opts["dry_run"] else "Revalued"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(report['changed'])} expense(s)."))
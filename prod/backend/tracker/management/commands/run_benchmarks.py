@@ -0,0 +1,136 @@
+# --- backend/tracker/management/commands/run_benchmarks.py ---
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from tracker import anomalies
+from tracker.models import Expense, Settlement, FxRate
+from tracker.serializers import ExpenseSerializer
+
+DEFAULT_THRESHOLDS = Path(settings.BASE_DIR) / "benchmarks" / "thresholds.json"
+SERIALIZE_ROWS = 500
+
+
+class Command(BaseCommand):
+    help = ("Measure latency, throughput and query counts of the hot endpoints and write "
+            "the results to JSON; fails if any threshold is exceeded. Read-only.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", default="admin", help="Existing user to run the requests as.")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--output", default="bench_results.json")
+        parser.add_argument("--thresholds", default=str(DEFAULT_THRESHOLDS))
+        parser.add_argument("--baseline", help="Earlier results file; flag p95 regressions against it.")
+        parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="Allowed p95 slowdown vs --baseline (0.25 = 25%%).")
+
+    def _measure(self, fn, iterations, warmup):
+        for _ in range(warmup):
+            fn()
+        timings = []
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(iterations):
+                t0 = time.perf_counter()
+                fn()
+                timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        total_s = sum(timings) / 1000
+        return {
+            "iterations": iterations,
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "p50_ms": round(timings[len(timings) // 2], 3),
+            "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            "max_ms": round(timings[-1], 3),
+            "rps": round(iterations / total_s, 1) if total_s else None,
+            "queries": round(len(ctx.captured_queries) / iterations, 2),
+        }
+
+    def handle(self, *args, **opts):
+        user = get_user_model().objects.filter(username=opts["username"]).first()
+        if user is None:
+            raise CommandError(f"User {opts['username']!r} not found (create it or pass --username).")
+        fx = FxRate.objects.order_by("-date").first()
+        if fx is None:
+            raise CommandError("No FX rates stored; run seed_benchmark_data first.")
+
+        def get(url):
+            def run():
+                r = client.get(url)
+                if r.status_code != 200:
+                    raise CommandError(f"GET {url} -> {r.status_code}")
+            return run
+
+        def serialize():
+            rows = list(Expense.objects.select_related("paid_by", "paid_by__party")[:SERIALIZE_ROWS])
+            ExpenseSerializer(rows, many=True).data
+
+        cases = {
+            "summary": get("/api/summary/"),
+            "bootstrap": get("/api/bootstrap/"),
+            "expense-list": get("/api/expenses/?limit=100"),
+            "settlement-list": get("/api/settlements/?limit=100"),
+            "person-list": get("/api/people/"),
+            "fx-rate-cache-hit": get(f"/api/fx-rate/?date={fx.date.isoformat()}&base={fx.base}&quote={fx.quote}"),
+            "serialize-expenses": serialize,
+            # the uncached computation: every expense into arrays and scored
+            "anomalies": lambda: anomalies.report(Expense.objects.all()),
+        }
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=["*"]):
+            client = Client()
+            client.force_login(user)
+            for name, fn in cases.items():
+                results[name] = self._measure(fn, opts["iterations"], opts["warmup"])
+                r = results[name]
+                self.stdout.write(f"{name:<20} p50 {r['p50_ms']:>8.2f} ms  p95 {r['p95_ms']:>8.2f} ms  "
+                                  f"{r['rps'] or 0:>8.1f} req/s  {r['queries']:>5} q")
+
+        failures = []
+        thresholds = {}
+        path = Path(opts["thresholds"])
+        if path.exists():
+            thresholds = {k: v for k, v in json.loads(path.read_text()).items() if not k.startswith("_")}
+        for name, limits in thresholds.items():
+            r = results.get(name)
+            if r is None:
+                continue
+            for key, limit in limits.items():
+                if r[key] > limit:
+                    failures.append(f"{name}: {key} {r[key]} > {limit}")
+
+        if opts["baseline"]:
+            baseline = json.loads(Path(opts["baseline"]).read_text())["results"]
+            for name, r in results.items():
+                old = baseline.get(name)
+                if old and r["p95_ms"] > old["p95_ms"] * (1 + opts["tolerance"]):
+                    failures.append(f"{name}: p95 {r['p95_ms']} ms vs baseline {old['p95_ms']} ms")
+
+        report = {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "host": platform.node(),
+            "python": platform.python_version(),
+            "db_vendor": connection.vendor,
+            "data": {"expenses": Expense.objects.count(), "settlements": Settlement.objects.count(),
+                     "fx_rates": FxRate.objects.count()},
+            "results": results,
+            "thresholds": thresholds,
+            "failures": failures,
+        }
+        Path(opts["output"]).write_text(json.dumps(report, indent=2))
+        self.stdout.write(f"Results written to {opts['output']}")
+
+        if failures:
+            raise CommandError("Benchmark thresholds exceeded:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("All benchmarks within thresholds."))
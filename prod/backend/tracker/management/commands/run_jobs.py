@@ -0,0 +1,45 @@
+# --- backend/tracker/management/commands/run_jobs.py ---
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from tracker import jobs
+
+
+class Command(BaseCommand):
+    help = "Claim and run queued background jobs (tracker/jobs.py) until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run every ready job, then exit.")
+        parser.add_argument("--poll", type=float, default=1.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--max-jobs", type=int, default=0, help="Exit after this many jobs (0 = no limit).")
+
+    def handle(self, *args, **opts):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True  # finish the current job, then exit
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        self.stdout.write(f"worker {worker}: handling {', '.join(sorted(jobs.HANDLERS))}")
+
+        done = 0
+        while not stopping:
+            close_old_connections()  # same connection lifecycle as a request
+            job = jobs.run_next(worker)
+            if job is None:
+                if opts["once"]:
+                    break
+                time.sleep(opts["poll"])
+                continue
+            done += 1
+            self.stdout.write(f"job {job.pk} {job.kind}: {job.status} (attempt {job.attempts})")
+            if opts["max_jobs"] and done >= opts["max_jobs"]:
+                break
+        self.stdout.write(self.style.SUCCESS(f"worker {worker}: ran {done} job(s)."))
@@ -0,0 +1,143 @@
+# --- backend/tracker/management/commands/seed_benchmark_data.py ---
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tracker import budgets, duplicates, live, money, versions
+from tracker.models import Ledger, Party, Person, FxRate, Expense, Settlement
+
+SEED_NOTE = "[bench-seed]"
+
+# Rough CAD value of one unit, plus how often each currency shows up on a trip.
+CURRENCIES = {
+    "THB": (Decimal("0.039"), 50),
+    "CAD": (Decimal("1"), 15),
+    "USD": (Decimal("1.36"), 10),
+    "JPY": (Decimal("0.0091"), 8),
+    "EUR": (Decimal("1.47"), 6),
+    "VND": (Decimal("0.000054"), 5),
+    "GBP": (Decimal("1.72"), 3),
+    "AUD": (Decimal("0.90"), 3),
+}
+CATEGORIES = [("food", 45), ("transport", 20), ("activities", 15), ("lodging", 10), ("other", 10)]
+# (weight_household, weight_bev); never both zero
+WEIGHTS = [((2, 1), 50), ((1, 1), 25), ((1, 0), 10), ((0, 1), 10), ((3, 1), 5)]
+DESCRIPTIONS = {
+    "food": ["Street food", "Dinner", "Lunch", "Coffee", "7-Eleven", "Night market", "Groceries", "Breakfast"],
+    "transport": ["Grab", "Taxi", "BTS", "Ferry", "Train", "Fuel", "Tuk-tuk", "Flight"],
+    "activities": ["Temple entry", "Boat tour", "Massage", "Cooking class", "Museum", "Snorkelling"],
+    "lodging": ["Hotel", "Guesthouse", "Resort", "Airbnb"],
+    "other": ["SIM card", "Pharmacy", "Laundry", "Souvenirs", "ATM fee"],
+}
+PEOPLE = {"household": ["Chris", "Tressa"], "bev": ["Bev"]}
+
+
+def _pick(rng, weighted):
+    items, weights = zip(*weighted)
+    return rng.choices(items, weights=weights)[0]
+
+
+class Command(BaseCommand):
+    help = ("Generate realistic parties, people, FX rates, expenses and settlements for "
+            "benchmarking (e.g. --expenses 10000 / 100000 / 1000000).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--expenses", type=int, default=10_000)
+        parser.add_argument("--settlements", type=int, default=None,
+                            help="Defaults to one per 200 expenses.")
+        parser.add_argument("--days", type=int, default=3 * 365, help="History length ending today.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--ledger", default="default", help="Ledger slug (created if missing).")
+        parser.add_argument("--clear", action="store_true",
+                            help=f"Delete previously seeded rows (notes={SEED_NOTE!r}) first.")
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        batch = opts["batch_size"]
+        n_expenses = opts["expenses"]
+        n_settlements = opts["settlements"] if opts["settlements"] is not None else max(1, n_expenses // 200)
+        start = date.today() - timedelta(days=opts["days"] - 1)
+        days = [start + timedelta(days=i) for i in range(opts["days"])]
+
+        ledger, _ = Ledger.objects.get_or_create(slug=opts["ledger"], defaults={"name": opts["ledger"].title()})
+
+        if opts["clear"]:
+            e, _ = Expense.objects.filter(ledger=ledger, notes=SEED_NOTE).delete()
+            s, _ = Settlement.objects.filter(ledger=ledger, notes=SEED_NOTE).delete()
+            self.stdout.write(f"Cleared {e} expenses and {s} settlements.")
+
+        household, _ = Party.objects.get_or_create(
+            ledger=ledger, slug="household", defaults={"name": "Household (Chris+Tressa)", "is_household": True})
+        bev, _ = Party.objects.get_or_create(ledger=ledger, slug="bev", defaults={"name": "Bev", "is_household": False})
+        people = []
+        for party in (household, bev):
+            for name in PEOPLE[party.slug]:
+                people.append(Person.objects.get_or_create(name=name, party=party, defaults={"ledger": ledger})[0])
+        self.stdout.write(self.style.SUCCESS("Parties and people ensured."))
+
+        # FX: one <currency>->CAD rate per day, as the expense form requests them.
+        rates = {}
+        fx_rows = []
+        for code, (cad, _) in CURRENCIES.items():
+            level = cad
+            for d in days:
+                if code != "CAD":
+                    level = (level * Decimal(str(1 + rng.gauss(0, 0.004)))).quantize(Decimal("0.00000001"))
+                rates[(d, code)] = level
+                fx_rows.append(FxRate(date=d, base=code, quote="CAD", rate=level))
+        FxRate.objects.bulk_create(fx_rows, batch_size=batch, ignore_conflicts=True)
+        self.stdout.write(self.style.SUCCESS(f"FX rates ensured ({len(fx_rows)})."))
+
+        currency_weights = [(code, w) for code, (_, w) in CURRENCIES.items()]
+        created = 0
+        while created < n_expenses:
+            rows = []
+            for _ in range(min(batch, n_expenses - created)):
+                d = rng.choice(days)
+                category = _pick(rng, CATEGORIES)
+                code = _pick(rng, currency_weights)
+                fx = rates[(d, code)]
+                # log-normal CAD size, lodging ~10x a meal
+                cad = Decimal(str(rng.lognormvariate(3.0 if category != "lodging" else 5.0, 0.9)))
+                w_h, w_b = _pick(rng, WEIGHTS)
+                places = money.exponent(code)
+                rows.append(Expense(
+                    ledger=ledger,
+                    date=d,
+                    description=rng.choice(DESCRIPTIONS[category]),
+                    category=category,
+                    currency=code,
+                    fx_to_cad_e8=money.to_minor(fx, money.FX_PLACES),
+                    amount_minor=money.to_minor((cad / fx).quantize(Decimal(1).scaleb(-places)), places),
+                    amount_exponent=places,
+                    paid_by=rng.choice(people),
+                    weight_household=w_h,
+                    weight_bev=w_b,
+                    notes=SEED_NOTE,
+                ))
+            for row in rows:
+                row.fingerprint = duplicates.of(row)  # bulk_create skips the pre_save that sets it
+            with transaction.atomic():
+                Expense.objects.bulk_create(rows, batch_size=batch)
+            created += len(rows)
+            self.stdout.write(f"  expenses: {created}/{n_expenses}")
+
+        settlements = []
+        for _ in range(n_settlements):
+            from_party, to_party = (bev, household) if rng.random() < 0.8 else (household, bev)
+            settlements.append(Settlement(
+                ledger=ledger,
+                date=rng.choice(days),
+                from_party=from_party,
+                to_party=to_party,
+                amount_cad_cents=money.to_minor(Decimal(str(rng.uniform(20, 2000))).quantize(Decimal("0.01")), 2),
+                notes=SEED_NOTE,
+            ))
+        Settlement.objects.bulk_create(settlements, batch_size=batch)
+        versions.bump(ledger.pk)  # bulk_create skips the signals
+        budgets.rebuild(ledger.pk)
+        live.notify(ledger.pk, "ledger.changed")
+        self.stdout.write(self.style.SUCCESS(f"Seeded {n_expenses} expenses and {n_settlements} settlements."))
@@ -0,0 +1,38 @@
+# --- backend/tracker/management/commands/slow_queries.py ---
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from tracker import slowqueries
+
+
+class Command(BaseCommand):
+    help = ("Rank the statements in the slow-query log (SLOW_QUERY_LOG and its rotated files) "
+            "by total time, worst time or count, with the latest sampled EXPLAIN plan.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=10, help="How many statements to show (default 10).")
+        parser.add_argument("--by", choices=("total", "max", "count"), default="total")
+        parser.add_argument("--view", help='Only statements from one view, e.g. "summary" or "ExpenseViewSet.list".')
+        parser.add_argument("--log", help="Log file to read (default: SLOW_QUERY_LOG).")
+        parser.add_argument("--no-plans", action="store_true", help="Leave out the EXPLAIN output.")
+
+    def handle(self, *args, **opts):
+        files = slowqueries.log_files(opts["log"])
+        if not files:
+            raise CommandError(f"No slow-query log at {opts['log'] or settings.SLOW_QUERY_LOG}.")
+        groups = slowqueries.worst(slowqueries.read_entries(files), by=opts["by"], view=opts["view"])
+        if not groups:
+            self.stdout.write("No slow queries logged.")
+            return
+
+        for rank, g in enumerate(groups[:opts["top"]], 1):
+            views = ", ".join(f"{v} x{n}" for v, n in sorted(g["views"].items(), key=lambda kv: -kv[1]))
+            self.stdout.write(self.style.WARNING(
+                f"#{rank}  {g['count']} call(s), total {g['total_ms']:.0f} ms, "
+                f"max {g['max_ms']:.0f} ms, avg {g['total_ms'] / g['count']:.0f} ms  [{views}]"))
+            self.stdout.write(f"    {g['sql']}")
+            if g["plan"] and not opts["no_plans"]:
+                self.stdout.write(f"    plan ({g['plan_ts']}):")
+                for line in g["plan"].splitlines():
+                    self.stdout.write(f"      {line}")
+            self.stdout.write("")
+        self.stdout.write(f"{len(groups)} distinct statement(s) in {len(files)} file(s).")
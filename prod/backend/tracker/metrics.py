@@ -0,0 +1,155 @@
+# --- backend/tracker/metrics.py ---
+"""
+Per-endpoint request metrics, exposed at /api/metrics/ in Prometheus text format.
+
+Labels use the resolved URL name (expense-list, summary, fx-rate, ...). SQL
+queries are counted by an execute wrapper installed on every DB connection; it
+reports into a ContextVar so the async views (whose ORM calls hop threads)
+are counted too. With PROMETHEUS_MULTIPROC_DIR set, every gunicorn worker
+writes to that directory and a scrape of any worker returns the sum.
+
+The job worker (run_jobs) counts the Frankfurter calls in FX_UPSTREAM. It
+writes to its own multiprocess directory, since its pids can collide with the
+web container's, and settings.METRICS_WORKER_DIR merges that one into the same
+scrape.
+"""
+import glob
+import os
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    "tracker_http_request_duration_seconds", "Request latency by URL name.",
+    ["view", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_QUERIES = Histogram(
+    "tracker_db_queries_per_request", "SQL statements executed per request.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+DB_TIME = Histogram(
+    "tracker_db_time_seconds", "Time spent in SQL per request.",
+    ["view"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+RESPONSE_SIZE = Histogram(
+    "tracker_http_response_size_bytes", "Response body size (non-streaming responses).",
+    ["view"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+FX_CACHE = Counter("tracker_fx_cache_total", "fx_rate lookups by FxRate cache result.", ["result"])
+FX_UPSTREAM = Counter("tracker_fx_upstream_total", "Frankfurter calls by outcome.", ["outcome"])
+
+_request_stats = ContextVar("tracker_request_stats", default=None)
+
+
+def _count_queries(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats["queries"] += 1
+        stats["db_time"] += time.perf_counter() - start
+
+
+@receiver(connection_created)
+def _install_query_counter(sender, connection, **kwargs):
+    # connection_created fires again after a reconnect on the same wrapper
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.url_name or match.view_name or "unnamed"
+
+
+def _observe(request, response, stats, started):
+    view = _view_name(request)
+    REQUEST_LATENCY.labels(view, request.method, str(response.status_code)).observe(time.perf_counter() - started)
+    DB_QUERIES.labels(view).observe(stats["queries"])
+    DB_TIME.labels(view).observe(stats["db_time"])
+    if not response.streaming:
+        RESPONSE_SIZE.labels(view).observe(len(response.content))
+
+
+class MetricsMiddleware:
+    """Outermost middleware, so session/auth queries are included in the counts."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = {"queries": 0, "db_time": 0.0}
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        _observe(request, response, stats, started)
+        return response
+
+    async def __acall__(self, request):
+        stats = {"queries": 0, "db_time": 0.0}
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        _observe(request, response, stats, started)
+        return response
+
+
+class _MultiDirCollector:
+    """MultiProcessCollector over several directories, summed into one set of families."""
+
+    def __init__(self, paths):
+        self.paths = [p for p in paths if p]
+
+    def collect(self):
+        files = [f for path in self.paths for f in glob.glob(os.path.join(path, "*.db"))]
+        return multiprocess.MultiProcessCollector.merge(files, accumulate=True)
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape target. With METRICS_TOKEN set, requires
+    "Authorization: Bearer <token>"; otherwise a staff session.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        if request.headers.get("Authorization") != f"Bearer {token}":
+            return HttpResponseForbidden("forbidden")
+    elif not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponseForbidden("forbidden")
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        registry.register(_MultiDirCollector([os.environ["PROMETHEUS_MULTIPROC_DIR"], settings.METRICS_WORKER_DIR]))
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
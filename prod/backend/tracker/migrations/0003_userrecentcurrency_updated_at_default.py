@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0002_fxrate_person_userrecentcurrency_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userrecentcurrency',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
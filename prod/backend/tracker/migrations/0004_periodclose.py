@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0003_userrecentcurrency_updated_at_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodClose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('through', models.DateField(unique=True)),
+                ('bev_owes', models.DecimalField(decimal_places=8, default=0, max_digits=18)),
+                ('household_owes', models.DecimalField(decimal_places=8, default=0, max_digits=18)),
+                ('bev_to_house', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('house_to_bev', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('category_totals', models.JSONField(blank=True, default=dict)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-through'],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def assign_default_ledger(apps, schema_editor):
+    """Everything that exists so far belongs to one "default" ledger."""
+    Ledger = apps.get_model("tracker", "Ledger")
+    names = ["Party", "Person", "Expense", "Settlement", "PeriodClose"]
+    if not any(apps.get_model("tracker", n).objects.exists() for n in names):
+        return  # fresh install; bootstrap_tracker creates the first ledger
+    ledger, _ = Ledger.objects.get_or_create(slug="default", defaults={"name": "Default"})
+    for n in names:
+        apps.get_model("tracker", n).objects.filter(ledger__isnull=True).update(ledger=ledger)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_periodclose'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ledger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('slug', models.SlugField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='ledger',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='expenses', to='tracker.ledger'),
+        ),
+        migrations.AddField(
+            model_name='party',
+            name='ledger',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='parties', to='tracker.ledger'),
+        ),
+        migrations.AddField(
+            model_name='periodclose',
+            name='ledger',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='closes', to='tracker.ledger'),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='ledger',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='people', to='tracker.ledger'),
+        ),
+        migrations.AddField(
+            model_name='settlement',
+            name='ledger',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='settlements', to='tracker.ledger'),
+        ),
+        migrations.RunPython(assign_default_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='expense',
+            name='ledger',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='expenses', to='tracker.ledger'),
+        ),
+        migrations.AlterField(
+            model_name='party',
+            name='ledger',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='parties', to='tracker.ledger'),
+        ),
+        migrations.AlterField(
+            model_name='party',
+            name='name',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='party',
+            name='slug',
+            field=models.SlugField(max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='periodclose',
+            name='ledger',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='closes', to='tracker.ledger'),
+        ),
+        migrations.AlterField(
+            model_name='periodclose',
+            name='through',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='person',
+            name='ledger',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='people', to='tracker.ledger'),
+        ),
+        migrations.AlterField(
+            model_name='settlement',
+            name='ledger',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='settlements', to='tracker.ledger'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='party',
+            unique_together={('ledger', 'name'), ('ledger', 'slug')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='periodclose',
+            unique_together={('ledger', 'through')},
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['ledger', 'date', 'id'], name='tracker_exp_ledger__2544eb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='settlement',
+            index=models.Index(fields=['ledger', 'date', 'id'], name='tracker_set_ledger__c375ba_idx'),
+        ),
+    ]
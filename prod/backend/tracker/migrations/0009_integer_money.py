@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:52
+
+from django.db import migrations, models
+from django.db.models import BigIntegerField, DecimalField, F
+from django.db.models.functions import Cast, Round
+
+# ISO 4217 minor units other than 2, as of this migration (tracker/money.py)
+EXPONENTS = {
+    0: "BIF CLP DJF GNF ISK JPY KMF KRW PYG RWF UGX UYI VND VUV XAF XOF XPF".split(),
+    3: "BHD IQD JOD KWD LYD OMR TND".split(),
+    4: "CLF UYW".split(),
+}
+
+
+def _int(expr):
+    # the values are exact; Round only guards against float noise on SQLite
+    return Cast(Round(expr), BigIntegerField())
+
+
+def to_minor_units(apps, schema_editor):
+    """
+    amount -> amount_minor at the currency's ISO exponent, fx_to_cad -> fx_to_cad_e8,
+    amount_cad -> amount_cad_cents. Every value is kept exactly: rows that have
+    cents in a zero-decimal currency (e.g. JPY 1500.50) keep exponent 2.
+    """
+    Expense = apps.get_model("tracker", "Expense")
+    Settlement = apps.get_model("tracker", "Settlement")
+    Expense.objects.update(amount_minor=_int(F("amount") * 100), amount_exponent=2,
+                           fx_to_cad_e8=_int(F("fx_to_cad") * 10 ** 8))
+    for exp, codes in EXPONENTS.items():
+        rows = Expense.objects.filter(currency__in=codes)
+        if exp < 2:
+            rows = rows.filter(amount=Round("amount"))
+        rows.update(amount_minor=_int(F("amount") * 10 ** exp), amount_exponent=exp)
+    Settlement.objects.update(amount_cad_cents=_int(F("amount_cad") * 100))
+
+
+def to_decimals(apps, schema_editor):
+    """Reverse: exact for anything with at most 2 decimal places (all rows written before 0009)."""
+    Expense = apps.get_model("tracker", "Expense")
+    Settlement = apps.get_model("tracker", "Settlement")
+    as_decimal = Cast(F("amount_minor"), DecimalField(max_digits=20, decimal_places=0))
+    for exp in {0, 2, *EXPONENTS}:
+        Expense.objects.filter(amount_exponent=exp).update(amount=as_decimal / 10 ** exp)
+    Expense.objects.update(fx_to_cad=Cast(F("fx_to_cad_e8"), DecimalField(max_digits=20, decimal_places=0)) / 10 ** 8)
+    Settlement.objects.update(amount_cad=Cast(F("amount_cad_cents"), DecimalField(max_digits=20, decimal_places=0)) / 100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0008_idempotencyrecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='amount_exponent',
+            field=models.PositiveSmallIntegerField(default=2),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='amount_minor',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='fx_to_cad_e8',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='settlement',
+            name='amount_cad_cents',
+            field=models.BigIntegerField(null=True),
+        ),
+        # nullable, so unapplying 0010 can re-add them empty for to_decimals to refill
+        migrations.AlterField(
+            model_name='expense',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='fx_to_cad',
+            field=models.DecimalField(decimal_places=8, default=1, max_digits=18, null=True),
+        ),
+        migrations.AlterField(
+            model_name='settlement',
+            name='amount_cad',
+            field=models.DecimalField(decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.RunPython(to_minor_units, to_decimals),
+    ]
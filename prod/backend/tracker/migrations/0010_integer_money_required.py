@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:55
+
+import tracker.money
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0009_integer_money'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='expense',
+            name='amount_minor',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='fx_to_cad_e8',
+            field=models.BigIntegerField(default=tracker.money.FX_SCALE),
+        ),
+        migrations.AlterField(
+            model_name='settlement',
+            name='amount_cad_cents',
+            field=models.BigIntegerField(),
+        ),
+        migrations.RemoveField(
+            model_name='expense',
+            name='amount',
+        ),
+        migrations.RemoveField(
+            model_name='expense',
+            name='fx_to_cad',
+        ),
+        migrations.RemoveField(
+            model_name='settlement',
+            name='amount_cad',
+        ),
+    ]
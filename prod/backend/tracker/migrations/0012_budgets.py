@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:18
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+import django.db.models.deletion
+import tracker.models
+from django.db import migrations, models
+
+from tracker import money
+
+
+def _starts(day):
+    # month, week (from Monday), total, as in tracker/budgets.py at this migration
+    return {"month": day.replace(day=1), "week": day - timedelta(days=day.weekday()), "total": date.min}
+
+
+def fill_spend_totals(apps, schema_editor):
+    """Running totals for the expenses already stored; from here on expense writes keep them current."""
+    Expense = apps.get_model("tracker", "Expense")
+    SpendTotal = apps.get_model("tracker", "SpendTotal")
+    totals = defaultdict(int)
+    rows = Expense.objects.order_by().values_list(
+        "ledger_id", "date", "category", "amount_minor", "amount_exponent", "fx_to_cad_e8",
+        "weight_household", "weight_bev")
+    for ledger_id, day, category, minor, places, fx, w_household, w_bev in rows.iterator(chunk_size=2000):
+        cents = money.cad_cents(minor, places, fx)
+        household, bev = money.split(cents, w_household, w_bev)
+        for cat in (category, ""):
+            for period, start in _starts(day).items():
+                for side, v in (("", cents), ("household", household), ("bev", bev)):
+                    totals[(ledger_id, cat, period, start, side)] += v
+    SpendTotal.objects.bulk_create(
+        [SpendTotal(ledger_id=l, category=c, period=p, start=s, side=side, cents=v)
+         for (l, c, p, s, side), v in totals.items()], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0011_receipts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Budget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(blank=True, choices=[('lodging', 'Lodging'), ('food', 'Food'), ('transport', 'Transport'), ('activities', 'Activities'), ('other', 'Other')], max_length=24)),
+                ('period', models.CharField(choices=[('month', 'Month'), ('week', 'Week'), ('total', 'Whole ledger')], default='month', max_length=8)),
+                ('amount_cad_cents', models.BigIntegerField()),
+                ('thresholds', models.JSONField(default=tracker.models._default_thresholds)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('ledger', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='budgets', to='tracker.ledger')),
+                ('party', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='budgets', to='tracker.party')),
+            ],
+            options={
+                'ordering': ['category', 'period', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SpendTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(blank=True, max_length=24)),
+                ('period', models.CharField(max_length=8)),
+                ('start', models.DateField()),
+                ('side', models.CharField(blank=True, max_length=16)),
+                ('cents', models.BigIntegerField(default=0)),
+                ('ledger', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracker.ledger')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('ledger', 'category', 'period', 'start', 'side'), name='tracker_spendtotal_key')],
+            },
+        ),
+        migrations.RunPython(fill_spend_totals, migrations.RunPython.noop),
+    ]
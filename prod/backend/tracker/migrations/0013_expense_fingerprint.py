@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:32
+
+import hashlib
+import re
+import unicodedata
+from decimal import Decimal
+
+from django.db import migrations, models
+
+# tracker/duplicates.py's normalization as of this migration; a later change
+# to it recomputes the stored fingerprints in a migration of its own
+STOPWORDS = frozenset("a an and at for from in of on the to with".split())
+_WORD = re.compile(r"\w+")
+
+
+def _fingerprint(expense):
+    text = unicodedata.normalize("NFKD", expense.description.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    words = sorted({w for w in _WORD.findall(text) if w not in STOPWORDS})
+    amount = Decimal(expense.amount_minor).scaleb(-expense.amount_exponent).normalize()
+    key = f"{expense.date}|{amount:f}|{expense.currency.upper()}|{' '.join(words)}"
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def fill_fingerprints(apps, schema_editor):
+    """Fingerprints for the expenses already stored; saves set them from here on."""
+    Expense = apps.get_model("tracker", "Expense")
+    rows = Expense.objects.order_by().only("id", "date", "amount_minor", "amount_exponent", "currency", "description")
+    batch = []
+    for expense in rows.iterator(chunk_size=2000):
+        expense.fingerprint = _fingerprint(expense)
+        batch.append(expense)
+        if len(batch) == 2000:
+            Expense.objects.bulk_update(batch, ["fingerprint"])
+            batch = []
+    Expense.objects.bulk_update(batch, ["fingerprint"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0012_budgets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(fill_fingerprints, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['ledger', 'fingerprint'], name='tracker_exp_ledger__759edb_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0013_expense_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fxrate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='fxrate',
+            index=models.Index(fields=['updated_at'], name='tracker_fxr_updated_3ccd6d_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0014_fxrate_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['key', 'id'], name='tracker_job_key_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def keep_existing_access(apps, schema_editor):
+    """Every user could reach every ledger until now: start them all as members, then prune in the admin."""
+    Ledger = apps.get_model("tracker", "Ledger")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    Member = Ledger.members.through
+    users = list(User.objects.values_list("pk", flat=True))
+    Member.objects.bulk_create([Member(ledger_id=ledger, user_id=user)
+                                for ledger in Ledger.objects.values_list("pk", flat=True) for user in users])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0015_job_key_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ledger',
+            name='members',
+            field=models.ManyToManyField(blank=True, related_name='ledgers', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(keep_existing_access, migrations.RunPython.noop),
+    ]
@@ -1,20 +1,42 @@
 # --- backend/tracker/models.py ---
-from django.db import models
+import uuid
+
+from django.db import models, transaction
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.utils import timezone
+
+from . import money
 
 User = get_user_model()
 
-class Party(models.Model):
-    name = models.CharField(max_length=64, unique=True)
+class Ledger(models.Model):
+    """An independent group of parties/people/expenses (e.g. one trip)."""
+    name = models.CharField(max_length=64)
     slug = models.SlugField(max_length=64, unique=True)
+    # the users who may read or write it (tracker/ledgers.py); everyone else gets a 404
+    members = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name="ledgers", blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+class Party(models.Model):
+    ledger = models.ForeignKey(Ledger, on_delete=models.PROTECT, related_name="parties")
+    name = models.CharField(max_length=64)
+    slug = models.SlugField(max_length=64)
     is_household = models.BooleanField(default=False)  # Household (Chris+Tressa)
 
+    class Meta:
+        unique_together = [("ledger", "name"), ("ledger", "slug")]
+
     def __str__(self):
         return self.name
 
 class Person(models.Model):
     """A concrete person who belongs to a Party (e.g., Chris/Tressa -> Household, Bev -> Bev)."""
+    ledger = models.ForeignKey(Ledger, on_delete=models.PROTECT, related_name="people")  # == party.ledger
     name = models.CharField(max_length=64)
     party = models.ForeignKey(Party, on_delete=models.PROTECT, related_name="people")
 
@@ -33,11 +55,14 @@ class FxRate(models.Model):
     base = models.CharField(max_length=3)   # e.g., CAD
     quote = models.CharField(max_length=3)  # e.g., THB
     rate = models.DecimalField(max_digits=18, decimal_places=8)
+    # lets every process's FX matrix see new and changed rows (tracker/fxmatrix.py)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("date", "base", "quote")
         indexes = [
             models.Index(fields=["date", "base", "quote"]),
+            models.Index(fields=["updated_at"]),
         ]
 
     def __str__(self):
@@ -47,7 +72,8 @@ class UserRecentCurrency(models.Model):
     """Tracks each user's most recently used currencies (we'll surface the latest 5)."""
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     code = models.CharField(max_length=3)
-    updated_at = models.DateTimeField(auto_now=True)
+    # set explicitly by tracker.recents when the buffered touches are flushed
+    updated_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         unique_together = ("user", "code")
@@ -66,6 +92,7 @@ class Expense(models.Model):
         ("activities", "Activities"),
         ("other", "Other"),
     ]
+    ledger = models.ForeignKey(Ledger, on_delete=models.PROTECT, related_name="expenses")
     date = models.DateField()
     description = models.CharField(max_length=200)
     category = models.CharField(max_length=24, choices=CATEGORY_CHOICES, default="lodging")
@@ -73,10 +100,12 @@ class Expense(models.Model):
     # Use ISO 4217 currency codes
     currency = models.CharField(max_length=3, default="THB")
 
-    # Higher precision FX to CAD (or your base)
-    fx_to_cad = models.DecimalField(max_digits=18, decimal_places=8, default=1)
+    # FX to CAD (or your base) * 10**8, see tracker/money.py
+    fx_to_cad_e8 = models.BigIntegerField(default=money.FX_SCALE)
 
-    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    # amount * 10**amount_exponent (the currency's ISO 4217 minor unit)
+    amount_minor = models.BigIntegerField()
+    amount_exponent = models.PositiveSmallIntegerField(default=2)
 
     # CHANGED: paid_by points to Person (not Party)
     paid_by = models.ForeignKey(Person, on_delete=models.PROTECT, related_name="paid_expenses")
@@ -89,22 +118,47 @@ class Expense(models.Model):
     created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # hash of date, amount, currency and description words, see tracker/duplicates.py
+    fingerprint = models.CharField(max_length=32, blank=True, editable=False)
+    FINGERPRINT_FIELDS = frozenset({"date", "amount_minor", "amount_exponent", "currency", "description"})
+
     class Meta:
         ordering = ["-date", "-id"]
         indexes = [
+            models.Index(fields=["ledger", "date", "id"]),  # per-ledger lists in ordering order
+            models.Index(fields=["ledger", "fingerprint"]),  # possible duplicates, no scan
             models.Index(fields=["date"]),
             models.Index(fields=["currency"]),
             models.Index(fields=["paid_by"]),
         ]
 
     def __str__(self):
-        return f"{self.date} {self.description} {self.amount} {self.currency}"
+        return f"{self.date} {self.description} {money.fmt(self.amount_minor, self.amount_exponent)} {self.currency}"
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self.FINGERPRINT_FIELDS & set(update_fields):
+            # the pre_save receiver recomputes it; have the same UPDATE write it
+            kwargs["update_fields"] = {*update_fields, "fingerprint"}
+        # tracker/budgets.py locks the stored row in pre_save and applies the
+        # spend deltas in post_save; both must happen in one transaction
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+    @property
+    def amount(self):
+        return money.to_decimal(self.amount_minor, self.amount_exponent)
+
+    @property
+    def fx_to_cad(self):
+        return money.to_decimal(self.fx_to_cad_e8, money.FX_PLACES)
 
 class Settlement(models.Model):
+    ledger = models.ForeignKey(Ledger, on_delete=models.PROTECT, related_name="settlements")
     date = models.DateField()
     from_party = models.ForeignKey(Party, on_delete=models.PROTECT, related_name="outgoing_settlements")
     to_party = models.ForeignKey(Party, on_delete=models.PROTECT, related_name="incoming_settlements")
-    amount_cad = models.DecimalField(max_digits=14, decimal_places=2)
+    amount_cad_cents = models.BigIntegerField()
     notes = models.TextField(blank=True)
     created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -112,9 +166,189 @@ class Settlement(models.Model):
     class Meta:
         ordering = ["-date", "-id"]
         indexes = [
+            models.Index(fields=["ledger", "date", "id"]),
             models.Index(fields=["date"]),
             models.Index(fields=["from_party", "to_party"]),
         ]
 
     def __str__(self):
-        return f"{self.date} {self.from_party} -> {self.to_party} {self.amount_cad} CAD"
+        return f"{self.date} {self.from_party} -> {self.to_party} {money.fmt(self.amount_cad_cents, 2)} CAD"
+
+    @property
+    def amount_cad(self):
+        return money.to_decimal(self.amount_cad_cents, money.CAD_EXPONENT)
+
+class PeriodClose(models.Model):
+    """Frozen running balances for everything dated up to and including `through` (see tracker/balances.py)."""
+    ledger = models.ForeignKey(Ledger, on_delete=models.CASCADE, related_name="closes")
+    through = models.DateField()
+    # cumulative totals, same keys as the summary aggregates
+    bev_owes = models.DecimalField(max_digits=18, decimal_places=8, default=0)
+    household_owes = models.DecimalField(max_digits=18, decimal_places=8, default=0)
+    bev_to_house = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    house_to_bev = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    category_totals = models.JSONField(default=dict, blank=True)  # {"food": "123.45", ...} in CAD
+    closed_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    closed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-through"]
+        unique_together = ("ledger", "through")
+
+    def __str__(self):
+        return f"closed through {self.through}"
+
+class Job(models.Model):
+    """A unit of deferred work, claimed by `manage.py run_jobs` workers (see tracker/jobs.py)."""
+    QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed")]
+
+    kind = models.CharField(max_length=64)                  # handler name, e.g. "fx.fetch"
+    payload = models.JSONField(default=dict, blank=True)
+    # optional dedupe key: at most one queued/running job per key
+    key = models.CharField(max_length=128, null=True, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=64, blank=True)
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+        indexes = [
+            # the claim query: next ready job
+            models.Index(fields=["run_after", "id"], condition=Q(status="queued"), name="tracker_job_ready_idx"),
+            models.Index(fields=["locked_at"], condition=Q(status="running"), name="tracker_job_running_idx"),
+            models.Index(fields=["key", "id"], name="tracker_job_key_idx"),  # latest job for a key, any status
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["key"], condition=Q(status__in=["queued", "running"]),
+                                    name="tracker_job_active_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}#{self.pk} {self.status}"
+
+class IdempotencyRecord(models.Model):
+    """Saved response for a mutating request sent with an Idempotency-Key (see tracker/idempotency.py)."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)   # sha256 of method + path + body
+    method = models.CharField(max_length=8)
+    path = models.CharField(max_length=255)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("user", "key")
+        indexes = [
+            models.Index(fields=["created_at"]),  # expiry
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} {self.method} {self.path}"
+
+class ReceiptBlob(models.Model):
+    """A receipt file's bytes, stored once per SHA-256 under RECEIPTS_ROOT (see tracker/receipts.py)."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    content_type = models.CharField(max_length=100)  # sniffed from the bytes, not taken from the client
+    has_thumbnail = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} {self.content_type} {self.size}B"
+
+class Receipt(models.Model):
+    """A file attached to an expense; several receipts may share one blob."""
+    ledger = models.ForeignKey(Ledger, on_delete=models.PROTECT, related_name="receipts")  # == expense.ledger
+    # no DB constraint: a partitioned tracker_expense has no unique key on id alone (see tracker/partitioning.py)
+    expense = models.ForeignKey(Expense, on_delete=models.CASCADE, db_constraint=False, related_name="receipts")
+    blob = models.ForeignKey(ReceiptBlob, on_delete=models.PROTECT, related_name="receipts")
+    filename = models.CharField(max_length=255)
+    uploaded_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        constraints = [
+            models.UniqueConstraint(fields=["expense", "blob"], name="tracker_receipt_once_per_expense"),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} on expense {self.expense_id}"
+
+class ReceiptUpload(models.Model):
+    """
+    An unfinished chunked upload: bytes so far live in RECEIPTS_ROOT/uploads/<id>.part.
+    The row is deleted once the last chunk turns it into a Receipt.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ledger = models.ForeignKey(Ledger, on_delete=models.PROTECT, related_name="receipt_uploads")
+    expense = models.ForeignKey(Expense, on_delete=models.CASCADE, db_constraint=False, related_name="+")
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)          # bytes received so far
+    sha256 = models.CharField(max_length=64, blank=True)  # as declared by the client, checked at the end
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at"]),  # expiry
+        ]
+
+    def __str__(self):
+        return f"{self.filename} {self.offset}/{self.size}"
+
+def _default_thresholds():
+    return [50, 80, 100]
+
+class Budget(models.Model):
+    """A spending limit in CAD cents for one category (or all) per period, optionally one party's share."""
+    MONTH, WEEK, TOTAL = "month", "week", "total"
+    PERIOD_CHOICES = [(MONTH, "Month"), (WEEK, "Week"), (TOTAL, "Whole ledger")]
+
+    ledger = models.ForeignKey(Ledger, on_delete=models.CASCADE, related_name="budgets")
+    category = models.CharField(max_length=24, choices=Expense.CATEGORY_CHOICES, blank=True)  # "" = every category
+    period = models.CharField(max_length=8, choices=PERIOD_CHOICES, default=MONTH)
+    # the party's weighted share of each expense; null = whole amounts
+    party = models.ForeignKey(Party, null=True, blank=True, on_delete=models.CASCADE, related_name="budgets")
+    amount_cad_cents = models.BigIntegerField()
+    thresholds = models.JSONField(default=_default_thresholds)  # percents of the amount that raise an event
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["category", "period", "id"]
+
+    def __str__(self):
+        return f"{self.category or 'all'}/{self.period} {money.fmt(self.amount_cad_cents, money.CAD_EXPONENT)} CAD"
+
+class SpendTotal(models.Model):
+    """
+    Running CAD spend for one (category, period, start, side) of a ledger, kept
+    up to date on every expense write (see tracker/budgets.py).
+    """
+    ledger = models.ForeignKey(Ledger, on_delete=models.CASCADE, related_name="+")
+    category = models.CharField(max_length=24, blank=True)  # "" = every category
+    period = models.CharField(max_length=8)
+    start = models.DateField()                               # first day of the period; date.min for "total"
+    side = models.CharField(max_length=16, blank=True)       # "", "household" or "bev"
+    cents = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["ledger", "category", "period", "start", "side"],
+                                    name="tracker_spendtotal_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.category or 'all'}/{self.period}@{self.start}/{self.side or 'all'} {self.cents}c"
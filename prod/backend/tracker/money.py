@@ -0,0 +1,84 @@
+# --- backend/tracker/money.py ---
+"""
+Fixed-point money on plain integers.
+
+Amounts are stored as integer minor units: the amount times 10**exponent,
+where the exponent is the currency's ISO 4217 minor unit (2 for most, 0 for
+JPY/KRW/VND, 3 for KWD/BHD/...). Expense rows keep their exponent next to the
+amount, so rows saved before the switch (always 2 places) stay exact. FX rates
+are scaled by 10**FX_PLACES and CAD amounts are cents.
+
+Python ints and integer SQL sums stand in for Decimal construction and
+quantize() on the hot paths; Decimal appears only at the edges (parsing input,
+summary totals).
+"""
+from decimal import Decimal
+
+CAD = "CAD"
+CAD_EXPONENT = 2
+AMOUNT_PLACES = 2     # fewest decimals an amount is shown with, see fmt_amount()
+FX_PLACES = 8
+FX_SCALE = 10 ** FX_PLACES
+BIGINT_MAX = 2 ** 63 - 1
+
+# ISO 4217 minor units other than 2
+_EXPONENTS = {
+    0: "BIF CLP DJF GNF ISK JPY KMF KRW PYG RWF UGX UYI VND VUV XAF XOF XPF",
+    3: "BHD IQD JOD KWD LYD OMR TND",
+    4: "CLF UYW",
+}
+EXPONENTS = {code: exp for exp, codes in _EXPONENTS.items() for code in codes.split()}
+
+
+def exponent(code):
+    """ISO 4217 minor-unit exponent for a currency code (2 if not listed)."""
+    return EXPONENTS.get(code, 2)
+
+
+def to_minor(value, places):
+    """Decimal -> int units of 10**-places. ValueError if that would drop digits."""
+    scaled = Decimal(value).scaleb(places)
+    if scaled != scaled.to_integral_value():
+        raise ValueError(f"{value} has more than {places} decimal places")
+    return int(scaled)
+
+
+def fmt(minor, places):
+    """int units of 10**-places -> plain decimal string ("1234.50"), no Decimal involved."""
+    if not places:
+        return str(minor)
+    whole, frac = divmod(abs(minor), 10 ** places)
+    return f"{'-' if minor < 0 else ''}{whole}.{frac:0{places}d}"
+
+
+def fmt_amount(minor, exponent):
+    """
+    An expense amount as the API and exports show it: at least AMOUNT_PLACES
+    decimals whatever the currency's exponent, the format from before amounts
+    were stored in minor units ("1500.00" JPY), and all of them for 3- and
+    4-decimal currencies ("12.345" KWD).
+    """
+    places = max(exponent, AMOUNT_PLACES)
+    return fmt(minor * 10 ** (places - exponent), places)
+
+
+def to_decimal(minor, places):
+    return Decimal(minor).scaleb(-places)
+
+
+def div_round(n, d):
+    """n / d rounded half away from zero (ROUND_HALF_UP for positive amounts), in ints."""
+    q, r = divmod(abs(n), d)
+    q += 2 * r >= d
+    return q if (n >= 0) == (d > 0) else -q
+
+
+def cad_cents(minor, places, fx_scaled):
+    """amount * fx_to_cad in CAD cents, rounded half up."""
+    return div_round(minor * fx_scaled, 10 ** (places + FX_PLACES - CAD_EXPONENT))
+
+
+def split(cents, weight_household, weight_bev):
+    """(household, bev) shares of `cents` by weight, each rounded half up."""
+    denom = (weight_household + weight_bev) or 1
+    return div_round(cents * weight_household, denom), div_round(cents * weight_bev, denom)
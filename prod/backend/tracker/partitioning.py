@@ -0,0 +1,132 @@
+# --- backend/tracker/partitioning.py ---
+"""
+Optional Postgres range partitioning of tracker_expense by `date`, one
+partition per year plus a DEFAULT partition for out-of-range dates. Yearly
+partitions start YEARS_BACK years before this one, so a mistyped date (0025
+for 2025) lands in DEFAULT instead of adding two thousand partitions.
+
+Postgres requires the partition key in the primary key, so the converted
+table's PK is (id, date). Django still treats `id` as the pk; ids stay unique
+because they all come from the one identity sequence. Django index and FK
+constraint names are kept, so later migrations keep working (any new UNIQUE
+constraint on this table must include `date`).
+"""
+from datetime import date
+
+from django.db import connection, transaction
+
+TABLE = "tracker_expense"
+DEFAULT_PARTITION = f"{TABLE}_default"
+YEARS_BACK = 10  # older rows stay in DEFAULT; raise it (--years-back) for a longer history
+
+
+def partition_name(year):
+    return f"{TABLE}_y{year}"
+
+
+def _require_postgres():
+    if connection.vendor != "postgresql":
+        raise RuntimeError("Expense partitioning needs PostgreSQL.")
+
+
+def is_partitioned():
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+                    "WHERE c.relname = %s AND c.relnamespace = 'public'::regnamespace", [TABLE])
+        return cur.fetchone() is not None
+
+
+def partitions():
+    """[(name, bounds)] for the attached partitions, oldest first."""
+    with connection.cursor() as cur:
+        cur.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass ORDER BY c.relname",
+            [TABLE],
+        )
+        return cur.fetchall()
+
+
+def _create_year(cur, year):
+    """
+    Create and attach the partition for `year` if missing. Rows for that year
+    already sitting in the DEFAULT partition are moved into it first, since
+    Postgres refuses to attach a range the default partition still holds.
+    """
+    name = partition_name(year)
+    cur.execute("SELECT to_regclass(%s)", [name])
+    if cur.fetchone()[0] is not None:
+        return False
+    start, end = date(year, 1, 1), date(year + 1, 1, 1)
+    cur.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cur.execute(f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE date >= %s AND date < %s RETURNING *) '
+                f'INSERT INTO "{name}" SELECT * FROM moved', [start, end])
+    cur.execute(f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)', [start, end])
+    return True
+
+
+def _years(first, years_back, years_ahead, today=None):
+    """Years that get a partition: from the earliest row (but no earlier than the floor) to today + years_ahead."""
+    this_year = (today or date.today()).year
+    return range(max(first or this_year, this_year - years_back), this_year + years_ahead + 1)
+
+
+def ensure_partitions(years_ahead=1, through=None, years_back=YEARS_BACK):
+    """Make sure yearly partitions exist from the earliest stored year (see YEARS_BACK) up to today + years_ahead."""
+    _require_postgres()
+    created = []
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(f'SELECT EXTRACT(YEAR FROM MIN(date))::int FROM "{TABLE}"')
+        for year in _years(cur.fetchone()[0], years_back, years_ahead, through):
+            if _create_year(cur, year):
+                created.append(partition_name(year))
+    return created
+
+
+def convert(years_ahead=1, years_back=YEARS_BACK):
+    """
+    One-off migration path: rebuild tracker_expense as a partitioned table,
+    copy every row, then restore indexes and FKs under their original names.
+    Runs in a single transaction (takes an exclusive lock on the table).
+    """
+    _require_postgres()
+    if is_partitioned():
+        return False
+    old = f"{TABLE}_unpartitioned"
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute("SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s "
+                    "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)",
+                    [TABLE, TABLE])
+        indexes = cur.fetchall()
+        cur.execute("SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                    "WHERE conrelid = %s::regclass AND contype = 'f'", [TABLE])
+        fkeys = cur.fetchall()
+
+        cur.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{old}"')
+        cur.execute(f'ALTER TABLE "{old}" RENAME CONSTRAINT "{TABLE}_pkey" TO "{old}_pkey"')
+        cur.execute(f'CREATE TABLE "{TABLE}" (LIKE "{old}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+                    f'PARTITION BY RANGE (date)')
+        # Postgres 16 has no identity columns on partitioned tables: use an owned sequence
+        cur.execute(f'CREATE SEQUENCE "{TABLE}_part_id_seq" OWNED BY "{TABLE}".id')
+        cur.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval(\'"{TABLE}_part_id_seq"\')')
+        cur.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, date)')
+        cur.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+        cur.execute(f'SELECT EXTRACT(YEAR FROM MIN(date))::int FROM "{old}"')
+        for year in _years(cur.fetchone()[0], years_back, years_ahead):
+            _create_year(cur, year)
+
+        cur.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{old}"')
+        cur.execute(f'SELECT setval(\'"{TABLE}_part_id_seq"\', COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) '
+                    f'FROM "{TABLE}"')
+        cur.execute(f'DROP TABLE "{old}"')
+
+        # indexes on the parent cascade to every partition
+        for _, indexdef in indexes:
+            cur.execute(indexdef.replace(f"public.{old}", f"public.{TABLE}"))
+        for name, definition in fkeys:
+            cur.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+        cur.execute(f'ANALYZE "{TABLE}"')
+    return True
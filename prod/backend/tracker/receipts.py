@@ -0,0 +1,257 @@
+# --- backend/tracker/receipts.py ---
+"""
+Receipt attachments: chunked uploads, content-addressed storage, X-Accel serving.
+
+Uploads come in RECEIPT_CHUNK_BYTES pieces (PATCH /api/uploads/<id>/ with an
+Upload-Offset header). nginx buffers each request body before passing it on,
+so a slow phone on hotel Wi-Fi ties up a gunicorn worker only for the moment
+it takes to append one chunk to RECEIPTS_ROOT/uploads/<id>.part. An upload
+that drops resumes from the offset the server reports.
+
+Finished files are stored once per SHA-256 at RECEIPTS_ROOT/blobs/ab/<sha256>
+(ReceiptBlob); a Receipt links a blob to an expense. A client that sends the
+hash up front skips the upload entirely when the ledger already has that file.
+The content type is sniffed from the bytes; only images and PDFs are kept.
+
+Files are served by nginx: Django checks access and answers with an
+X-Accel-Redirect into an internal location, so no worker streams the bytes.
+Thumbnails are made by the "receipts.thumbnail" job, and "receipts.cleanup"
+removes abandoned uploads and blobs no receipt uses any more.
+"""
+import hashlib
+import logging
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from rest_framework import serializers
+
+from .models import Receipt, ReceiptBlob, ReceiptUpload
+
+log = logging.getLogger(__name__)
+
+THUMB_PX = 320
+THUMBNAILABLE = {"image/jpeg", "image/png", "image/webp"}
+_HEIF_BRANDS = {b"heic", b"heix", b"hevc", b"heim", b"heis", b"mif1", b"msf1"}
+
+
+class OffsetMismatch(Exception):
+    def __init__(self, offset):
+        super().__init__(f"expected offset {offset}")
+        self.offset = offset
+
+
+# -------------------------
+# Paths
+# -------------------------
+def _root():
+    return Path(settings.RECEIPTS_ROOT)
+
+
+def _blob_name(sha256):
+    return f"blobs/{sha256[:2]}/{sha256}"
+
+
+def _thumb_name(sha256):
+    return f"thumbs/{sha256[:2]}/{sha256}.jpg"
+
+
+def part_path(upload):
+    return _root() / "uploads" / f"{upload.pk}.part"
+
+
+def blob_path(sha256):
+    return _root() / _blob_name(sha256)
+
+
+def thumb_path(sha256):
+    return _root() / _thumb_name(sha256)
+
+
+# -------------------------
+# Uploading
+# -------------------------
+def sniff(head):
+    """Content type from a file's first bytes; None unless it is a receipt format we keep."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp" and head[8:12] in _HEIF_BRANDS:
+        return "image/heic"
+    return None
+
+
+def attach(expense, blob, filename, user=None):
+    """The expense's receipt for `blob`, created if it has none yet (re-sending a file is harmless)."""
+    try:
+        with transaction.atomic():
+            return Receipt.objects.create(ledger_id=expense.ledger_id, expense=expense, blob=blob,
+                                          filename=filename, uploaded_by=user), True
+    except IntegrityError:
+        return Receipt.objects.get(expense=expense, blob=blob), False
+
+
+def start(expense, filename, size, sha256="", user=None):
+    """
+    Begin an upload. Returns (upload, None), or (None, receipt) when `sha256`
+    names a file this ledger already stores, so nothing needs sending.
+    """
+    if not 0 < size <= settings.RECEIPT_MAX_BYTES:
+        raise serializers.ValidationError(
+            {"size": f"Receipts must be between 1 byte and {settings.RECEIPT_MAX_BYTES} bytes."})
+    sha256 = sha256.lower()
+    if sha256:
+        blob = ReceiptBlob.objects.filter(sha256=sha256, size=size, receipts__ledger_id=expense.ledger_id).first()
+        if blob is not None:
+            return None, attach(expense, blob, filename, user)[0]
+    upload = ReceiptUpload.objects.create(ledger_id=expense.ledger_id, expense=expense, filename=filename,
+                                          size=size, sha256=sha256, created_by=user)
+    path = part_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    return upload, None
+
+
+def append(upload_id, offset, data):
+    """
+    Write one chunk at `offset`. Returns (upload, receipt): the receipt once
+    the last byte has arrived (the upload row is gone then), else None.
+    OffsetMismatch if the client is out of step with what was stored.
+    """
+    if len(data) > settings.RECEIPT_CHUNK_BYTES:
+        raise serializers.ValidationError({"detail": f"Chunks are at most {settings.RECEIPT_CHUNK_BYTES} bytes."})
+    with transaction.atomic():
+        upload = ReceiptUpload.objects.select_for_update().get(pk=upload_id)
+        if offset != upload.offset:
+            raise OffsetMismatch(upload.offset)
+        if offset + len(data) > upload.size:
+            raise serializers.ValidationError({"detail": "Chunk runs past the declared size."})
+        with open(part_path(upload), "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+            f.truncate()  # drop bytes a crashed earlier attempt may have left past the offset
+        upload.offset += len(data)
+        upload.save(update_fields=["offset", "updated_at"])
+        if upload.offset < upload.size:
+            return upload, None
+        receipt, error = _finish(upload)
+    if error:  # raised after the block, so the upload's deletion is kept
+        raise serializers.ValidationError({"detail": error})
+    return upload, receipt
+
+
+def _finish(upload):
+    """(receipt, None), or (None, error) after discarding an upload that is not a usable receipt."""
+    part = part_path(upload)
+    with open(part, "rb") as f:
+        content_type = sniff(f.read(16))
+        f.seek(0)
+        sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+    if content_type is None or (upload.sha256 and upload.sha256 != sha256):
+        upload.delete()
+        part.unlink(missing_ok=True)
+        return None, ("Not a JPEG, PNG, WebP, HEIC or PDF file." if content_type is None
+                      else "File does not match the declared sha256; upload it again.")
+
+    dest = blob_path(sha256)
+    # lock the existing blob row, so cleanup() cannot delete it and its file under us
+    known = ReceiptBlob.objects.select_for_update().filter(sha256=sha256).exists()
+    if known and dest.exists():
+        part.unlink()
+    else:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(part, dest)  # same filesystem: atomic, and identical bytes if two uploads race
+    blob, _ = ReceiptBlob.objects.get_or_create(sha256=sha256, defaults={"size": upload.size,
+                                                                         "content_type": content_type})
+    receipt = attach(upload.expense, blob, upload.filename, upload.created_by)[0]
+    upload.delete()
+    return receipt, None
+
+
+def needs_thumbnail(blob):
+    return blob.content_type in THUMBNAILABLE and not blob.has_thumbnail
+
+
+# -------------------------
+# Background work (handlers registered in tracker/jobs.py)
+# -------------------------
+def make_thumbnail(sha256):
+    """Write a JPEG of at most THUMB_PX on the long side; False if Pillow cannot read the file."""
+    from PIL import Image, ImageOps, UnidentifiedImageError  # only the job worker needs Pillow
+
+    blob = ReceiptBlob.objects.get(sha256=sha256)
+    dest = thumb_path(sha256)
+    try:
+        with Image.open(blob_path(sha256)) as im:
+            im = ImageOps.exif_transpose(im)
+            im.thumbnail((THUMB_PX, THUMB_PX))
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_suffix(".tmp")
+            im.convert("RGB").save(tmp, "JPEG", quality=80, optimize=True)
+    except (UnidentifiedImageError, OSError) as e:
+        log.warning("receipt %s: no thumbnail (%s)", sha256[:12], e)
+        return False
+    os.replace(tmp, dest)
+    ReceiptBlob.objects.filter(pk=blob.pk).update(has_thumbnail=True)
+    return True
+
+
+def cleanup(now=None):
+    """Delete uploads idle for RECEIPT_UPLOAD_TTL and blobs no receipt has used for as long."""
+    cutoff = (now or timezone.now()) - timedelta(seconds=settings.RECEIPT_UPLOAD_TTL)
+    uploads = 0
+    for upload in ReceiptUpload.objects.filter(updated_at__lt=cutoff):
+        part_path(upload).unlink(missing_ok=True)
+        upload.delete()
+        uploads += 1
+    blobs = 0
+    for blob in ReceiptBlob.objects.filter(receipts__isnull=True, created_at__lt=cutoff):
+        with transaction.atomic():
+            # re-check under lock: an upload may have just attached it
+            if (not ReceiptBlob.objects.select_for_update().filter(pk=blob.pk).exists()
+                    or Receipt.objects.filter(blob_id=blob.pk).exists()):
+                continue
+            blob.delete()
+            # files go while the row lock is held; an upload of the same bytes waits and stores them afresh
+            blob_path(blob.sha256).unlink(missing_ok=True)
+            thumb_path(blob.sha256).unlink(missing_ok=True)
+        blobs += 1
+    # parts left by uploads whose rows went away with their expense
+    known = {str(pk) for pk in ReceiptUpload.objects.values_list("pk", flat=True)}
+    for part in (_root() / "uploads").glob("*.part"):
+        if part.stem not in known and part.stat().st_mtime < cutoff.timestamp():
+            part.unlink(missing_ok=True)
+    return {"uploads": uploads, "blobs": blobs}
+
+
+# -------------------------
+# Serving
+# -------------------------
+def file_response(receipt, thumbnail=False):
+    """
+    The receipt's bytes (or thumbnail) for an already-authorised request:
+    an X-Accel-Redirect for nginx, or the file itself without RECEIPTS_ACCEL_PREFIX.
+    """
+    sha256 = receipt.blob.sha256
+    name, content_type = (_thumb_name(sha256), "image/jpeg") if thumbnail else (_blob_name(sha256),
+                                                                                 receipt.blob.content_type)
+    prefix = settings.RECEIPTS_ACCEL_PREFIX
+    if prefix:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = f"{prefix.rstrip('/')}/{name}"
+    else:
+        response = FileResponse(open(_root() / name, "rb"), content_type=content_type)
+    response["Content-Disposition"] = content_disposition_header(False, receipt.filename)
+    response["X-Content-Type-Options"] = "nosniff"
+    response["Cache-Control"] = "private, max-age=31536000, immutable"  # content-addressed
+    return response
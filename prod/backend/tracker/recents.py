@@ -0,0 +1,162 @@
+# --- backend/tracker/recents.py ---
+"""
+Write-behind buffer for UserRecentCurrency.
+
+Picking a currency updates the user's list in the cache under a short per-user
+lock (cache.add), so two tabs picking at once don't overwrite each other. The
+first pick since the user's last flush sets a per-user pending key (cache.add
+again) and queues one `recents.flush` job to run FLUSH_INTERVAL later; the
+worker upserts the list, prunes the user down to RECENT_LIMIT rows and reloads
+the cached list from the DB. Reads never write: GETs are served from the cache
+and fall back to the DB only on a cold cache.
+
+When the cache can't take a pick (backend error, or the lock stays busy) the
+pick is written straight to the DB instead, and so is every pick when the
+cache is per-process (settings.RECENTS_WRITE_BEHIND off with CACHE_BACKEND=locmem):
+the worker and flush_recent_currencies would never see that buffer. What the buffer can still lose is
+picks made since the last flush if the cache entry itself is evicted, i.e. at
+most FLUSH_INTERVAL worth for one user. The cache directory is a volume shared
+by the backend and the worker (docker-compose.yml), so it survives restarts.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job, UserRecentCurrency
+
+log = logging.getLogger(__name__)
+
+RECENT_LIMIT = 5          # codes kept (and surfaced) per user
+FLUSH_INTERVAL = 60       # seconds a pick may sit in the buffer
+CACHE_TIMEOUT = 7 * 24 * 3600
+LOCK_TIMEOUT = 5          # seconds; outlives any holder that died mid-update
+LOCK_TRIES = 5            # 10ms apart, then give up and write through
+
+
+def _user_key(user_id):
+    return f"recents:user:{user_id}"
+
+
+def _pending_key(user_id):
+    return f"recents:pending:{user_id}"
+
+
+def _lock_key(user_id):
+    return f"recents:lock:{user_id}"
+
+
+def _stored(user_id):
+    """[(code, unix_ts), ...] newest first, from the DB."""
+    rows = (UserRecentCurrency.objects
+            .filter(user_id=user_id)
+            .order_by("-updated_at")
+            .values_list("code", "updated_at")[:RECENT_LIMIT])
+    return [(code, ts.timestamp()) for code, ts in rows]
+
+
+def _entries(user_id):
+    """[(code, unix_ts), ...] newest first; loads from the DB on a cache miss."""
+    entries = cache.get(_user_key(user_id))
+    if entries is None:
+        entries = _stored(user_id)
+        cache.add(_user_key(user_id), entries, CACHE_TIMEOUT)  # never over a list a pick just wrote
+    return entries
+
+
+def _lock(user_id):
+    for _ in range(LOCK_TRIES):
+        if cache.add(_lock_key(user_id), 1, LOCK_TIMEOUT):
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def recent_codes(user_id):
+    return [code for code, _ in _entries(user_id)]
+
+
+def touch(user_id, code):
+    now = time.time()
+    if not settings.RECENTS_WRITE_BEHIND:
+        _save(user_id, [(code, now)])
+        cache.delete(_user_key(user_id))  # reloaded from the DB on the next read
+        return
+    try:
+        buffered = _buffer(user_id, code, now)
+    except Exception:
+        log.warning("recents: cache write failed for user %s", user_id, exc_info=True)
+        buffered = False
+    if not buffered:
+        _save(user_id, [(code, now)])  # write through
+    _schedule_flush(user_id, now)
+
+
+def _buffer(user_id, code, now):
+    """Put `code` at the head of the cached list. False when the lock stays busy."""
+    if not _lock(user_id):
+        return False
+    try:
+        entries = [(c, ts) for c, ts in _entries(user_id) if c != code]
+        entries.insert(0, (code, now))
+        cache.set(_user_key(user_id), entries[:RECENT_LIMIT], CACHE_TIMEOUT)
+    finally:
+        cache.delete(_lock_key(user_id))
+    return True
+
+
+def _schedule_flush(user_id, now):
+    """Queue one flush per user per FLUSH_INTERVAL; later picks ride along with it."""
+    from . import jobs  # jobs imports this module for its handler
+    try:
+        first = cache.add(_pending_key(user_id), now, None)
+    except Exception:
+        return  # the pick is in the DB already; nothing buffered to flush
+    if first:
+        jobs.enqueue("recents.flush", {"user": user_id},
+                     run_after=timezone.now() + timedelta(seconds=FLUSH_INTERVAL))
+
+
+def _save(user_id, entries):
+    """Upsert `entries` and prune the user down to their RECENT_LIMIT newest rows."""
+    rows = [UserRecentCurrency(user_id=user_id, code=code,
+                               updated_at=datetime.fromtimestamp(ts, tz=dt_timezone.utc))
+            for code, ts in entries]
+    with transaction.atomic():
+        UserRecentCurrency.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["user", "code"],
+            update_fields=["updated_at"],
+        )
+        mine = UserRecentCurrency.objects.filter(user_id=user_id)
+        keep = list(mine.order_by("-updated_at").values_list("id", flat=True)[:RECENT_LIMIT])
+        mine.exclude(id__in=keep).delete()
+    return len(rows)
+
+
+def flush(user_id=None):
+    """
+    Write a user's buffered list to the DB and reload it from there (so picks
+    written through meanwhile show up). Without `user_id`, flush every user
+    with a queued flush job (flush_recent_currencies). Returns rows written.
+    """
+    if user_id is None:
+        queued = (Job.objects.filter(kind="recents.flush", status=Job.QUEUED)
+                  .values_list("payload__user", flat=True))
+        return sum(flush(u) for u in {u for u in queued if u is not None})
+
+    cache.delete(_pending_key(user_id))  # a pick from here on queues the next flush
+    if not _lock(user_id):
+        raise RuntimeError(f"recents lock for user {user_id} is busy")  # the job retries
+    try:
+        entries = cache.get(_user_key(user_id))
+        written = _save(user_id, entries) if entries else 0
+        cache.set(_user_key(user_id), _stored(user_id), CACHE_TIMEOUT)
+    finally:
+        cache.delete(_lock_key(user_id))
+    return written
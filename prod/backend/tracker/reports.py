@@ -0,0 +1,119 @@
+# --- backend/tracker/reports.py ---
+"""
+Reporting helpers.
+
+Expenses are booked in CAD (amount * fx_to_cad, from the integer columns).
+totals() in another currency converts each row at its own date's rate with the
+FX matrix (tracker/fxmatrix.py), as whole arrays rather than row by row.
+
+categories() is one Postgres statement: per-category aggregates and
+percentile_cont, plus ROW_NUMBER() for the biggest expenses in each. Results
+are cached under the ledger's data version (tracker/versions.py), so they are
+recomputed only after the ledger's expenses change.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+
+from . import fxmatrix, money, versions
+
+CENTS = Decimal("0.01")
+CATEGORIES_TIMEOUT = 60 * 60  # entries for old versions just age out
+
+
+class UnknownCurrency(ValueError):
+    pass
+
+
+def _money(x):
+    return Decimal(repr(float(x))).quantize(CENTS)
+
+
+def totals(expenses, currency):
+    """{"currency", "total", "count", "by_category"} for an Expense queryset, in `currency`."""
+    if currency != fxmatrix.HUB and fxmatrix.rate_from_cad(currency) is None:
+        raise UnknownCurrency(currency)
+    rows = list(expenses.order_by().values_list("date", "category", "amount_minor", "amount_exponent",
+                                                 "fx_to_cad_e8"))
+    if not rows:
+        return {"currency": currency, "total": _money(0), "count": 0, "by_category": {}}
+
+    dates, categories, minor, places, fx = zip(*rows)
+    scale = 10.0 ** -(np.array(places) + money.FX_PLACES)
+    cad = np.array(minor, dtype=float) * np.array(fx, dtype=float) * scale
+    values = cad if currency == fxmatrix.HUB else fxmatrix.get().from_cad(cad, dates, currency)
+
+    names, group = np.unique(np.array(categories), return_inverse=True)
+    sums = np.bincount(group, weights=values, minlength=len(names))
+    return {
+        "currency": currency,
+        "total": _money(values.sum()),
+        "count": len(rows),
+        "by_category": {str(name): _money(v) for name, v in zip(names, sums)},
+    }
+
+
+_CATEGORIES_SQL = """
+WITH base AS ({expenses}),
+e AS (
+    SELECT base.*, round(amount_minor::numeric * fx_to_cad_e8 / 10::numeric ^ (amount_exponent + %s), 2) AS cad
+    FROM base
+),
+stats AS (
+    SELECT category, count(*) AS n, sum(cad) AS total, avg(cad) AS mean,
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY cad) AS median,
+           percentile_cont(0.9) WITHIN GROUP (ORDER BY cad) AS p90
+    FROM e GROUP BY category
+),
+ranked AS (
+    SELECT e.*, row_number() OVER (PARTITION BY category ORDER BY cad DESC, id) AS rn FROM e
+)
+SELECT s.category, s.n, s.total, s.mean, s.median, s.p90,
+       r.id, r.date, r.description, r.currency, r.amount_minor, r.amount_exponent, r.cad
+FROM stats s LEFT JOIN ranked r ON r.category = s.category AND r.rn <= %s
+ORDER BY s.total DESC, s.category, r.rn
+"""
+
+
+def _categories(expenses, top):
+    columns = ("id", "date", "description", "category", "currency", "amount_minor", "amount_exponent", "fx_to_cad_e8")
+    sql, params = expenses.order_by().values(*columns).query.sql_with_params()
+    with connection.cursor() as cur:
+        cur.execute(_CATEGORIES_SQL.format(expenses=sql), [*params, money.FX_PLACES, top])
+        rows = cur.fetchall()
+
+    out = {}
+    for category, n, total, mean, median, p90, pk, day, description, currency, minor, places, cad in rows:
+        entry = out.get(category)
+        if entry is None:
+            entry = out[category] = {
+                "category": category,
+                "count": n,
+                "total": total,
+                "average": mean.quantize(CENTS),
+                "median": _money(median),
+                "p90": _money(p90),
+                "top": [],
+            }
+        if pk is not None:
+            entry["top"].append({"id": pk, "date": day, "description": description, "currency": currency,
+                                 "amount": money.fmt_amount(minor, places), "amount_cad": cad})
+    return list(out.values())
+
+
+def categories(ledger_id, expenses, top=5, key=""):
+    """
+    Per-category count/total/average/median/p90 (CAD) and the `top` biggest
+    expenses in each, for an Expense queryset within one ledger. `key`
+    identifies the queryset's filters in the cache key. Postgres only.
+    """
+    if connection.vendor != "postgresql":
+        raise RuntimeError("Category reports need PostgreSQL (percentile_cont).")
+    cache_key = f"reports:categories:{ledger_id}:{versions.get(ledger_id)}:{top}:{key}"
+    result = cache.get(cache_key)
+    if result is None:
+        result = {"currency": money.CAD, "categories": _categories(expenses, top)}
+        cache.set(cache_key, result, CATEGORIES_TIMEOUT)
+    return result
@@ -0,0 +1,146 @@
+# --- backend/tracker/revalue.py ---
+"""
+Bulk FX revaluation: reset Expense.fx_to_cad (fx_to_cad_e8) from the FxRate table.
+
+One UPDATE ... FROM joins the selected expenses to the stored rate for their
+date and currency and rewrites only the rows whose rate differs; RETURNING
+hands back the old and new rate of each changed row. Rows inside a closed
+period are left alone (their totals are frozen in a PeriodClose snapshot;
+reopen the period first). Summaries aggregate open rows on every request, so
+nothing else needs recomputing.
+
+Typical use: expenses saved with the "fallback" rate of 1 while Frankfurter
+was down. revalue(..., fetch=True) first fetches the rates that are missing
+(the revalue_expenses command); the admin action instead queues them as
+fx.fetch jobs (queue_missing) and is run again once they are stored.
+"""
+import logging
+
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Q, Subquery
+
+from . import budgets, fx, jobs, live, money, versions
+from .models import Expense, FxRate, PeriodClose
+
+log = logging.getLogger(__name__)
+
+HUB = "CAD"
+
+
+def _require_postgres():
+    if connection.vendor != "postgresql":
+        raise RuntimeError("FX revaluation needs PostgreSQL (UPDATE ... FROM ... RETURNING).")
+
+
+def _with_close(expenses):
+    latest = PeriodClose.objects.filter(ledger=OuterRef("ledger")).order_by("-through").values("through")[:1]
+    return expenses.annotate(closed_through=Subquery(latest))
+
+
+def _open(expenses):
+    """Rows after their ledger's latest close (the only ones that may change)."""
+    return _with_close(expenses).filter(Q(closed_through__isnull=True) | Q(date__gt=F("closed_through")))
+
+
+def missing_rates(expenses):
+    """(date, currency) pairs among `expenses` with no stored rate to CAD."""
+    pairs = set(expenses.exclude(currency=HUB).order_by().values_list("date", "currency").distinct())
+    if not pairs:
+        return []
+    dates = {d for d, _ in pairs}
+    have = set(FxRate.objects.filter(quote=HUB, date__in=dates).values_list("date", "base"))
+    return sorted(pairs - have)
+
+
+def fetch_missing(expenses):
+    """Fetch and store the missing rates; returns (fetched, failed) counts."""
+    fetched = failed = 0
+    for day, code in missing_rates(expenses):
+        try:
+            rate = fx.fetch_rate(day, code, HUB)
+        except Exception as e:
+            log.warning("FX fetch %s %s->%s failed: %s", day, code, HUB, e)
+            failed += 1
+            continue
+        FxRate.objects.update_or_create(date=day, base=code, quote=HUB, defaults={"rate": rate})
+        fetched += 1
+    return fetched, failed
+
+
+def queue_missing(pairs, user=None):
+    """Queue an fx.fetch job per (date, currency) pair; one already pending for a rate is reused."""
+    return [jobs.enqueue("fx.fetch", {"date": day.isoformat(), "base": code, "quote": HUB},
+                         key=jobs.fx_key(day, code, HUB), user=user)
+            for day, code in pairs]
+
+
+def revalue(expenses, fetch=False, dry_run=False):
+    """
+    Set fx_to_cad_e8 from FxRate for the open rows of an Expense queryset.
+
+    Returns {"changed": [(id, date, currency, old, new), ...], "closed": n,
+    "missing": [(date, currency), ...], "fetched": n}. With dry_run the update
+    runs and is rolled back, so the report is exact.
+    """
+    _require_postgres()
+    fetched = fetch_missing(_open(expenses))[0] if fetch and not dry_run else 0
+
+    ids_sql, ids_params = _open(expenses).order_by().values("id").query.sql_with_params()
+    sql = f"""
+        WITH c AS (
+            SELECT e.id, e.date, e.ledger_id, e.currency, e.fx_to_cad_e8 AS old, round(r.rate * %s)::bigint AS new
+            FROM tracker_expense e
+            JOIN tracker_fxrate r ON r.date = e.date AND r.base = e.currency AND r.quote = %s
+            WHERE e.id IN ({ids_sql})
+        )
+        UPDATE tracker_expense AS t SET fx_to_cad_e8 = c.new
+        FROM c WHERE t.id = c.id AND t.date = c.date AND c.old <> c.new
+        RETURNING t.id, t.date, t.ledger_id, t.currency, c.old, t.fx_to_cad_e8,
+                  t.category, t.amount_minor, t.amount_exponent, t.weight_household, t.weight_bev
+    """
+    with transaction.atomic():
+        with connection.cursor() as cur:
+            cur.execute(sql, [money.FX_SCALE, HUB, *ids_params])
+            rows = cur.fetchall()
+        if dry_run:
+            transaction.set_rollback(True)
+        else:
+            _respend(rows)
+            for ledger_id in {row[2] for row in rows}:
+                live.notify(ledger_id, "ledger.changed")
+                transaction.on_commit(lambda ledger_id=ledger_id: versions.bump(ledger_id))
+
+    changed = sorted(((pk, day, code, money.to_decimal(old, money.FX_PLACES), money.to_decimal(new, money.FX_PLACES))
+                      for pk, day, _, code, old, new, *_ in rows), key=lambda row: (row[1], row[0]))
+
+    return {
+        "changed": changed,
+        "closed": _with_close(expenses).filter(date__lte=F("closed_through")).count(),
+        "missing": missing_rates(_open(expenses)),
+        "fetched": fetched,
+    }
+
+
+def _respend(rows):
+    """Move the budget spend totals from each changed row's old rate to its new one."""
+    changes = {}
+    for _, day, ledger_id, _, old, new, category, minor, places, w_household, w_bev in rows:
+        row = {"ledger_id": ledger_id, "date": day, "category": category, "amount_minor": minor,
+               "amount_exponent": places, "weight_household": w_household, "weight_bev": w_bev}
+        for key, v in budgets.deltas({**row, "fx_to_cad_e8": old}, {**row, "fx_to_cad_e8": new}).items():
+            changes[key] = changes.get(key, 0) + v
+    budgets.apply({k: v for k, v in changes.items() if v})
+
+
+def select(ledger=None, date_from=None, date_to=None, currencies=None, only_fallback=False):
+    """Foreign-currency expenses matching the revalue_expenses command's filters."""
+    qs = Expense.objects.exclude(currency=HUB)
+    if ledger is not None:
+        qs = qs.filter(ledger=ledger)
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+    if currencies:
+        qs = qs.filter(currency__in=[c.upper() for c in currencies])
+    return qs.filter(fx_to_cad_e8=money.FX_SCALE) if only_fallback else qs
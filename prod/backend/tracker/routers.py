@@ -0,0 +1,100 @@
+# --- backend/tracker/routers.py ---
+"""
+Optional read-replica routing.
+
+Views opt in with @replica_reads (function views) or `replica_reads = True`
+(viewsets). For a safe-method request to such a view, ORM reads go to the
+replica alias. Everything else uses the primary:
+  - writes, and any read after a write in the same request;
+  - requests from a client that wrote within REPLICA_STICKY_SECONDS (cookie),
+    so people see their own changes despite replication lag;
+  - anything outside a request (management commands, shell, workers).
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+PIN_COOKIE = "pin_primary"
+
+_route = ContextVar("tracker_db_route", default=None)
+
+
+def replica_reads(view):
+    """Mark a view as safe to serve from the read replica on GET/HEAD/OPTIONS."""
+    view.replica_reads = True
+    return view
+
+
+def _opted_in(view_func):
+    if getattr(view_func, "replica_reads", False):
+        return True
+    return getattr(getattr(view_func, "cls", None), "replica_reads", False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _route.get()
+        if state and state["replica"] and not state["wrote"]:
+            return settings.REPLICA_DB_ALIAS
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        state = _route.get()
+        if state is not None:
+            state["wrote"] = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # same data on both aliases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = {"replica": False, "wrote": False}
+        token = _route.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _route.reset(token)
+        return self._pin(state, response)
+
+    async def __acall__(self, request):
+        state = {"replica": False, "wrote": False}
+        token = _route.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _route.reset(token)
+        return self._pin(state, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _route.get()
+        if (state is not None
+                and settings.REPLICA_DB_ALIAS
+                and request.method in SAFE_METHODS
+                and PIN_COOKIE not in request.COOKIES
+                and _opted_in(view_func)):
+            state["replica"] = True
+        return None
+
+    def _pin(self, state, response):
+        if state["wrote"] and settings.REPLICA_DB_ALIAS:
+            response.set_cookie(PIN_COOKIE, "1", max_age=settings.REPLICA_STICKY_SECONDS,
+                                httponly=True, samesite="Lax", secure=not settings.DEBUG)
+        return response
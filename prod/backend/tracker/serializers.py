@@ -1,14 +1,51 @@
 # --- backend/tracker/serializers.py ---
-from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Party, Person, Expense, Settlement
+from . import balances, budgets, jobs, money
+from .models import Ledger, Party, Person, Expense, Settlement, PeriodClose, Job, Receipt, Budget
 
-TWOPLACES = Decimal("0.01")
 
-def q2(x: Decimal) -> Decimal:
-    if x is None:
-        return None
-    return x.quantize(TWOPLACES, rounding=ROUND_HALF_UP)
+class FixedPointField(serializers.DecimalField):
+    """A decimal in the API, stored as an integer scaled by 10**decimal_places (see tracker/money.py)."""
+    def to_internal_value(self, data):
+        return money.to_minor(super().to_internal_value(data), self.decimal_places)
+
+    def to_representation(self, value):
+        return money.fmt(value, self.decimal_places)
+
+
+class AmountField(serializers.DecimalField):
+    """
+    An expense amount in major units. Its scale depends on the row's currency,
+    so it reads the whole instance and leaves the conversion to validate().
+    """
+    def __init__(self, **kwargs):
+        super().__init__(max_digits=16, decimal_places=4, source="*", **kwargs)
+
+    def to_internal_value(self, data):
+        return {"amount": super().to_internal_value(data)}
+
+    def to_representation(self, obj):
+        return money.fmt_amount(obj.amount_minor, obj.amount_exponent)
+
+
+def _ledger_id(serializer):
+    """The ledger being written to: from the view (see LedgerScopedMixin), else the instance's."""
+    ledger = serializer.context.get("ledger")
+    return ledger.pk if ledger else getattr(serializer.instance, "ledger_id", None)
+
+def _same_ledger(serializer, person):
+    if person is not None and _ledger_id(serializer) not in (None, person.ledger_id):
+        raise serializers.ValidationError("Person belongs to another ledger.")
+    return person
+
+class LedgerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Ledger
+        fields = ["id", "name", "slug"]
+
 
 class PartySerializer(serializers.ModelSerializer):
     class Meta:
@@ -35,6 +72,9 @@ class ExpenseSerializer(serializers.ModelSerializer):
     paid_by_display = serializers.SerializerMethodField()
     paid_by_party = serializers.SerializerMethodField()
 
+    amount = AmountField()
+    fx_to_cad = FixedPointField(max_digits=18, decimal_places=money.FX_PLACES, source="fx_to_cad_e8", required=False)
+
     amount_cad = serializers.SerializerMethodField()
     share_household_cad = serializers.SerializerMethodField()
     share_bev_cad = serializers.SerializerMethodField()
@@ -60,6 +100,33 @@ class ExpenseSerializer(serializers.ModelSerializer):
             "notes",
         ]
 
+    def validate_paid_by(self, person):
+        return _same_ledger(self, person)
+
+    def validate(self, attrs):
+        # closed periods are read-only: both the old and the new date must be open
+        balances.ensure_open(_ledger_id(self), attrs.get("date"), getattr(self.instance, "date", None))
+
+        # amount -> integer minor units at the currency's ISO 4217 exponent
+        instance = self.instance
+        amount = attrs.pop("amount", None)
+        currency = attrs.get("currency") or getattr(instance, "currency", Expense._meta.get_field("currency").default)
+        if amount is None and instance is not None and currency != instance.currency:
+            amount = instance.amount
+        if amount is not None:
+            places = money.exponent(currency)
+            try:
+                attrs["amount_minor"] = money.to_minor(amount, places)
+            except ValueError:
+                raise serializers.ValidationError({"amount": f"{currency} amounts have at most {places} decimal places."})
+            attrs["amount_exponent"] = places
+
+        minor = attrs.get("amount_minor", getattr(instance, "amount_minor", 0))
+        fx = attrs.get("fx_to_cad_e8", getattr(instance, "fx_to_cad_e8", money.FX_SCALE))
+        if abs(minor * fx) > money.BIGINT_MAX:  # summaries sum amount_minor * fx_to_cad_e8 as bigint
+            raise serializers.ValidationError({"amount": "Amount is too large."})
+        return attrs
+
     def validate_currency(self, v: str) -> str:
         v = (v or "").upper().strip()
         if len(v) != 3:
@@ -85,31 +152,30 @@ class ExpenseSerializer(serializers.ModelSerializer):
             "is_household": party.is_household,
         }
 
-    def _cad_amount(self, obj) -> Decimal:
-        # (amount * fx) in CAD using Decimal math
-        amt = Decimal(obj.amount)
-        fx = Decimal(obj.fx_to_cad)
-        return q2(amt * fx)
+    # CAD figures in integer cents (rounded half up), rendered as numbers
+    def _cad_cents(self, obj) -> int:
+        return money.cad_cents(obj.amount_minor, obj.amount_exponent, obj.fx_to_cad_e8)
 
-    def get_amount_cad(self, obj):
-        return self._cad_amount(obj)
+    def get_amount_cad(self, obj) -> float:
+        return self._cad_cents(obj) / 100
 
     def _shares(self, obj):
-        total = self._cad_amount(obj) or Decimal("0.00")
-        wH = Decimal(obj.weight_household or 0)
-        wB = Decimal(obj.weight_bev or 0)
-        denom = (wH + wB) or Decimal(1)
-        shareH = q2(total * (wH / denom))
-        shareB = q2(total * (wB / denom))
-        return shareH, shareB
-
-    def get_share_household_cad(self, obj):
+        return money.split(self._cad_cents(obj), obj.weight_household or 0, obj.weight_bev or 0)
+
+    def get_share_household_cad(self, obj) -> float:
         h, _ = self._shares(obj)
-        return h
+        return h / 100
 
-    def get_share_bev_cad(self, obj):
+    def get_share_bev_cad(self, obj) -> float:
         _, b = self._shares(obj)
-        return b
+        return b / 100
+
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        # set on freshly created rows only (tracker/duplicates.py), so list payloads stay as they were
+        if hasattr(obj, "possible_duplicates"):
+            data["possible_duplicates"] = obj.possible_duplicates
+        return data
 
 
 class SettlementSerializer(serializers.ModelSerializer):
@@ -133,6 +199,8 @@ class SettlementSerializer(serializers.ModelSerializer):
     from_party_name = serializers.SerializerMethodField(read_only=True)
     to_party_name = serializers.SerializerMethodField(read_only=True)
 
+    amount_cad = FixedPointField(max_digits=14, decimal_places=money.CAD_EXPONENT, source="amount_cad_cents")
+
     class Meta:
         model = Settlement
         fields = [
@@ -169,6 +237,8 @@ class SettlementSerializer(serializers.ModelSerializer):
           - (legacy) from_party / to_party already present in attrs.
         Translate people to their parties.
         """
+        balances.ensure_open(_ledger_id(self), attrs.get("date"), getattr(self.instance, "date", None))
+
         # When coming from our write-only Person PK fields, attrs["from_party"]
         # and attrs["to_party"] will temporarily be Person objects (because we
         # pointed source=from_party/to_party above). Convert them to the Person's party.
@@ -176,12 +246,14 @@ class SettlementSerializer(serializers.ModelSerializer):
         tp = attrs.get("to_party")
 
         if isinstance(fp, Person):
+            _same_ledger(self, fp)
             party = getattr(fp, "party", None)
             if not party:
                 raise serializers.ValidationError("From person must belong to a party.")
             attrs["from_party"] = party
 
         if isinstance(tp, Person):
+            _same_ledger(self, tp)
             party = getattr(tp, "party", None)
             if not party:
                 raise serializers.ValidationError("To person must belong to a party.")
@@ -191,4 +263,178 @@ class SettlementSerializer(serializers.ModelSerializer):
         if not attrs.get("from_party") or not attrs.get("to_party"):
             raise serializers.ValidationError("Both from and to parties (via people) are required.")
 
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class PeriodCloseSerializer(serializers.ModelSerializer):
+    closed_by = serializers.CharField(source="closed_by.username", read_only=True, default=None)
+
+    class Meta:
+        model = PeriodClose
+        fields = [
+            "id",
+            "through",
+            "bev_owes",
+            "household_owes",
+            "bev_to_house",
+            "house_to_bev",
+            "category_totals",
+            "closed_by",
+            "closed_at",
+        ]
+        read_only_fields = [f for f in fields if f != "through"]
+
+
+class JobSerializer(serializers.ModelSerializer):
+    file_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "kind",
+            "payload",
+            "status",
+            "attempts",
+            "max_attempts",
+            "run_after",
+            "last_error",
+            "result",
+            "file_url",
+            "created_at",
+            "finished_at",
+        ]
+        read_only_fields = [f for f in fields if f not in ("kind", "payload")]
+
+    def get_file_url(self, obj) -> str | None:
+        # exports are private files: download them through the API, in their ledger (<a href> sends no X-Ledger)
+        result = obj.result or {}
+        if obj.status != Job.DONE or "file" not in result:
+            return None
+        return f"{reverse('job-file', args=[obj.pk])}?ledger={result['ledger']}"
+
+    def validate_kind(self, v):
+        if v not in jobs.PUBLIC_KINDS:
+            raise serializers.ValidationError(f"Choose one of: {', '.join(sorted(jobs.PUBLIC_KINDS))}.")
+        return v
+
+    def validate(self, attrs):
+        # checked now, with the synchronous endpoint's rules, rather than failing (and retrying) in the worker
+        payload = attrs.get("payload") or {}
+        if not isinstance(payload, dict):
+            raise serializers.ValidationError({"payload": "Expected an object."})
+        checker = JOB_PAYLOADS[attrs["kind"]](data=payload, context=self.context)
+        unknown = sorted(set(payload) - set(checker.fields))
+        if unknown:
+            raise serializers.ValidationError({"payload": f"Unexpected keys: {', '.join(unknown)}."})
+        if not checker.is_valid():
+            raise serializers.ValidationError({"payload": checker.errors})
+        attrs["payload"] = checker.data  # JSON-ready; the view adds ledger and user
+        return attrs
+
+
+class ExportPayload(serializers.Serializer):
+    """expenses.export takes nothing but the request's ledger."""
+
+
+class PeriodClosePayload(serializers.Serializer):
+    """periods.close: the checks PeriodCloseViewSet makes before closing synchronously."""
+    through = serializers.DateField()
+
+    def validate(self, attrs):
+        ledger = self.context["ledger"]
+        household, bev = balances.household_and_bev(list(Party.objects.filter(ledger=ledger)))
+        if not household or not bev:
+            raise serializers.ValidationError({"detail": "Parties not bootstrapped yet."})
+        closed = PeriodClose.objects.filter(ledger=ledger).order_by("-through").values_list("through", flat=True).first()
+        if closed and attrs["through"] <= closed:
+            raise serializers.ValidationError({"through": f"Already closed through {closed}."})
+        return attrs
+
+
+# payload serializer for each kind that POST /api/jobs/ accepts (jobs.PUBLIC_KINDS)
+JOB_PAYLOADS = {
+    "expenses.export": ExportPayload,
+    "periods.close": PeriodClosePayload,
+}
+
+
+class ReceiptSerializer(serializers.ModelSerializer):
+    size = serializers.IntegerField(source="blob.size", read_only=True)
+    content_type = serializers.CharField(source="blob.content_type", read_only=True)
+    sha256 = serializers.CharField(source="blob.sha256", read_only=True)
+    uploaded_by = serializers.CharField(source="uploaded_by.username", read_only=True, default=None)
+    url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Receipt
+        fields = ["id", "expense", "filename", "size", "content_type", "sha256", "url", "thumbnail_url",
+                  "uploaded_by", "created_at"]
+        read_only_fields = fields
+
+    def get_url(self, obj) -> str:
+        return reverse("receipt-file", args=[obj.pk])
+
+    def get_thumbnail_url(self, obj) -> str | None:
+        return reverse("receipt-thumbnail", args=[obj.pk]) if obj.blob.has_thumbnail else None
+
+
+class ReceiptUploadSerializer(serializers.Serializer):
+    """Starts a chunked upload (POST /api/uploads/); see tracker/receipts.py."""
+    expense = serializers.PrimaryKeyRelatedField(queryset=Expense.objects.all())
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    sha256 = serializers.RegexField(r"^[0-9a-fA-F]{64}$", required=False, default="")
+
+    def validate_expense(self, expense):
+        if _ledger_id(self) not in (None, expense.ledger_id):
+            raise serializers.ValidationError("Expense belongs to another ledger.")
+        return expense
+
+    def validate_size(self, v):
+        if v > settings.RECEIPT_MAX_BYTES:
+            raise serializers.ValidationError(f"Receipts are limited to {settings.RECEIPT_MAX_BYTES} bytes.")
+        return v
+
+
+class BudgetSerializer(serializers.ModelSerializer):
+    """
+    A budget and its status for the period containing context["on"] (default
+    today). Amounts are CAD; see tracker/budgets.py for the projection.
+    """
+    amount_cad = FixedPointField(max_digits=14, decimal_places=money.CAD_EXPONENT, source="amount_cad_cents")
+    party = serializers.PrimaryKeyRelatedField(queryset=Party.objects.all(), allow_null=True, required=False)
+    thresholds = serializers.ListField(child=serializers.IntegerField(min_value=1, max_value=1000),
+                                       required=False, max_length=10)
+    status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Budget
+        fields = ["id", "category", "period", "party", "amount_cad", "thresholds", "status"]
+
+    def validate_amount_cad(self, v):
+        if v <= 0:
+            raise serializers.ValidationError("Must be more than zero.")
+        return v
+
+    def validate_thresholds(self, v):
+        return sorted(set(v))
+
+    def validate_party(self, party):
+        if party is None:
+            return None
+        if _ledger_id(self) not in (None, party.ledger_id):
+            raise serializers.ValidationError("Party belongs to another ledger.")
+        if party not in balances.household_and_bev(list(Party.objects.filter(ledger_id=party.ledger_id))):
+            raise serializers.ValidationError("Budgets follow the household's or bev's share.")
+        return party
+
+    def get_status(self, obj) -> dict:
+        on = self.context.get("on") or timezone.localdate()
+        if not hasattr(obj, "spent_cents"):  # just written, so not annotated by the view's queryset
+            obj = budgets.with_spent(Budget.objects.filter(pk=obj.pk), on).get()
+        status = budgets.status(obj, on)
+        for k in ("spent", "remaining", "projected", "projected_overrun"):
+            status[f"{k}_cad"] = money.fmt(status.pop(f"{k}_cents"), money.CAD_EXPONENT)
+        return status
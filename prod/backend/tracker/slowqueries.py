@@ -0,0 +1,245 @@
+# --- backend/tracker/slowqueries.py ---
+"""
+Slow-query sampler.
+
+An execute wrapper on every DB connection times each statement. Statements
+taking SLOW_QUERY_MS or longer are logged (logger "tracker.slowqueries") and
+appended as one JSON line to SLOW_QUERY_LOG, a size-rotated file, tagged with
+the view that ran them: the function name for plain views ("summary"),
+Class.action for viewsets ("ExpenseViewSet.list"), "background" outside a
+request. For a SLOW_QUERY_EXPLAIN_RATE fraction of slow reads on
+PostgreSQL the line also carries EXPLAIN (ANALYZE, BUFFERS) output. ANALYZE
+runs the statement a second time, which is why it is sampled and never used
+on writes.
+
+`manage.py slow_queries` ranks the logged statements.
+
+Parameters are not logged (they are user data), but plans show the constants
+the planner saw. Each gunicorn worker rotates the shared file on its own, so
+a few lines can be lost around a rotation; this is a sampler, not an audit log.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils import timezone
+
+log = logging.getLogger(__name__)
+
+BACKGROUND = "background"
+_WRITE = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+_request = ContextVar("tracker_slowqueries_request", default=None)
+_file = {"path": None, "logger": None}
+_file_lock = threading.Lock()
+
+
+# -------------------------
+# Tagging
+# -------------------------
+def view_tag(request):
+    """"summary", "ExpenseViewSet.list", ... for a resolved request ("unmatched" before URL resolution)."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    func = match.func
+    cls = getattr(func, "cls", None)
+    actions = getattr(func, "actions", None)
+    if cls is not None and actions:
+        method = request.method.lower()
+        return f"{cls.__name__}.{actions.get(method, method)}"
+    if cls is not None:
+        return cls.__name__  # @api_view names its WrappedAPIView after the function
+    return getattr(func, "__name__", None) or match.view_name or "unnamed"
+
+
+class SlowQueryMiddleware:
+    """Makes the current request visible to the execute wrapper (ContextVar, so async views work too)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = _request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+
+    async def __acall__(self, request):
+        token = _request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request.reset(token)
+
+
+# -------------------------
+# The execute wrapper
+# -------------------------
+def _threshold():
+    ms = settings.SLOW_QUERY_MS
+    return None if ms is None or ms < 0 else ms / 1000
+
+
+def _sample_slow(execute, sql, params, many, context):
+    threshold = _threshold()
+    if threshold is None:
+        return execute(sql, params, many, context)
+    start, ok = time.perf_counter(), False
+    try:
+        result = execute(sql, params, many, context)
+        ok = True
+        return result
+    finally:
+        elapsed = time.perf_counter() - start
+        if elapsed >= threshold:
+            try:
+                _record(sql, params, elapsed, context["connection"], explainable=ok and not many)
+            except Exception:
+                log.exception("slow query logging failed")
+
+
+@receiver(connection_created)
+def _install_sampler(sender, connection, **kwargs):
+    if _sample_slow not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sample_slow)
+
+
+def _read_only(sql):
+    head = sql.lstrip()[:6].upper()
+    return head == "SELECT" or (head[:4] == "WITH" and not _WRITE.search(sql))
+
+
+def _sampled(sql, connection):
+    return (connection.vendor == "postgresql" and _read_only(sql)
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE)
+
+
+def explain(connection, sql, params):
+    """
+    EXPLAIN (ANALYZE, BUFFERS) text for a statement, on the raw DB-API
+    connection, so it skips the execute wrappers and the query log. Inside a
+    transaction it runs in a savepoint that is always rolled back, so a failure
+    cannot abort the caller's transaction.
+    """
+    raw = connection.connection
+    in_tx = not connection.get_autocommit()
+    with raw.cursor() as cur:
+        if in_tx:
+            cur.execute("SAVEPOINT tracker_explain")
+        try:
+            cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+            return "\n".join(row[0] for row in cur.fetchall())
+        finally:
+            if in_tx:
+                cur.execute("ROLLBACK TO SAVEPOINT tracker_explain")
+                cur.execute("RELEASE SAVEPOINT tracker_explain")
+
+
+def _record(sql, params, elapsed, connection, explainable):
+    request = _request.get()
+    view = view_tag(request) if request is not None else BACKGROUND
+    sql = str(sql)
+    plan = None
+    if explainable and _sampled(sql, connection):
+        try:
+            plan = explain(connection, sql, params)
+        except Exception as e:
+            plan = f"EXPLAIN failed: {e}"
+    ms = round(elapsed * 1000, 1)
+    log.warning("slow query %.1fms [%s]: %s", ms, view, sql[:500])
+    entry = {"ts": timezone.now().isoformat(), "view": view, "ms": ms, "db": connection.alias,
+             "sql": sql, "plan": plan}
+    _file_logger().info(json.dumps(entry, separators=(",", ":")))
+
+
+def _file_logger():
+    path = settings.SLOW_QUERY_LOG
+    if _file["path"] != path:
+        with _file_lock:
+            if _file["path"] != path:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(path, maxBytes=settings.SLOW_QUERY_LOG_BYTES,
+                                              backupCount=settings.SLOW_QUERY_LOG_BACKUPS, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                file_log = logging.getLogger(f"{__name__}.file")
+                file_log.propagate = False
+                file_log.setLevel(logging.INFO)
+                for old in list(file_log.handlers):
+                    file_log.removeHandler(old)
+                    old.close()
+                file_log.addHandler(handler)
+                _file.update(path=path, logger=file_log)
+    return _file["logger"]
+
+
+# -------------------------
+# Reading the log back
+# -------------------------
+def log_files(path=None):
+    """The log and its rotated backups (path, path.1, ...), oldest content last."""
+    path = Path(path or settings.SLOW_QUERY_LOG)
+    rotated = sorted(path.parent.glob(f"{path.name}.*"), key=lambda p: int(p.suffix[1:]) if p.suffix[1:].isdigit() else 0)
+    return [p for p in (path, *rotated) if p.is_file()]
+
+
+def read_entries(paths):
+    for p in paths:
+        with open(p, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # torn line from a concurrent rotation
+
+
+def fingerprint(sql):
+    """Statement text with IN-list lengths folded, so "IN (%s, %s)" and "IN (%s)" group together."""
+    out, i = [], 0
+    while True:
+        j = sql.find("%s", i)
+        if j < 0:
+            out.append(sql[i:])
+            return " ".join("".join(out).split())
+        out.append(sql[i:j] + "%s")
+        i = j + 2
+        while sql.startswith(", %s", i):
+            i += 4
+
+
+def worst(entries, by="total", view=None):
+    """Per-fingerprint stats (count, total_ms, max_ms, views, latest plan), worst first."""
+    groups = {}
+    for e in entries:
+        if view and e.get("view") != view:
+            continue
+        key = fingerprint(e.get("sql", ""))
+        g = groups.setdefault(key, {"sql": key, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                    "views": {}, "plan": None, "plan_ts": ""})
+        ms = float(e.get("ms") or 0)
+        g["count"] += 1
+        g["total_ms"] += ms
+        g["max_ms"] = max(g["max_ms"], ms)
+        g["views"][e.get("view")] = g["views"].get(e.get("view"), 0) + 1
+        if e.get("plan") and e.get("ts", "") >= g["plan_ts"]:
+            g["plan"], g["plan_ts"] = e["plan"], e.get("ts", "")
+    field = {"total": "total_ms", "max": "max_ms", "count": "count"}[by]
+    return sorted(groups.values(), key=lambda g: g[field], reverse=True)
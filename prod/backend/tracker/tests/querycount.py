@@ -0,0 +1,127 @@
+# --- backend/tracker/tests/querycount.py ---
+"""
+Helpers for pinning SQL query counts and spotting N+1 patterns.
+
+Failures always include the captured SQL, so a regression shows exactly which
+statements were added.
+"""
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from tracker.models import Ledger, Party, Person, Expense, Settlement
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),            # string literals
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),         # numbers
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),  # IN (?, ?, ...) lists
+    (re.compile(r"\s+"), " "),
+]
+
+
+def sql_shape(sql):
+    """SQL with literals stripped, so the same statement with different ids compares equal."""
+    for pattern, repl in _LITERALS:
+        sql = pattern.sub(repl, sql)
+    return sql.strip()
+
+
+def repeated_shapes(queries, threshold=3):
+    """[(shape, count)] for statement shapes executed at least `threshold` times: the N+1 signature."""
+    counts = Counter(sql_shape(q["sql"]) for q in queries)
+    return [(shape, n) for shape, n in counts.most_common() if n >= threshold]
+
+
+def format_queries(queries):
+    return "\n".join(f"  {i}. {q['sql']}" for i, q in enumerate(queries, 1))
+
+
+@override_settings(
+    ALLOWED_HOSTS=["*"],
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    REPLICA_DB_ALIAS=None,  # test data lives in the test transaction, which a replica connection can't see
+)
+class QueryCountTestCase(TestCase):
+    """TestCase with an isolated cache and query-count/N+1 assertions."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    @contextmanager
+    def assertQueries(self, expected, label="", n_plus_one_threshold=3):
+        # counted across every alias the test may use (e.g. a read replica)
+        with ExitStack() as stack:
+            contexts = [stack.enter_context(CaptureQueriesContext(connections[alias]))
+                        for alias in sorted(self.databases)]
+            yield contexts
+        queries = [q for ctx in contexts for q in ctx.captured_queries]
+        repeats = repeated_shapes(queries, n_plus_one_threshold)
+        if repeats:
+            self.fail(
+                f"{label}: possible N+1, repeated statements:\n"
+                + "\n".join(f"  x{n}: {shape}" for shape, n in repeats)
+                + f"\nAll {len(queries)} queries:\n{format_queries(queries)}"
+            )
+        if len(queries) != expected:
+            self.fail(f"{label}: expected {expected} queries, got {len(queries)}:\n{format_queries(queries)}")
+
+
+class ApiTestCase(QueryCountTestCase):
+    """The default ledger's parties and people, and `client` logged in as a staff "editor" (`user`), a member."""
+
+    def setUp(self):
+        super().setUp()
+        self.household, self.bev, self.chris, self.bev_p = make_parties()
+        self.ledger = self.household.ledger
+        self.user = User.objects.create_user("editor", password="pw", is_staff=True)
+        self.ledger.members.add(self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+
+# -------------------------
+# Data factories
+# -------------------------
+def make_parties(ledger=None):
+    ledger = ledger or Ledger.objects.get_or_create(slug="default", defaults={"name": "Default"})[0]
+    household = Party.objects.create(ledger=ledger, name="Household (Chris+Tressa)", slug="household",
+                                     is_household=True)
+    bev = Party.objects.create(ledger=ledger, name="Bev", slug="bev")
+    chris = Person.objects.create(ledger=ledger, name="Chris", party=household)
+    bev_p = Person.objects.create(ledger=ledger, name="Bev", party=bev)
+    return household, bev, chris, bev_p
+
+
+def make_expenses(n, payers, start=0):
+    Expense.objects.bulk_create([
+        Expense(
+            ledger_id=payers[0].ledger_id,
+            date=date(2025, 1, 1 + (start + i) % 28),
+            description=f"expense {start + i}",
+            category="food",
+            currency="THB",
+            fx_to_cad_e8=4_000_000,                 # 0.04
+            amount_minor=10_000 + 100 * i,          # 100.00 + i THB
+            paid_by=payers[(start + i) % len(payers)],
+            weight_household=2,
+            weight_bev=1,
+        )
+        for i in range(n)
+    ])
+
+
+def make_settlements(n, household, bev, start=0):
+    Settlement.objects.bulk_create([
+        Settlement(ledger_id=household.ledger_id, date=date(2025, 1, 1 + (start + i) % 28),
+                   from_party=bev, to_party=household,
+                   amount_cad_cents=1000)
+        for i in range(n)
+    ])
@@ -0,0 +1,82 @@
+# --- backend/tracker/tests/test_anomalies.py ---
+"""Anomaly report: vectorized robust z-scores and duplicates, cached under the ledger's data version."""
+import statistics
+from datetime import date
+
+import numpy as np
+from django.test import TestCase
+from django.urls import reverse
+
+from tracker import anomalies
+from tracker.models import Expense
+from .querycount import ApiTestCase, make_expenses
+from .test_query_counts import BUDGET
+
+
+class RobustZTests(TestCase):
+    def test_group_medians_match_the_statistics_module(self):
+        rng = np.random.default_rng(7)
+        group = rng.integers(0, 4, 101)
+        values = rng.normal(0, 1, 101)
+        medians = anomalies._group_median(group, values, 5)
+        for g in range(4):
+            self.assertAlmostEqual(medians[g], statistics.median(values[group == g]))
+        self.assertTrue(np.isnan(medians[4]))
+
+    def test_small_or_flat_groups_flag_nothing(self):
+        group = np.array([0] * 5 + [1] * 10)
+        values = np.array([1.0, 1, 1, 1, 50] + [2.0] * 10)
+        z, _ = anomalies.robust_z(group, values)
+        self.assertFalse(z.any())
+
+
+class AnomalyReportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        make_expenses(40, [self.chris, self.bev_p])              # food, THB 100..139 at 0.04
+
+    def add(self, amount_minor, fx_to_cad_e8=4_000_000, day=date(2025, 2, 3), payer=None):
+        return Expense.objects.create(ledger_id=self.chris.ledger_id, date=day, description="dinner",
+                                      category="food", currency="THB", fx_to_cad_e8=fx_to_cad_e8,
+                                      amount_minor=amount_minor, paid_by=payer or self.chris)
+
+    def report(self, query=""):
+        r = self.client.get(reverse("report-anomalies") + query)
+        self.assertEqual(r.status_code, 200, r.content)
+        return r.json()
+
+    def test_thb_amount_saved_with_a_cad_rate_is_the_top_outlier(self):
+        typo = self.add(12_000, fx_to_cad_e8=100_000_000)    # 120 THB "at" 1.0
+        result = self.report()
+        self.assertEqual(result["count"], 41)
+        top = result["outliers"][0]
+        self.assertEqual((top["id"], top["amount_cad"], top["fx_to_cad"]), (typo.pk, "120.00", "1.00000000"))
+        reasons = {r["check"]: r for r in top["reasons"]}
+        self.assertEqual(set(reasons), {"category", "currency", "fx_rate"})  # weekday groups are too small
+        self.assertEqual(reasons["fx_rate"]["typical"], "0.04")
+        self.assertEqual([o["id"] for o in result["outliers"]], [typo.pk])
+
+    def test_same_day_same_amount_is_a_likely_duplicate(self):
+        a = self.add(13_050)
+        b = self.add(13_050, payer=self.bev_p)   # the other side entered the shared dinner too
+        self.add(13_050, day=date(2025, 2, 4))   # next day: not the same
+        result = self.report()
+        self.assertEqual([[row["id"] for row in g] for g in result["duplicates"]], [[a.pk, b.pk]])
+        self.assertEqual(result["duplicates"][0][0]["description"], "dinner")
+        self.assertEqual(result["outliers"], [])
+
+    def test_cached_until_the_ledger_changes(self):
+        typo = self.add(12_000, fx_to_cad_e8=100_000_000)
+        self.client.get(reverse("summary"))  # warm the ledger cache
+        with self.assertQueries(2, label="compute"):  # the arrays, then descriptions of the rows reported
+            self.assertEqual(self.report()["outliers"][0]["id"], typo.pk)
+        with self.assertQueries(BUDGET["report-anomalies"], label="cached"):
+            self.report()
+        typo.fx_to_cad_e8 = 4_000_000
+        with self.captureOnCommitCallbacks(execute=True):
+            typo.save()
+        self.assertEqual(self.report()["outliers"], [])  # the fix bumped the version
+
+    def test_bad_parameters(self):
+        r = self.client.get(reverse("report-anomalies") + "?z=high")
+        self.assertEqual(r.status_code, 400)
@@ -0,0 +1,159 @@
+# --- backend/tracker/tests/test_budgets.py ---
+"""Budgets: spend totals kept on expense writes, status and projection, threshold events."""
+import threading
+import unittest
+from datetime import date
+
+from django.db import connection, connections, transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from tracker import budgets
+from tracker.models import Expense, Party, SpendTotal
+from .querycount import ApiTestCase, make_parties, make_expenses
+from .test_query_counts import BUDGET
+
+
+class BudgetTests(ApiTestCase):
+    def spend(self, amount, day="2025-03-10", category="food", **extra):
+        r = self.client.post(reverse("expense-list"), {
+            "date": day, "description": "x", "category": category, "currency": "CAD", "amount": amount,
+            "paid_by": self.chris.pk, **extra,
+        }, content_type="application/json")
+        self.assertEqual(r.status_code, 201, r.content)
+        return r.json()
+
+    def stored(self):
+        return {(t.ledger_id, t.category, t.period, t.start, t.side): t.cents
+                for t in SpendTotal.objects.exclude(cents=0)}
+
+    def from_scratch(self):
+        return {k: v for k, v in budgets.totals(Expense.objects.values(*budgets.ROW_FIELDS)).items() if v}
+
+    def budget(self, amount, **fields):
+        r = self.client.post(reverse("budget-list"), {"amount_cad": amount, **fields},
+                             content_type="application/json")
+        self.assertEqual(r.status_code, 201, r.content)
+        return r.json()
+
+    def test_totals_follow_creates_edits_and_deletes(self):
+        a = self.spend("40.00", weight_household=3, weight_bev=1)
+        b = self.spend("25.50", day="2025-04-02", category="transport")
+        self.assertEqual(self.stored(), self.from_scratch())
+        key = (self.ledger.pk, "", "month", date(2025, 3, 1), "household")
+        self.assertEqual(self.stored()[key], 3000)
+
+        r = self.client.patch(reverse("expense-detail", args=[a["id"]]), {"date": "2025-04-30", "category": "lodging"},
+                              content_type="application/json")
+        self.assertEqual(r.status_code, 200, r.content)
+        self.assertEqual(self.stored(), self.from_scratch())
+        self.assertNotIn(key, self.stored())  # moved out of March
+
+        self.client.delete(reverse("expense-detail", args=[b["id"]]))
+        self.assertEqual(self.stored(), self.from_scratch())
+
+    def test_rebuild_picks_up_bulk_writes(self):
+        make_expenses(7, [self.chris, self.bev_p])  # bulk_create: no signals
+        self.assertEqual(self.stored(), {})
+        budgets.rebuild(self.ledger.pk)
+        self.assertEqual(self.stored(), self.from_scratch())
+
+    def test_status_and_projection(self):
+        food = self.budget("100.00", category="food")
+        bev_share = self.budget("30.00", party=self.bev.pk, period="week")
+        self.spend("50.00", day="2025-03-03")
+        self.spend("10.00", day="2025-03-10")
+        self.spend("99.00", day="2025-03-10", category="lodging")
+
+        r = self.client.get(reverse("budget-list") + "?on=2025-03-10").json()
+        status = {b["id"]: b["status"] for b in r}
+        s = status[food["id"]]
+        self.assertEqual((s["period_start"], s["period_end"]), ("2025-03-01", "2025-03-31"))
+        self.assertEqual((s["spent_cad"], s["remaining_cad"], s["percent"], s["reached"]), ("60.00", "40.00", 60.0, 50))
+        # 60.00 over 10 of 31 days -> 186.00 by the end of March
+        self.assertEqual((s["projected_cad"], s["projected_overrun_cad"]), ("186.00", "86.00"))
+
+        s = status[bev_share["id"]]  # week of Monday 10 March: half of 10.00 + 99.00
+        self.assertEqual((s["period_start"], s["spent_cad"], s["remaining_cad"]), ("2025-03-10", "54.50", "-24.50"))
+
+        s = self.client.get(reverse("budget-detail", args=[food["id"]]) + "?on=2025-04-01").json()["status"]
+        self.assertEqual((s["spent_cad"], s["projected_cad"]), ("0.00", "0.00"))
+
+    def test_crossing_a_threshold_fires_once(self):
+        food = self.budget("100.00", category="food", thresholds=[80, 50, 100])
+        self.assertEqual(food["thresholds"], [50, 80, 100])
+        events = []
+        budgets.threshold_crossed.connect(lambda **kw: events.append((kw["budget_id"], kw["threshold"])),
+                                          weak=False, dispatch_uid="test")
+        self.addCleanup(budgets.threshold_crossed.disconnect, dispatch_uid="test")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.spend("45.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.spend("40.00")                          # 85: past 50 and 80 at once
+        with self.captureOnCommitCallbacks(execute=True):
+            self.spend("5.00")                           # 90: nothing new
+        with self.captureOnCommitCallbacks(execute=True):
+            self.spend("500.00", category="transport")   # another category
+        self.assertEqual(events, [(food["id"], 50), (food["id"], 80)])
+
+    def test_stale_instances_write_from_the_stored_row(self):
+        a = self.spend("40.00")
+        first, second = Expense.objects.get(pk=a["id"]), Expense.objects.get(pk=a["id"])
+        first.amount_minor = 6000
+        first.save()
+        second.category = "transport"  # still holds 40.00
+        second.save()
+        self.assertEqual(self.stored(), self.from_scratch())
+        Expense.objects.filter(pk=a["id"]).update(amount_minor=7000)
+        budgets.rebuild(self.ledger.pk)
+        second.delete()  # subtracts the stored 70.00, not the 40.00 it holds
+        self.assertEqual(self.stored(), {})
+
+    def test_party_must_be_a_side(self):
+        other = Party.objects.create(ledger=self.ledger, name="Guest", slug="guest")
+        r = self.client.post(reverse("budget-list"), {"amount_cad": "10.00", "party": other.pk},
+                             content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("party", r.json())
+
+    def test_query_budgets(self):
+        for category in ("food", "lodging", "transport", ""):
+            self.budget("100.00", category=category)
+        self.spend("12.00")
+        self.client.get(reverse("bootstrap"))  # warm the ledger and recents caches
+        with self.assertQueries(BUDGET["budget-list"], label="GET budget-list"):
+            r = self.client.get(reverse("budget-list"))
+        self.assertEqual(len(r.json()), 4)
+        with self.assertQueries(BUDGET["bootstrap"], label="GET bootstrap"):
+            r = self.client.get(reverse("bootstrap"))
+        self.assertEqual(len(r.json()["budgets"]), 4)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "row locks need Postgres")
+class ConcurrentSaveTests(TransactionTestCase):
+    def test_saves_from_one_stale_copy_queue_on_the_row(self):
+        household, bev, chris, bev_p = make_parties()
+        make_expenses(1, [chris])
+        budgets.rebuild(household.ledger_id)
+        first, second = Expense.objects.get(), Expense.objects.get()
+        first.amount_minor *= 2
+        second.category = "transport"
+
+        def other_writer():
+            try:
+                second.save()
+            finally:
+                connections.close_all()
+
+        with transaction.atomic():
+            first.save()
+            t = threading.Thread(target=other_writer)
+            t.start()
+            t.join(timeout=0.5)
+            self.assertTrue(t.is_alive(), "the second save should wait for the first to commit")
+        t.join(timeout=10)
+        stored = {(s.ledger_id, s.category, s.period, s.start, s.side): s.cents
+                  for s in SpendTotal.objects.exclude(cents=0)}
+        fresh = budgets.totals(Expense.objects.values(*budgets.ROW_FIELDS))
+        self.assertEqual(stored, {k: v for k, v in fresh.items() if v})
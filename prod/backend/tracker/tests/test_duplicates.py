@@ -0,0 +1,93 @@
+# --- backend/tracker/tests/test_duplicates.py ---
+"""Expense fingerprints: normalization, possible-duplicate warnings on create and bulk import."""
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tracker import duplicates
+from tracker.models import Expense
+from .querycount import ApiTestCase
+
+
+class FingerprintTests(TestCase):
+    def test_normalization(self):
+        day = date(2025, 3, 10)
+        same = duplicates.fingerprint(day, 125_000, 2, "thb", "Dinner at Som Tam")
+        self.assertEqual(duplicates.fingerprint(day, 12_500, 1, "THB", "som tam - DINNER!"), same)
+        self.assertEqual(duplicates.tokens("Café  crème, the café"), ["cafe", "creme"])
+        for other in [(date(2025, 3, 11), 125_000, 2, "THB", "Dinner at Som Tam"),
+                      (day, 125_100, 2, "THB", "Dinner at Som Tam"),
+                      (day, 125_000, 2, "CAD", "Dinner at Som Tam"),
+                      (day, 125_000, 2, "THB", "Lunch at Som Tam")]:
+            self.assertNotEqual(duplicates.fingerprint(*other), same, other)
+
+
+class DuplicateWarningTests(ApiTestCase):
+    def row(self, description="Dinner at Som Tam", amount="1250.00", payer=None, **extra):
+        return {"date": "2025-03-10", "description": description, "category": "food", "currency": "THB",
+                "fx_to_cad": "0.04", "amount": amount, "paid_by": (payer or self.chris).pk, **extra}
+
+    def create(self, **kwargs):
+        r = self.client.post(reverse("expense-list"), self.row(**kwargs), content_type="application/json")
+        self.assertEqual(r.status_code, 201, r.content)
+        return r.json()
+
+    def test_create_warns_about_the_same_shared_dinner(self):
+        first = self.create()
+        self.assertEqual(first["possible_duplicates"], [])
+        second = self.create(description="som tam dinner", amount="1250", payer=self.bev_p)
+        self.assertEqual(second["possible_duplicates"], [{
+            "id": first["id"], "date": "2025-03-10", "description": "Dinner at Som Tam", "amount": "1250.00",
+            "currency": "THB", "paid_by": "Chris",
+        }])
+        self.assertEqual(self.create(description="Breakfast")["possible_duplicates"], [])
+        self.assertEqual(Expense.objects.count(), 3)  # warned, not rejected
+
+        # only creates carry the warning
+        r = self.client.get(reverse("expense-detail", args=[second["id"]])).json()
+        self.assertNotIn("possible_duplicates", r)
+
+    def test_edits_keep_the_fingerprint_current(self):
+        first = self.create(description="Taxi")
+        self.client.patch(reverse("expense-detail", args=[first["id"]]), {"description": "Dinner at Som Tam"},
+                          content_type="application/json")
+        self.assertEqual([d["id"] for d in self.create()["possible_duplicates"]], [first["id"]])
+
+    def test_update_fields_saves_write_the_fingerprint_too(self):
+        expense = Expense.objects.get(pk=self.create(description="Taxi")["id"])
+        expense.description = "Dinner at Som Tam"
+        expense.save(update_fields=["description"])
+        expense.refresh_from_db()
+        self.assertEqual(expense.fingerprint, duplicates.of(expense))
+        self.assertEqual([d["id"] for d in self.create()["possible_duplicates"]], [expense.pk])
+
+        expense.notes = "split later"
+        with CaptureQueriesContext(connection) as queries:
+            expense.save(update_fields=["notes"])  # not an input: the UPDATE leaves it alone
+        [update] = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertNotIn('"fingerprint"', update)
+
+    def test_import_checks_the_ledger_and_the_batch_in_one_query(self):
+        stored = self.create()
+        rows = [self.row(), self.row(description="Taxi", amount="200"), self.row(description="TAXI", amount="200.0")]
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.post(reverse("expense-import"), rows, content_type="application/json")
+        self.assertEqual(r.status_code, 201, r.content)
+        created = r.json()
+        self.assertEqual([[d["id"] for d in e["possible_duplicates"]] for e in created],
+                         [[stored["id"]], [created[2]["id"]], [created[1]["id"]]])
+        lookups = [q for q in queries.captured_queries
+                   if q["sql"].startswith("SELECT") and '"fingerprint" IN' in q["sql"]]
+        self.assertEqual(len(lookups), 1)
+
+    def test_import_is_all_or_nothing(self):
+        rows = [self.row(), self.row(amount="abc")]
+        r = self.client.post(reverse("expense-import"), rows, content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.json()["1"], {"amount": ["A valid number is required."]})  # errors by row index
+        self.assertFalse(Expense.objects.exists())
+        r = self.client.post(reverse("expense-import"), {"description": "not a list"}, content_type="application/json")
+        self.assertEqual(r.status_code, 400)
@@ -0,0 +1,98 @@
+# --- backend/tracker/tests/test_fxmatrix.py ---
+"""The in-memory FX matrix (gap filling, refresh on writes) and reports in other currencies."""
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker import fxmatrix
+from tracker.models import Expense, FxRate
+from .querycount import ApiTestCase, QueryCountTestCase, make_expenses
+
+
+class RateMatrixTests(QueryCountTestCase):
+    def test_gaps_carry_the_last_rate_forward_and_the_first_back(self):
+        m = fxmatrix.RateMatrix()
+        m.add([(1, date(2025, 1, 3), "THB", "CAD", Decimal("0.04")),
+               (2, date(2025, 1, 6), "THB", "CAD", Decimal("0.05")),
+               (3, date(2025, 1, 1), "CAD", "USD", Decimal("0.8"))])
+        days = [date(2025, 1, d) for d in range(1, 8)]
+        self.assertEqual(list(m.cad_per_unit("THB", days)), [0.04, 0.04, 0.04, 0.04, 0.04, 0.05, 0.05])
+        self.assertAlmostEqual(m.cad_per_unit("USD", days)[-1], 1.25)      # inverted CAD->USD
+        self.assertEqual(list(m.cad_per_unit("CAD", days)), [1.0] * 7)
+        self.assertEqual(m.cad_per_unit("THB", [date(2030, 1, 1)])[0], 0.05)  # clamped to the range
+        self.assertTrue(all(v != v for v in m.cad_per_unit("EUR", days)))     # unknown: NaN
+
+    def test_inserts_and_updates_load_incrementally_and_deletes_reload(self):
+        FxRate.objects.create(date=date(2025, 1, 1), base="THB", quote="CAD", rate=Decimal("0.04"))
+        self.assertEqual(fxmatrix.rate_from_cad("THB"), Decimal("25"))
+        first = fxmatrix.get()
+
+        FxRate.objects.create(date=date(2025, 1, 2), base="THB", quote="CAD", rate=Decimal("0.05"))
+        with self.assertNumQueries(2):                              # the check, then the new row
+            self.assertIs(fxmatrix.get(), first)                    # merged in place
+        self.assertEqual(fxmatrix.rate_from_cad("THB"), Decimal("20"))
+        self.assertEqual(fxmatrix.rate_from_cad("THB", on=date(2025, 1, 1)), Decimal("25"))
+
+        FxRate.objects.filter(date=date(2025, 1, 2)).get().delete()
+        self.assertIsNot(fxmatrix.get(), first)                     # full reload
+        self.assertEqual(fxmatrix.rate_from_cad("THB"), Decimal("25"))
+
+        with self.assertNumQueries(1):                              # just the check
+            fxmatrix.get()
+
+    def test_sees_rows_written_without_signals_or_this_process_cache(self):
+        # as the job worker does: its writes reach this process only through the table
+        FxRate.objects.create(date=date(2025, 1, 1), base="THB", quote="CAD", rate=Decimal("0.04"))
+        self.assertEqual(fxmatrix.rate_from_cad("THB"), Decimal("25"))
+
+        FxRate.objects.bulk_create([FxRate(date=date(2025, 1, 2), base="USD", quote="CAD", rate=Decimal("1.25"))])
+        self.assertEqual(fxmatrix.rate_from_cad("USD"), Decimal("0.8"))
+
+        FxRate.objects.filter(base="THB").update(rate=Decimal("0.05"), updated_at=timezone.now())
+        self.assertEqual(fxmatrix.rate_from_cad("THB"), Decimal("20"))
+
+        with connection.cursor() as cur:
+            cur.execute(f"DELETE FROM {FxRate._meta.db_table} WHERE base = %s", ["USD"])
+        self.assertIsNone(fxmatrix.rate_from_cad("USD"))
+
+
+class CurrencyReportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        make_expenses(20, [self.chris, self.bev_p])               # 2025-01-01 .. 2025-01-20
+        FxRate.objects.create(date=date(2025, 1, 1), base="THB", quote="CAD", rate=Decimal("0.04"))
+        FxRate.objects.create(date=date(2025, 1, 10), base="THB", quote="CAD", rate=Decimal("0.05"))
+
+    def totals(self, query=""):
+        r = self.client.get(reverse("report-totals") + query)
+        self.assertEqual(r.status_code, 200, r.content)
+        return r.json()
+
+    def test_totals_convert_each_row_at_its_own_date(self):
+        expected = sum(e.amount * e.fx_to_cad / (Decimal("0.04") if e.date < date(2025, 1, 10) else Decimal("0.05"))
+                       for e in Expense.objects.all())
+        body = self.totals("?currency=thb")
+        self.assertEqual(body["currency"], "THB")
+        self.assertEqual(body["count"], 20)
+        self.assertAlmostEqual(Decimal(str(body["total"])), expected, places=1)
+        self.assertAlmostEqual(sum(Decimal(str(v)) for v in body["by_category"].values()),
+                               Decimal(str(body["total"])), places=1)
+
+    def test_cad_and_date_filters(self):
+        cad = sum(e.amount * e.fx_to_cad for e in Expense.objects.filter(date__lte=date(2025, 1, 5)))
+        body = self.totals("?date_to=2025-01-05")
+        self.assertEqual((body["currency"], body["count"]), ("CAD", 5))
+        self.assertAlmostEqual(Decimal(str(body["total"])), cad, places=2)
+
+    def test_unknown_currency_is_a_400(self):
+        self.assertEqual(self.client.get(reverse("report-totals") + "?currency=XYZ").status_code, 400)
+        self.assertEqual(self.client.get(reverse("summary") + "?currency=XYZ").status_code, 400)
+
+    def test_summary_in_another_currency(self):
+        cad = self.client.get(reverse("summary")).json()
+        thb = self.client.get(reverse("summary") + "?currency=THB").json()
+        self.assertEqual((thb["currency"], Decimal(str(thb["rate_from_cad"]))), ("THB", Decimal("20")))
+        self.assertAlmostEqual(Decimal(str(thb["net"])), Decimal(str(cad["net"])) * 20, places=1)
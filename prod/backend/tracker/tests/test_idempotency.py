@@ -0,0 +1,62 @@
+# --- backend/tracker/tests/test_idempotency.py ---
+"""Idempotency-Key: retries replay the saved response instead of writing again."""
+from datetime import timedelta
+
+from django.test import override_settings
+from django.urls import reverse
+
+from tracker.models import Expense, IdempotencyRecord
+from .querycount import ApiTestCase, make_expenses
+
+
+class IdempotencyTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.body = {"date": "2025-02-01", "description": "Dinner", "currency": "THB",
+                     "amount": "350.00", "fx_to_cad": "0.04", "paid_by": self.chris.pk}
+
+    def post(self, body, key=None):
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        return self.client.post(reverse("expense-list"), body, content_type="application/json", **headers)
+
+    def test_retry_replays_without_writing(self):
+        first = self.post(self.body, key="k1")
+        self.assertEqual(first.status_code, 201)
+        with self.assertQueries(1, label="replayed POST"):  # just the record lookup
+            again = self.post(self.body, key="k1")
+        self.assertEqual((again.status_code, again.json()), (201, first.json()))
+        self.assertEqual(again["Idempotent-Replayed"], "true")
+        self.assertEqual(Expense.objects.count(), 1)
+
+    def test_without_a_key_every_post_writes(self):
+        self.post(self.body)
+        self.post(self.body)
+        self.assertEqual(Expense.objects.count(), 2)
+
+    def test_key_reused_for_a_different_request(self):
+        self.post(self.body, key="k1")
+        r = self.post({**self.body, "amount": "999.00"}, key="k1")
+        self.assertEqual(r.status_code, 422)
+        self.assertEqual(Expense.objects.count(), 1)
+
+    def test_failed_request_is_not_saved(self):
+        r = self.post({**self.body, "currency": "TOOLONG"}, key="k2")
+        self.assertEqual(r.status_code, 400)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+        self.assertEqual(self.post(self.body, key="k2").status_code, 201)
+
+    def test_delete_and_patch(self):
+        make_expenses(1, [self.chris])
+        url = reverse("expense-detail", args=[Expense.objects.get().pk])
+        h = {"HTTP_IDEMPOTENCY_KEY": "p1"}
+        self.assertEqual(self.client.patch(url, {"notes": "a"}, content_type="application/json", **h).status_code, 200)
+        h = {"HTTP_IDEMPOTENCY_KEY": "d1"}
+        self.assertEqual(self.client.delete(url, **h).status_code, 204)
+        self.assertEqual(self.client.delete(url, **h).status_code, 204)  # replayed, not a 404
+
+    @override_settings(IDEMPOTENCY_TTL=60)
+    def test_expired_keys_run_again(self):
+        self.post(self.body, key="k1")
+        IdempotencyRecord.objects.update(created_at=IdempotencyRecord.objects.get().created_at - timedelta(minutes=2))
+        self.assertEqual(self.post(self.body, key="k1").status_code, 201)
+        self.assertEqual(Expense.objects.count(), 2)
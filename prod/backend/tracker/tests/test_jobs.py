@@ -0,0 +1,208 @@
+# --- backend/tracker/tests/test_jobs.py ---
+"""Job queue: claim/run/retry semantics, dedupe keys, and the fx-rate miss path."""
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection, connections, transaction
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client.mmap_dict import MmapedDict, mmap_key
+
+from tracker import jobs, metrics, views
+from tracker.serializers import JOB_PAYLOADS
+from tracker.models import Job, Ledger
+from .querycount import ApiTestCase, QueryCountTestCase
+
+
+class JobQueueTests(TestCase):
+    def test_success_records_result(self):
+        jobs.enqueue("recents.flush")
+        job = jobs.run_next("w1")
+        self.assertEqual((job.status, job.attempts, job.result), (Job.DONE, 1, {"flushed": 0}))
+        self.assertIsNone(jobs.run_next("w1"))
+
+    def test_failure_backs_off_then_fails(self):
+        job = jobs.enqueue("fx.fetch", {"date": "2025-01-01", "base": "THB", "quote": "CAD"}, max_attempts=2)
+        with mock.patch("tracker.fx.fetch_rate", side_effect=RuntimeError("upstream down")), \
+                self.assertLogs("tracker.jobs", "WARNING"):
+            job = jobs.run_next("w1")
+            self.assertEqual(job.status, Job.QUEUED)
+            self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=jobs.BACKOFF_BASE - 1))
+            self.assertIn("upstream down", job.last_error)
+            self.assertIsNone(jobs.run_next("w1"))  # not ready until the backoff passes
+
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            job = jobs.run_next("w1")
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_stale_running_job_is_reclaimed(self):
+        job = jobs.enqueue("recents.flush")
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING, attempts=1,
+            locked_at=timezone.now() - timedelta(seconds=jobs.STALE_AFTER + 1))
+        self.assertEqual(jobs.run_next("w2").pk, job.pk)
+
+    def test_key_dedupes_active_jobs(self):
+        payload = {"date": "2025-01-01", "base": "THB", "quote": "CAD"}
+        first = jobs.enqueue("fx.fetch", payload, key="fx:x")
+        self.assertEqual(jobs.enqueue("fx.fetch", payload, key="fx:x").pk, first.pk)
+        Job.objects.filter(pk=first.pk).update(status=Job.DONE)
+        self.assertNotEqual(jobs.enqueue("fx.fetch", payload, key="fx:x").pk, first.pk)
+
+
+class FxRateQueueTests(QueryCountTestCase):
+    def test_miss_queues_a_fetch(self):
+        url = reverse("fx-rate") + "?date=2025-01-01&base=THB&quote=CAD"
+        r = self.client.get(url)
+        self.assertEqual(r.status_code, 202)
+        self.assertEqual(self.client.get(url).json()["job"], r.json()["job"])  # one job per rate
+
+        with mock.patch("tracker.fx.fetch_rate", return_value=Decimal("0.04")) as fetch:
+            jobs.run_next("w1")
+        fetch.assert_called_once()
+        r = self.client.get(url)
+        self.assertEqual((r.status_code, r.json()["rate"], r.json()["source"]), (200, "0.04000000", "cache"))
+
+    def test_failed_fetch_answers_with_the_fallback_until_retry_after(self):
+        url = reverse("fx-rate") + "?date=2025-01-01&base=THB&quote=XYZ"
+        for _ in range(3):  # polls while the job is pending share it
+            self.assertEqual(self.client.get(url).status_code, 202)
+        self.assertEqual(Job.objects.count(), 1)
+
+        with mock.patch("tracker.fx.fetch_rate", side_effect=RuntimeError("Missing rate for XYZ")), \
+                self.assertLogs("tracker.jobs", "WARNING"):
+            jobs.run_next("w1")
+            Job.objects.update(run_after=timezone.now())
+            self.assertEqual(jobs.run_next("w1").status, Job.FAILED)
+        r = self.client.get(url)
+        self.assertEqual((r.status_code, r.json()["source"], r.json()["rate"]), (200, "fallback", "1"))
+        self.assertIn("Missing rate for XYZ", r.json()["note"])
+        self.assertEqual(Job.objects.count(), 1)  # no new fetch on every poll
+
+        Job.objects.update(finished_at=timezone.now() - views.FX_RETRY_AFTER)
+        self.assertEqual(self.client.get(url).status_code, 202)  # worth another try by now
+        self.assertEqual(Job.objects.count(), 2)
+
+
+class WorkerMetricsTests(TestCase):
+    def write_counter(self, path, pid, value):
+        d = MmapedDict(str(path / f"counter_{pid}.db"))
+        key = mmap_key("tracker_fx_upstream", "tracker_fx_upstream_total", ["outcome"], ["ok"],
+                       "Frankfurter calls by outcome.")
+        d.write_value(key, value, 0)
+        d.close()
+
+    def test_the_worker_directory_is_merged_into_the_scrape(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        (root / "web").mkdir()
+        (root / "worker").mkdir()
+        self.write_counter(root / "web", 7, 1)
+        self.write_counter(root / "worker", 7, 2)  # same pid in another container
+        collector = metrics._MultiDirCollector([str(root / "web"), str(root / "worker")])
+        [family] = [m for m in collector.collect() if m.name == "tracker_fx_upstream"]
+        self.assertEqual([(s.labels, s.value) for s in family.samples], [({"outcome": "ok"}, 3)])
+
+
+@override_settings(EXPORTS_ACCEL_PREFIX="/protected/exports/")
+class JobEndpointTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        storage = override_settings(EXPORTS_ROOT=self.root)
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+    def test_editor_queues_export(self):
+        r = self.client.post(reverse("job-list"), {"kind": "fx.fetch"}, content_type="application/json")
+        self.assertEqual(r.status_code, 400)  # internal kinds can't be queued over HTTP
+        r = self.client.post(reverse("job-list"), {"kind": "expenses.export"}, content_type="application/json")
+        self.assertEqual(r.status_code, 201, r.content)
+        self.assertEqual(r.json()["status"], Job.QUEUED)
+        self.assertIsNone(r.json()["file_url"])
+
+    def test_public_payloads_are_checked_when_queued(self):
+        self.assertEqual(set(JOB_PAYLOADS), jobs.PUBLIC_KINDS)
+        post = lambda kind, payload: self.client.post(reverse("job-list"), {"kind": kind, "payload": payload},
+                                                      content_type="application/json")
+        for payload in ({}, {"through": "soon"}, {"through": "2025-01-10", "extra": 1}):
+            r = post("periods.close", payload)
+            self.assertEqual(r.status_code, 400, payload)
+            self.assertIn("payload", r.json())
+        self.assertEqual(post("expenses.export", {"ledger": 99}).status_code, 400)  # can't pick another ledger
+        self.assertFalse(Job.objects.exists())
+
+        r = post("periods.close", {"through": "2025-01-10"})
+        self.assertEqual(r.status_code, 201, r.content)
+        self.assertEqual(jobs.run_next("w1").status, Job.DONE)
+        r = post("periods.close", {"through": "2025-01-05"})
+        self.assertEqual(r.json()["payload"]["through"], ["Already closed through 2025-01-10."])
+
+        viewer = Client()
+        viewer.force_login(User.objects.create_user("viewer", password="pw"))
+        r = viewer.post(reverse("job-list"), {"kind": "periods.close", "payload": {"through": "2025-02-01"}},
+                        content_type="application/json")
+        self.assertEqual(r.status_code, 403)  # editors only, as for POST /api/periods/
+
+    def test_close_fails_without_retrying_once_it_cannot_succeed(self):
+        r = self.client.post(reverse("job-list"), {"kind": "periods.close", "payload": {"through": "2025-01-10"}},
+                             content_type="application/json")
+        User.objects.filter(pk=self.user.pk).update(is_staff=False)  # no longer an editor when it runs
+        with self.assertLogs("tracker.jobs", "WARNING"):
+            job = jobs.run_next("w1")
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 1))
+        self.assertIn("Only editors", job.last_error)
+
+    def test_export_is_only_served_to_its_owner_in_its_ledger(self):
+        r = self.client.post(reverse("job-list"), {"kind": "expenses.export"}, content_type="application/json")
+        job = jobs.run_next("w1")
+        self.assertEqual(job.status, Job.DONE)
+        name = job.result["file"]
+        self.assertTrue((self.root / name).exists())
+
+        url = self.client.get(reverse("job-detail", args=[r.json()["id"]])).json()["file_url"]
+        r = self.client.get(url)
+        self.assertEqual(r.status_code, 200, r.content)
+        self.assertEqual(r["X-Accel-Redirect"], f"/protected/exports/{name}")
+        self.assertEqual(r.content, b"")
+
+        self.assertEqual(Client().get(url).status_code, 403)     # anonymous
+        viewer = Client()
+        viewer.force_login(User.objects.create_user("viewer", password="pw"))
+        self.assertEqual(viewer.get(url).status_code, 404)       # not their job
+        Ledger.objects.create(name="Other trip", slug="other")
+        self.assertEqual(self.client.get(reverse("job-file", args=[job.pk]) + "?ledger=other").status_code, 404)
+
+        with override_settings(EXPORTS_ACCEL_PREFIX=""):
+            body = b"".join(self.client.get(url).streaming_content).decode()
+        self.assertTrue(body.startswith("id,date,description"))
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "SKIP LOCKED needs Postgres")
+class SkipLockedTests(TransactionTestCase):
+    def test_workers_never_claim_the_same_job(self):
+        first, second = jobs.enqueue("recents.flush"), jobs.enqueue("recents.flush")
+        claimed = []
+
+        def other_worker():
+            try:
+                claimed.append(jobs.claim("w2"))
+            finally:
+                connections.close_all()
+
+        with transaction.atomic():
+            Job.objects.select_for_update().get(pk=first.pk)  # worker 1 is mid-claim on `first`
+            t = threading.Thread(target=other_worker)
+            t.start()
+            t.join(timeout=10)
+        self.assertFalse(t.is_alive(), "claim blocked on a locked row")
+        self.assertEqual(claimed[0].pk, second.pk)
@@ -0,0 +1,73 @@
+# --- backend/tracker/tests/test_ledgers.py ---
+"""Ledger scoping: each trip only sees (and can only reference) its own rows, and only its members reach it."""
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import Client
+from django.urls import reverse
+
+from tracker.models import Ledger
+from .querycount import ApiTestCase, make_parties, make_expenses, make_settlements
+
+
+class LedgerScopingTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.trip = trip = Ledger.objects.create(name="Japan 2026", slug="japan")
+        trip.members.add(self.user)
+        self.j_household, self.j_bev, self.j_chris, self.j_bev_p = make_parties(trip)
+        make_expenses(3, [self.chris, self.bev_p])
+        make_expenses(5, [self.j_chris, self.j_bev_p])
+        make_settlements(2, self.j_household, self.j_bev)
+
+    def test_default_ledger_when_none_requested(self):
+        self.assertEqual(len(self.client.get(reverse("expense-list")).json()), 3)
+        self.assertEqual(len(self.client.get(reverse("settlement-list")).json()), 0)
+
+    def test_query_param_and_header_select_the_ledger(self):
+        self.assertEqual(len(self.client.get(reverse("expense-list") + "?ledger=japan").json()), 5)
+        r = self.client.get(reverse("bootstrap"), HTTP_X_LEDGER="japan")
+        self.assertEqual(r.json()["ledger"]["slug"], "japan")
+        self.assertEqual(len(r.json()["expenses"]["results"]), 5)
+        self.assertEqual({p["id"] for p in r.json()["people"]}, {self.j_chris.pk, self.j_bev_p.pk})
+        self.assertEqual(self.client.get(reverse("expense-list") + "?ledger=nope").status_code, 404)
+
+    def test_summary_is_per_ledger(self):
+        default = self.client.get(reverse("summary")).json()
+        japan = self.client.get(reverse("summary") + "?ledger=japan").json()
+        self.assertEqual(Decimal(str(default["settlements_bev_to_household"])), 0)
+        self.assertEqual(Decimal(str(japan["settlements_bev_to_household"])), Decimal("20.00"))
+
+    def test_other_ledgers_rows_are_invisible_and_unusable(self):
+        japan_expense = self.client.get(reverse("expense-list") + "?ledger=japan").json()[0]
+        self.assertEqual(self.client.get(reverse("expense-detail", args=[japan_expense["id"]])).status_code, 404)
+        r = self.client.post(reverse("expense-list"), {
+            "date": "2025-02-01", "description": "x", "currency": "CAD", "amount": "1.00",
+            "paid_by": self.j_chris.pk,
+        }, content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("paid_by", r.json())
+
+    def test_only_members_reach_a_ledger(self):
+        outsider = User.objects.create_user("outsider", password="pw", is_staff=True)
+        self.trip.members.add(outsider)
+        client = Client()
+        client.force_login(outsider)
+        self.assertEqual([l["slug"] for l in client.get(reverse("ledger-list")).json()], ["japan"])
+        self.assertEqual(len(client.get(reverse("expense-list")).json()), 5)  # their oldest ledger is japan
+        for slug in ("default", "nope"):  # someone else's ledger looks like a missing one
+            r = client.get(reverse("expense-list"), HTTP_X_LEDGER=slug)
+            self.assertEqual((r.status_code, r.json()["detail"]), (404, f"No ledger {slug!r}."))
+        self.assertEqual(client.get(reverse("summary") + "?ledger=default").status_code, 404)
+        r = client.post(reverse("expense-list") + "?ledger=default", {
+            "date": "2025-02-01", "description": "x", "currency": "CAD", "amount": "1.00", "paid_by": self.chris.pk,
+        }, content_type="application/json")
+        self.assertEqual(r.status_code, 404)
+
+        self.trip.members.remove(outsider)  # the cached lookup goes with it
+        self.assertEqual(client.get(reverse("expense-list") + "?ledger=japan").status_code, 404)
+
+    def test_creator_joins_a_new_ledger(self):
+        r = self.client.post(reverse("ledger-list"), {"name": "Peru", "slug": "peru"}, content_type="application/json")
+        self.assertEqual(r.status_code, 201, r.content)
+        self.assertEqual(self.client.get(reverse("expense-list") + "?ledger=peru").status_code, 200)
@@ -0,0 +1,78 @@
+# --- backend/tracker/tests/test_live.py ---
+"""Live updates: NOTIFY on commit, one LISTEN per process, events with fresh summary totals."""
+import asyncio
+import json
+import unittest
+from datetime import date
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from tracker import live
+from tracker.models import Expense
+from .querycount import ApiTestCase, make_parties, make_expenses
+
+
+def _event(chunk):
+    return json.loads(chunk.split("data: ", 1)[1])
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "LISTEN/NOTIFY needs Postgres")
+class LiveEventTests(TransactionTestCase):
+    def setUp(self):
+        self.household, self.bev, self.chris, self.bev_p = make_parties()
+        make_expenses(3, [self.chris, self.bev_p])
+        self.ledger_id = self.household.ledger_id
+
+    async def next_event(self, events, timeout=5):
+        chunk = await asyncio.wait_for(anext(events), timeout)
+        while chunk.startswith(":"):  # keepalive
+            chunk = await asyncio.wait_for(anext(events), timeout)
+        return _event(chunk)
+
+    async def test_changes_stream_with_summary(self):
+        events = live.stream(self.ledger_id)
+        try:
+            ready = await self.next_event(events)
+            self.assertEqual((ready["type"], ready["ledger"]), ("ready", self.ledger_id))
+
+            def add():
+                return Expense.objects.create(ledger_id=self.ledger_id, date=date(2025, 2, 1), description="Taxi",
+                                              currency="CAD", amount_minor=3000, paid_by=self.chris)
+            expense = await sync_to_async(add)()
+            event = await self.next_event(events)
+            self.assertEqual((event["type"], event["id"]), ("expense.created", expense.pk))
+            self.assertGreater(event["summary"]["bev_owes_from_expenses"], ready["summary"]["bev_owes_from_expenses"])
+
+            def rolled_back():
+                with transaction.atomic():
+                    Expense.objects.filter(pk=expense.pk).get().delete()
+                    transaction.set_rollback(True)
+            await sync_to_async(rolled_back)()
+            with self.assertRaises(asyncio.TimeoutError):  # nothing committed, nothing sent
+                await self.next_event(events, timeout=0.5)
+        finally:
+            await events.aclose()
+        self.assertEqual(dict(live.hub.queues), {})
+        self.assertIsNone(live.hub.task)  # last client gone: LISTEN connection released
+
+
+class BatchTests(ApiTestCase):
+    def test_import_sends_one_event_and_one_version_bump(self):
+        row = {"date": "2025-03-10", "description": "Taxi", "category": "transport", "currency": "CAD",
+               "amount": "12.00", "paid_by": self.chris.pk}
+        ledger_id = self.household.ledger_id
+        with mock.patch("tracker.live.notify") as notify, mock.patch("tracker.versions.bump") as bump, \
+                self.captureOnCommitCallbacks(execute=True):
+            r = self.client.post(reverse("expense-import"), [row] * 20, content_type="application/json")
+        self.assertEqual(r.status_code, 201, r.content)
+        notify.assert_called_once_with(ledger_id, "ledger.changed")
+        bump.assert_called_once_with(ledger_id)
+        self.assertFalse(live.batching(ledger_id))
+
+        with mock.patch("tracker.live.notify") as notify, self.captureOnCommitCallbacks(execute=True):
+            r = self.client.post(reverse("expense-list"), row, content_type="application/json")
+        notify.assert_called_once_with(ledger_id, "expense.created", r.json()["id"])  # single writes still do
@@ -0,0 +1,113 @@
+# --- backend/tracker/tests/test_money.py ---
+"""Integer minor-unit money: the helpers, and the API still speaking decimals."""
+import random
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from tracker import duplicates, money
+from tracker.models import Expense
+from .querycount import ApiTestCase
+
+CENT = Decimal("0.01")
+
+
+class MoneyTests(SimpleTestCase):
+    def test_exponents_and_conversion(self):
+        self.assertEqual([money.exponent(c) for c in ("THB", "JPY", "KWD", "XYZ")], [2, 0, 3, 2])
+        self.assertEqual(money.to_minor(Decimal("12.5"), 2), 1250)
+        self.assertEqual(money.to_minor("1500", 0), 1500)
+        with self.assertRaises(ValueError):
+            money.to_minor(Decimal("1500.50"), 0)
+        self.assertEqual([money.fmt(v, p) for v, p in ((1250, 2), (-5, 2), (1500, 0), (4_000_000, 8))],
+                         ["12.50", "-0.05", "1500", "0.04000000"])
+
+    def test_amount_format_per_exponent(self):
+        # the wire format of `amount`: never fewer than 2 decimals, as before minor units
+        cases = {0: (1500, "1500.00"), 2: (1250, "12.50"), 3: (12345, "12.345"), 4: (1234, "0.1234")}
+        self.assertEqual({exp: money.fmt_amount(minor, exp) for exp, (minor, _) in cases.items()},
+                         {exp: text for exp, (_, text) in cases.items()})
+        self.assertEqual(money.fmt_amount(-5, 0), "-5.00")
+
+    def test_cents_and_shares_match_decimal_rounding(self):
+        rng = random.Random(7)
+        for _ in range(2000):
+            places = rng.choice([0, 2, 3])
+            minor, fx = rng.randint(1, 10 ** 7), rng.randint(1, 2 * 10 ** 8)
+            w_h, w_b = rng.choice([(1, 1), (2, 1), (1, 0), (0, 1), (3, 1), (0, 0)])
+            total = (money.to_decimal(minor, places) * money.to_decimal(fx, 8)).quantize(CENT, ROUND_HALF_UP)
+            denom = Decimal(w_h + w_b) or Decimal(1)
+            shares = ((total * (Decimal(w_h) / denom)).quantize(CENT, ROUND_HALF_UP),
+                      (total * (Decimal(w_b) / denom)).quantize(CENT, ROUND_HALF_UP))
+            cents = money.cad_cents(minor, places, fx)
+            self.assertEqual(money.to_decimal(cents, 2), total)
+            self.assertEqual(tuple(money.to_decimal(s, 2) for s in money.split(cents, w_h, w_b)), shares)
+
+
+class ExpenseAmountApiTests(ApiTestCase):
+    def post(self, **fields):
+        body = {"date": "2025-02-01", "description": "Dinner", "currency": "THB",
+                "amount": "350.25", "fx_to_cad": "0.0412", "paid_by": self.chris.pk, **fields}
+        return self.client.post(reverse("expense-list"), body, content_type="application/json")
+
+    def test_round_trip(self):
+        r = self.post(weight_household=2, weight_bev=1)
+        self.assertEqual(r.status_code, 201, r.content)
+        body = r.json()
+        self.assertEqual((body["amount"], body["fx_to_cad"]), ("350.25", "0.04120000"))
+        self.assertEqual((body["amount_cad"], body["share_household_cad"], body["share_bev_cad"]), (14.43, 9.62, 4.81))
+        e = Expense.objects.get()
+        self.assertEqual((e.amount_minor, e.amount_exponent, e.fx_to_cad_e8), (35025, 2, 4_120_000))
+
+    def test_serialized_amount_per_exponent(self):
+        """Zero-decimal currencies keep the two-decimal format clients had before amounts moved to minor units."""
+        for currency, amount, shown in (("VND", "25000", "25000.00"), ("IDR", "15000", "15000.00"),
+                                        ("JPY", "800", "800.00"), ("THB", "350.5", "350.50"),
+                                        ("BHD", "1.2", "1.200"), ("CLF", "0.5", "0.5000")):
+            r = self.post(currency=currency, amount=amount)
+            self.assertEqual((r.status_code, r.json()["amount"]), (201, shown), currency)
+            listed = self.client.get(reverse("expense-detail", args=[r.json()["id"]])).json()
+            self.assertEqual(listed["amount"], shown, currency)
+
+    def test_currency_exponents(self):
+        self.assertEqual(self.post(currency="JPY", amount="1500.50").status_code, 400)
+        r = self.post(currency="jpy", amount="1500")
+        self.assertEqual((r.status_code, r.json()["amount"]), (201, "1500.00"))
+        self.assertEqual(self.post(currency="KWD", amount="12.345").json()["amount"], "12.345")
+
+        # changing the currency alone re-scales the stored amount
+        url = reverse("expense-detail", args=[r.json()["id"]])
+        r = self.client.patch(url, {"currency": "THB"}, content_type="application/json")
+        self.assertEqual((r.status_code, r.json()["amount"]), (200, "1500.00"))
+        self.assertEqual(Expense.objects.get(pk=r.json()["id"]).amount_minor, 150000)
+
+
+class ExpenseAdminTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_superuser = True
+        self.user.save()
+
+    def form(self, **fields):
+        return {"ledger": self.ledger.pk, "date": "2025-02-01", "description": "Dinner", "category": "food",
+                "currency": "JPY", "amount": "1500", "fx_to_cad": "0.0092", "paid_by": self.chris.pk,
+                "weight_household": 1, "weight_bev": 1, "notes": "", **fields}
+
+    def test_add_and_fix_an_amount_in_decimals(self):
+        r = self.client.post(reverse("admin:tracker_expense_add"), self.form(amount="1500.5"))
+        self.assertEqual(r.status_code, 200)  # form redisplayed with the error
+        self.assertContains(r, "JPY amounts have at most 0 decimal places.")
+
+        r = self.client.post(reverse("admin:tracker_expense_add"), self.form(currency="jpy"))
+        self.assertEqual(r.status_code, 302)
+        e = Expense.objects.get()
+        self.assertEqual((e.currency, e.amount_minor, e.amount_exponent, e.fx_to_cad_e8), ("JPY", 1500, 0, 920_000))
+
+        url = reverse("admin:tracker_expense_change", args=[e.pk])
+        self.assertContains(self.client.get(url), 'value="1500"')
+        r = self.client.post(url, self.form(currency="THB", amount="12.34", fx_to_cad="0.04"))
+        self.assertEqual(r.status_code, 302)
+        e.refresh_from_db()
+        self.assertEqual((e.amount_minor, e.amount_exponent, e.fx_to_cad_e8), (1234, 2, 4_000_000))
+        self.assertEqual(e.fingerprint, duplicates.of(e))
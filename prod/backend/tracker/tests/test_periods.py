@@ -0,0 +1,133 @@
+# --- backend/tracker/tests/test_periods.py ---
+"""Closed-period snapshots: summary = snapshot + open delta, and closed rows are read-only."""
+from datetime import date
+from decimal import Decimal
+
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.urls import reverse
+
+from tracker import balances
+from tracker.models import Expense, PeriodClose, Settlement
+from .querycount import ApiTestCase, make_expenses, make_settlements
+
+
+class PeriodCloseTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        make_expenses(20, [self.chris, self.bev_p])           # 2025-01-01 .. 2025-01-20
+        make_settlements(10, self.household, self.bev)        # 2025-01-01 .. 2025-01-10
+
+    def summary(self):
+        r = self.client.get(reverse("summary"))
+        self.assertEqual(r.status_code, 200, r.content)
+        return r.json()
+
+    def close(self, through):
+        return self.client.post(reverse("period-list"), {"through": through}, content_type="application/json")
+
+    def test_summary_unchanged_by_closing(self):
+        before = self.summary()
+        self.assertEqual(self.close("2025-01-05").status_code, 201)
+        self.assertEqual(self.close("2025-01-12").status_code, 201)  # builds on the first snapshot
+        after = self.summary()
+        self.assertEqual(after.pop("closed_through"), "2025-01-12")
+        before.pop("closed_through")
+        for key, value in before.items():
+            # snapshots keep 8 decimal places
+            self.assertAlmostEqual(Decimal(after[key]), Decimal(value), places=6, msg=key)
+
+    def test_summary_only_aggregates_open_rows(self):
+        self.close("2025-01-12")
+        self.summary()  # refills the latest-close cache
+        with self.assertQueries(3, label="summary after close") as contexts:
+            self.summary()
+        aggregates = [q["sql"] for ctx in contexts for q in ctx.captured_queries if "SUM(" in q["sql"].upper()]
+        self.assertEqual(len(aggregates), 2)
+        self.assertTrue(all("2025-01-12" in sql for sql in aggregates), aggregates)
+
+    def test_category_totals(self):
+        self.close("2025-01-20")
+        snap = balances.latest_close(self.household.ledger_id)
+        total = sum(e.amount * e.fx_to_cad for e in Expense.objects.all())
+        self.assertEqual(Decimal(snap.category_totals["food"]), total)
+
+    def test_closed_rows_are_read_only(self):
+        self.close("2025-01-10")
+        old = Expense.objects.get(date=date(2025, 1, 3))
+        new = Expense.objects.get(date=date(2025, 1, 15))
+        detail = lambda e: reverse("expense-detail", args=[e.pk])
+
+        self.assertEqual(self.client.patch(detail(old), {"notes": "x"}, content_type="application/json").status_code, 400)
+        self.assertEqual(self.client.delete(detail(old)).status_code, 400)
+        # moving an open expense into the closed period is rejected too
+        r = self.client.patch(detail(new), {"date": "2025-01-02"}, content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(self.client.patch(detail(new), {"notes": "x"}, content_type="application/json").status_code, 200)
+        settlement = Settlement.objects.filter(date__lte=date(2025, 1, 10)).first()
+        self.assertEqual(self.client.delete(reverse("settlement-detail", args=[settlement.pk])).status_code, 400)
+
+    def test_close_made_by_another_process_guards_writes_at_once(self):
+        self.summary()  # this process caches "nothing closed"
+        # as the worker's periods.close job does: this process's cache never hears of it
+        PeriodClose.objects.bulk_create([PeriodClose(ledger_id=self.household.ledger_id, through=date(2025, 1, 10))])
+        self.assertIsNone(balances.latest_close(self.household.ledger_id))  # stale for reads, for a while
+        old = Expense.objects.get(date=date(2025, 1, 3))
+        r = self.client.patch(reverse("expense-detail", args=[old.pk]), {"notes": "x"}, content_type="application/json")
+        self.assertEqual(r.status_code, 400, r.content)
+
+    def test_reopen_latest_only(self):
+        first = self.close("2025-01-05").json()
+        latest = self.close("2025-01-10").json()
+        self.assertEqual(self.close("2025-01-08").status_code, 400)
+        self.assertEqual(self.client.delete(reverse("period-detail", args=[first["id"]])).status_code, 400)
+        self.assertEqual(self.client.delete(reverse("period-detail", args=[latest["id"]])).status_code, 204)
+        self.assertEqual(self.summary()["closed_through"], "2025-01-05")
+        old = Expense.objects.get(date=date(2025, 1, 8))
+        r = self.client.patch(reverse("expense-detail", args=[old.pk]), {"notes": "x"}, content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+
+
+class AdminClosedPeriodTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_superuser = True
+        self.user.save()
+        make_expenses(20, [self.chris, self.bev_p])           # 2025-01-01 .. 2025-01-20
+        self.client.get(reverse("summary"))  # this process caches "nothing closed"
+        # closed by the worker: this process's cache never hears of it
+        PeriodClose.objects.bulk_create([PeriodClose(ledger_id=self.ledger.pk, through=date(2025, 1, 10))])
+
+    def form(self, e, **fields):
+        return {"ledger": e.ledger_id, "date": e.date.isoformat(), "description": e.description,
+                "category": e.category, "currency": e.currency, "amount": str(e.amount),
+                "fx_to_cad": str(e.fx_to_cad), "paid_by": e.paid_by_id, "weight_household": e.weight_household,
+                "weight_bev": e.weight_bev, "notes": e.notes, **fields}
+
+    def test_an_open_row_cannot_be_moved_into_the_closed_period(self):
+        new = Expense.objects.get(date=date(2025, 1, 15))
+        url = reverse("admin:tracker_expense_change", args=[new.pk])
+        r = self.client.post(url, self.form(new, date="2025-01-02"))
+        self.assertContains(r, "Closed through 2025-01-10")
+        self.assertEqual(Expense.objects.get(pk=new.pk).date, date(2025, 1, 15))
+        self.assertEqual(self.client.post(url, self.form(new, notes="x")).status_code, 302)
+
+    def test_closed_rows_are_read_only_at_once(self):
+        old = Expense.objects.get(date=date(2025, 1, 3))
+        r = self.client.post(reverse("admin:tracker_expense_change", args=[old.pk]), self.form(old, notes="x"))
+        self.assertEqual(r.status_code, 403)
+        self.assertEqual(self.client.post(reverse("admin:tracker_expense_delete", args=[old.pk]),
+                                          {"post": "yes"}).status_code, 403)
+        self.assertTrue(Expense.objects.filter(pk=old.pk).exists())
+
+    def test_bulk_delete_refuses_closed_rows(self):
+        ids = list(Expense.objects.filter(date__range=(date(2025, 1, 9), date(2025, 1, 12)))
+                   .values_list("pk", flat=True))
+        r = self.client.post(reverse("admin:tracker_expense_changelist"),
+                             {"action": "delete_selected", "_selected_action": ids, "post": "yes"})
+        self.assertEqual(r.status_code, 403)
+        self.assertEqual(Expense.objects.filter(pk__in=ids).count(), 4)
+
+        with self.assertRaises(PermissionDenied):  # even when the confirmation page was passed
+            admin.site.get_model_admin(Expense).delete_queryset(None, Expense.objects.filter(pk__in=ids))
+        self.assertEqual(Expense.objects.filter(pk__in=ids).count(), 4)
@@ -0,0 +1,194 @@
+# --- backend/tracker/tests/test_query_counts.py ---
+"""
+Pinned query counts for every endpoint in tracker/urls.py.
+
+Each list-shaped endpoint is measured at several data sizes: the count must be
+the pinned number at every size (no per-row queries). Counts are for a warm
+request: the session and user are already cached, as in production.
+"""
+import json
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tracker import urls as tracker_urls
+from tracker.models import Expense, FxRate, Job, PeriodClose, Settlement
+from tracker.serializers import ExpenseSerializer
+from .querycount import ApiTestCase, make_expenses, make_settlements, repeated_shapes
+
+SIZES = (1, 5, 25)
+
+# url name -> queries for a warm GET (or the noted method)
+BUDGET = {
+    "api-root": 0,
+    "ledger-list": 1,
+    "ledger-detail": 1,
+    "party-list": 1,
+    "party-detail": 1,
+    "person-list": 1,
+    "person-detail": 1,
+    "expense-list": 1,
+    "expense-detail": 1,
+    "expense-import": 0,       # POST only
+    "settlement-list": 1,
+    "settlement-detail": 1,
+    "period-list": 1,
+    "period-detail": 1,
+    "job-list": 1,
+    "job-detail": 1,
+    "job-file": 1,             # nginx sends the CSV (X-Accel-Redirect)
+    "receipt-list": 1,
+    "receipt-detail": 1,
+    "receipt-file": 1,         # nginx sends the bytes (X-Accel-Redirect)
+    "receipt-thumbnail": 1,
+    "upload-list": 0,          # POST only
+    "upload-detail": 1,
+    "budget-list": 1,          # status from the running totals, no aggregate
+    "budget-detail": 1,
+    "fx-rate": 1,              # FxRate cache hit
+    "recent-currencies": 0,    # served from the recents cache
+    "csrf": 0,
+    "whoami": 0,
+    "summary": 3,
+    "bootstrap": 7,            # + budget status
+    "report-totals": 2,        # FX matrix warm: + its COUNT/MAX(updated_at) freshness check
+    "report-categories": 1,    # Postgres only; 0 once cached for the data version
+    "report-anomalies": 0,     # cached for the data version; 2 to compute (arrays + descriptions)
+    "events": 0,               # WSGI stub (501); the ASGI stream holds no per-client queries
+    "db-pool": 0,
+    "metrics": 0,
+    "auth-login": 9,           # POST; includes the session save savepoints
+    "auth-logout": 3,          # POST
+}
+
+
+class QueryCountTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        # warm the session/user, recent-currency and latest-close caches
+        self.client.get(reverse("whoami"))
+        self.client.get(reverse("recent-currencies"))
+        self.client.get(reverse("summary"))
+
+    def get(self, name, expected, *args, query=""):
+        url = reverse(name, args=args) + query
+        with self.assertQueries(expected, label=f"GET {url}"):
+            r = self.client.get(url)
+        self.assertEqual(r.status_code, 200, r.content)
+        return r
+
+    def test_every_endpoint_has_a_budget(self):
+        names = {p.name for p in tracker_urls.router.urls if p.name}
+        names |= {p.name for p in tracker_urls.urlpatterns if getattr(p, "name", None)}
+        self.assertEqual(sorted(names - BUDGET.keys()), [], "add the new endpoint to BUDGET")
+
+    def test_list_endpoints_at_several_sizes(self):
+        created = 0
+        for size in SIZES:
+            make_expenses(size - created, [self.chris, self.bev_p], start=created)
+            make_settlements(size - created, self.household, self.bev, start=created)
+            created = size
+            with self.subTest(size=size):
+                r = self.get("expense-list", BUDGET["expense-list"])
+                self.assertEqual(len(r.json()), size)
+                self.get("expense-list", BUDGET["expense-list"] + 1, query="?limit=10")  # + COUNT
+                self.get("settlement-list", BUDGET["settlement-list"])
+                self.get("summary", BUDGET["summary"])
+                self.get("bootstrap", BUDGET["bootstrap"])
+                self.get("person-list", BUDGET["person-list"])
+                self.get("party-list", BUDGET["party-list"])
+                self.get("period-list", BUDGET["period-list"])
+                self.get("budget-list", BUDGET["budget-list"])
+
+    def test_detail_endpoints(self):
+        make_expenses(1, [self.chris])
+        make_settlements(1, self.household, self.bev)
+        self.get("expense-detail", BUDGET["expense-detail"], Expense.objects.get().pk)
+        self.get("settlement-detail", BUDGET["settlement-detail"], Settlement.objects.get().pk)
+        self.get("person-detail", BUDGET["person-detail"], self.chris.pk)
+        self.get("party-detail", BUDGET["party-detail"], self.bev.pk)
+        self.get("ledger-detail", BUDGET["ledger-detail"], self.bev.ledger_id)
+        job = Job.objects.create(kind="recents.flush", created_by=self.user)
+        self.get("job-detail", BUDGET["job-detail"], job.pk)
+        close = PeriodClose.objects.create(ledger=self.household.ledger, through=date(2024, 12, 31))
+        self.get("period-detail", BUDGET["period-detail"], close.pk)
+
+    def test_small_endpoints(self):
+        FxRate.objects.create(date=date(2025, 1, 1), base="THB", quote="CAD", rate=Decimal("0.04"))
+        self.get("fx-rate", BUDGET["fx-rate"], query="?date=2025-01-01&base=THB&quote=CAD")
+        self.client.get(reverse("report-totals") + "?currency=THB")  # load the FX matrix
+        self.get("report-totals", BUDGET["report-totals"], query="?currency=THB")
+        self.get("recent-currencies", BUDGET["recent-currencies"])
+        for name in ("api-root", "ledger-list", "job-list", "csrf", "whoami", "db-pool", "metrics"):
+            self.get(name, BUDGET[name])
+
+    def test_auth_endpoints(self):
+        anon = Client()
+        with self.assertQueries(BUDGET["auth-login"], label="POST auth-login"):
+            r = anon.post(reverse("auth-login"), {"username": "editor", "password": "pw"},
+                          content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+        with self.assertQueries(BUDGET["auth-logout"], label="POST auth-logout"):
+            anon.post(reverse("auth-logout"))
+
+    def test_serializer_needs_select_related(self):
+        """The harness flags paid_by__party lookups once select_related is dropped."""
+        make_expenses(5, [self.chris, self.bev_p])
+        with CaptureQueriesContext(connection) as ctx:
+            ExpenseSerializer(Expense.objects.all(), many=True).data
+        self.assertTrue(repeated_shapes(ctx.captured_queries), "N+1 not detected")
+
+        with self.assertQueries(1, label="serializer with select_related"):
+            ExpenseSerializer(Expense.objects.select_related("paid_by", "paid_by__party"), many=True).data
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "EXPLAIN check needs Postgres")
+class SeqScanTests(ApiTestCase):
+    """
+    Replays the hot read queries under EXPLAIN with enable_seqscan=off: a Seq
+    Scan that survives that setting means no index can serve the query. The
+    summary aggregates are excluded; they read every row by design.
+    """
+    BIG_TABLES = ("tracker_expense", "tracker_settlement", "tracker_fxrate", "tracker_userrecentcurrency")
+
+    def setUp(self):
+        super().setUp()
+        make_expenses(200, [self.chris, self.bev_p])
+        make_settlements(50, self.household, self.bev)
+        FxRate.objects.create(date=date(2025, 1, 1), base="THB", quote="CAD", rate=Decimal("0.04"))
+
+    def _seq_scans(self, plan):
+        found = []
+        if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in self.BIG_TABLES:
+            found.append(plan["Relation Name"])
+        for child in plan.get("Plans", []):
+            found += self._seq_scans(child)
+        return found
+
+    def test_hot_reads_use_indexes(self):
+        urls = [
+            reverse("expense-list") + "?limit=50",
+            reverse("expense-detail", args=[Expense.objects.first().pk]),
+            reverse("settlement-list") + "?limit=50",
+            reverse("fx-rate") + "?date=2025-01-01&base=THB&quote=CAD",
+            reverse("recent-currencies"),
+        ]
+        for url in urls:
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(url)
+            with connection.cursor() as cur:
+                cur.execute("SET LOCAL enable_seqscan = off")
+                for q in ctx.captured_queries:
+                    sql = q["sql"]
+                    if not sql.lstrip().upper().startswith("SELECT") or "COUNT(*)" in sql.upper():
+                        continue
+                    cur.execute("EXPLAIN (FORMAT JSON) " + sql)
+                    plan = cur.fetchone()[0]
+                    plan = json.loads(plan) if isinstance(plan, str) else plan
+                    scans = self._seq_scans(plan[0]["Plan"])
+                    self.assertEqual(scans, [], f"{url}: sequential scan on {scans}\n  {sql}")
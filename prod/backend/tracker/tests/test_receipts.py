@@ -0,0 +1,174 @@
+# --- backend/tracker/tests/test_receipts.py ---
+"""Receipt attachments: chunked resumable uploads, content-hash dedupe, thumbnails, X-Accel serving."""
+import hashlib
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from tracker import jobs, receipts
+from tracker.models import Expense, Receipt, ReceiptBlob, ReceiptUpload
+from .querycount import ApiTestCase, make_expenses
+from .test_query_counts import BUDGET
+
+CHUNK = 1000
+
+
+def png(color="red", size=(400, 300)):
+    out = io.BytesIO()
+    Image.new("RGB", size, color).save(out, "PNG")
+    return out.getvalue()
+
+
+@override_settings(RECEIPT_CHUNK_BYTES=CHUNK, RECEIPTS_ACCEL_PREFIX="/protected/receipts/")
+class ReceiptUploadTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        storage = override_settings(RECEIPTS_ROOT=self.root)
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+        make_expenses(2, [self.chris, self.bev_p])
+        self.expense, self.other = Expense.objects.order_by("id")
+
+    def parts(self):
+        return list((self.root / "uploads").glob("*.part"))
+
+    def start(self, data, expense=None, sha256=True, status=201):
+        body = {"expense": (expense or self.expense).pk, "filename": "receipt.png", "size": len(data)}
+        if sha256:
+            body["sha256"] = hashlib.sha256(data).hexdigest()
+        r = self.client.post(reverse("upload-list"), body, content_type="application/json")
+        self.assertEqual(r.status_code, status, r.content)
+        return r.json()
+
+    def patch(self, upload_id, offset, chunk):
+        return self.client.patch(reverse("upload-detail", args=[upload_id]), chunk,
+                                 content_type="application/offset+octet-stream", HTTP_UPLOAD_OFFSET=str(offset))
+
+    def upload(self, data, expense=None, sha256=True):
+        state = self.start(data, expense, sha256)
+        while not state["complete"]:
+            r = self.patch(state["id"], state["offset"], data[state["offset"]:state["offset"] + state["chunk_size"]])
+            self.assertEqual(r.status_code, 200, r.content)
+            state = r.json()
+        return state["receipt"]
+
+    def test_chunked_upload_stores_the_file_by_hash_and_thumbnails_it(self):
+        data = png()
+        self.assertGreater(len(data), CHUNK)  # really several chunks
+        receipt = self.upload(data)
+
+        sha256 = hashlib.sha256(data).hexdigest()
+        self.assertEqual((receipt["sha256"], receipt["size"], receipt["content_type"]), (sha256, len(data), "image/png"))
+        self.assertEqual(receipts.blob_path(sha256).read_bytes(), data)
+        self.assertFalse(ReceiptUpload.objects.exists())
+        self.assertEqual(self.parts(), [])
+        self.assertIsNone(receipt["thumbnail_url"])
+
+        job = jobs.claim("test")  # the cleanup job queued alongside is not due yet
+        self.assertEqual(job.kind, "receipts.thumbnail")
+        self.assertEqual(jobs.run(job).result, {"thumbnail": True})
+        with Image.open(receipts.thumb_path(sha256)) as thumb:
+            self.assertEqual(max(thumb.size), receipts.THUMB_PX)
+
+        r = self.client.get(reverse("receipt-thumbnail", args=[receipt["id"]]))
+        self.assertEqual(r["X-Accel-Redirect"], f"/protected/receipts/thumbs/{sha256[:2]}/{sha256}.jpg")
+
+    def test_interrupted_upload_resumes_from_the_server_offset(self):
+        data = png("blue")
+        state = self.start(data)
+        self.assertEqual(self.patch(state["id"], 0, data[:CHUNK]).status_code, 200)
+
+        r = self.patch(state["id"], 0, data[:CHUNK])  # retried chunk whose response was lost
+        self.assertEqual(r.status_code, 409)
+        self.assertEqual(r.json()["offset"], CHUNK)
+
+        offset = self.client.get(reverse("upload-detail", args=[state["id"]])).json()["offset"]
+        while offset < len(data):
+            r = self.patch(state["id"], offset, data[offset:offset + CHUNK])
+            offset = r.json()["offset"]
+        self.assertTrue(r.json()["complete"])
+        self.assertEqual(receipts.blob_path(hashlib.sha256(data).hexdigest()).read_bytes(), data)
+
+    def test_same_bytes_are_stored_once(self):
+        data = png("green")
+        first = self.upload(data)
+        # a known hash in this ledger: no bytes need sending
+        state = self.start(data, expense=self.other)
+        self.assertTrue(state["complete"])
+        self.assertIsNone(state["id"])
+        # without the hash, the bytes are sent but still land on the same blob
+        again = self.upload(data, expense=self.other, sha256=False)
+        self.assertEqual(again["id"], state["receipt"]["id"])     # already attached to that expense
+        self.assertEqual(ReceiptBlob.objects.count(), 1)
+        self.assertEqual(Receipt.objects.filter(blob__sha256=first["sha256"]).count(), 2)
+
+    def test_rejects_files_that_are_not_receipts_or_do_not_match(self):
+        state = self.start(b"<html>not a receipt</html>")
+        r = self.patch(state["id"], 0, b"<html>not a receipt</html>")
+        self.assertEqual(r.status_code, 400)
+
+        data = png("white")
+        state = self.client.post(reverse("upload-list"), {
+            "expense": self.expense.pk, "filename": "r.png", "size": len(data), "sha256": "0" * 64,
+        }, content_type="application/json").json()
+        offset = 0
+        while offset < len(data):
+            r = self.patch(state["id"], offset, data[offset:offset + CHUNK])
+            offset += CHUNK
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("sha256", r.json()["detail"])
+        self.assertFalse(ReceiptBlob.objects.exists())
+
+        self.assertEqual(self.patch(state["id"], 0, b"x" * (CHUNK + 1)).status_code, 404)   # gone
+        big = self.start(b"x" * 10)
+        self.assertEqual(self.patch(big["id"], 0, b"x" * (CHUNK + 1)).status_code, 400)
+
+    def test_file_is_handed_to_nginx(self):
+        data = png("black")
+        receipt = self.upload(data)
+        r = self.client.get(receipt["url"])
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["X-Accel-Redirect"], f"/protected/receipts/blobs/{receipt['sha256'][:2]}/{receipt['sha256']}")
+        self.assertEqual(r["Content-Type"], "image/png")
+        self.assertEqual(r.content, b"")
+
+        with override_settings(RECEIPTS_ACCEL_PREFIX=""):
+            r = self.client.get(receipt["url"])
+            self.assertEqual(b"".join(r.streaming_content), data)
+
+    def test_deleting_the_expense_drops_its_receipts_and_cleanup_the_files(self):
+        receipt = self.upload(png("yellow"))
+        stale = self.start(png("purple"))
+        self.expense.delete()
+        self.assertFalse(Receipt.objects.exists())
+
+        later = timezone.now() + timedelta(days=2)
+        self.assertEqual(receipts.cleanup(now=later), {"uploads": 0, "blobs": 1})
+        self.assertFalse(receipts.blob_path(receipt["sha256"]).exists())
+        self.assertFalse(ReceiptUpload.objects.filter(pk=stale["id"]).exists())
+        self.assertEqual(self.parts(), [])
+
+    def test_query_budgets(self):
+        receipt = self.upload(png("orange"))
+        state = self.start(png("gray"))
+        checks = [
+            ("receipt-list", reverse("receipt-list") + f"?expense={self.expense.pk}"),
+            ("receipt-detail", reverse("receipt-detail", args=[receipt["id"]])),
+            ("receipt-file", receipt["url"]),
+            ("upload-detail", reverse("upload-detail", args=[state["id"]])),
+        ]
+        self.client.get(reverse("receipt-list"))  # warm the ledger cache
+        for name, url in checks:
+            with self.assertQueries(BUDGET[name], label=f"GET {url}"):
+                r = self.client.get(url)
+            self.assertEqual(r.status_code, 200, r.content)
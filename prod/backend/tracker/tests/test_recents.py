@@ -0,0 +1,83 @@
+# --- backend/tracker/tests/test_recents.py ---
+"""Recent currencies: buffered picks, the per-user flush job, write-through when the cache can't take a pick."""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker import jobs, recents
+from tracker.models import Job, UserRecentCurrency
+from .querycount import ApiTestCase
+
+
+@override_settings(RECENTS_WRITE_BEHIND=True)
+class RecentCurrencyTests(ApiTestCase):
+    def pick(self, code):
+        r = self.client.post(reverse("recent-currencies"), {"code": code}, content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+
+    def stored(self):
+        return list(UserRecentCurrency.objects.filter(user=self.user).order_by("-updated_at")
+                    .values_list("code", flat=True))
+
+    def run_flush(self):
+        Job.objects.filter(kind="recents.flush").update(run_after=timezone.now())
+        return jobs.run_next("w1")
+
+    def test_picks_are_buffered_and_flushed_by_one_job(self):
+        for code in ("THB", "CAD", "thb", "VND", "USD", "EUR", "JPY"):
+            self.pick(code)
+        expected = ["JPY", "EUR", "USD", "VND", "THB"]
+        self.assertEqual(self.client.get(reverse("recent-currencies")).json(), expected)
+        self.assertEqual(self.stored(), [])
+        job = Job.objects.get(kind="recents.flush")  # one per user, not per pick
+        self.assertEqual(job.payload, {"user": self.user.pk})
+        self.assertGreater(job.run_after, timezone.now())
+
+        self.assertEqual(self.run_flush().result, {"flushed": 5})
+        self.assertEqual(self.stored(), expected)
+        self.pick("CAD")  # the next pick queues the next flush
+        self.assertEqual(Job.objects.filter(kind="recents.flush", status=Job.QUEUED).count(), 1)
+
+    def test_reads_never_write(self):
+        self.pick("THB")
+        later = recents.time.time() + recents.FLUSH_INTERVAL + 1  # the pick is due for its flush
+        with mock.patch("tracker.recents.time.time", return_value=later), \
+                self.assertQueries(0, label="GET recent-currencies"):
+            self.client.get(reverse("recent-currencies"))
+        self.assertEqual(self.stored(), [])
+
+    def test_cache_failure_writes_through(self):
+        with mock.patch.object(cache, "set", side_effect=OSError("disk full")), \
+                self.assertLogs("tracker.recents", "WARNING"):
+            recents.touch(self.user.pk, "THB")
+        self.assertEqual(self.stored(), ["THB"])
+
+    def test_busy_lock_writes_through_and_the_flush_merges_it(self):
+        self.pick("THB")
+        cache.add(recents._lock_key(self.user.pk), 1, recents.LOCK_TIMEOUT)  # another request mid-update
+        self.pick("CAD")
+        self.assertEqual(self.stored(), ["CAD"])
+        cache.delete(recents._lock_key(self.user.pk))
+
+        self.run_flush()
+        self.assertEqual(self.stored(), ["CAD", "THB"])
+        self.assertEqual(self.client.get(reverse("recent-currencies")).json(), ["CAD", "THB"])
+
+    def test_evicted_cache_reloads_from_the_db(self):
+        self.pick("THB")
+        self.run_flush()
+        cache.clear()
+        self.assertEqual(self.client.get(reverse("recent-currencies")).json(), ["THB"])
+        self.pick("CAD")
+        self.assertEqual(self.client.get(reverse("recent-currencies")).json(), ["CAD", "THB"])
+
+    @override_settings(RECENTS_WRITE_BEHIND=False)
+    def test_a_per_process_cache_writes_through(self):
+        self.pick("THB")
+        self.pick("CAD")
+        self.assertEqual(self.stored(), ["CAD", "THB"])
+        self.assertFalse(Job.objects.exists())  # nothing buffered for a worker that can't see it
+        self.assertEqual(self.client.get(reverse("recent-currencies")).json(), ["CAD", "THB"])
@@ -0,0 +1,106 @@
+# --- backend/tracker/tests/test_replica_routing.py ---
+"""
+Read-replica routing. The decision tests need no second database; the
+end-to-end tests run when a "replica" alias is configured (two local
+Postgres or SQLite databases, with TEST["MIRROR"] = "default").
+"""
+import unittest
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.http import HttpResponse
+from django.core.cache import cache
+from django.test import Client, RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tracker.models import Expense
+from tracker.routers import PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware, replica_reads
+from .querycount import make_parties
+
+router = ReplicaRouter()
+
+
+@override_settings(REPLICA_DB_ALIAS="replica")
+class RoutingDecisionTests(SimpleTestCase):
+    def setUp(self):
+        self.seen = []
+
+    def call(self, view, method="get", cookies=None):
+        def handler(request):
+            return mw.process_view(request, view, (), {}) or view(request)
+        mw = ReplicaRoutingMiddleware(handler)
+        request = getattr(RequestFactory(), method)("/")
+        request.COOKIES.update(cookies or {})
+        return mw(request)
+
+    def reading_view(self, write=False):
+        def view(request):
+            self.seen.append(router.db_for_read(Expense))
+            if write:
+                router.db_for_write(Expense)
+                self.seen.append(router.db_for_read(Expense))
+            return HttpResponse()
+        return view
+
+    def test_opted_in_get_reads_from_replica(self):
+        self.call(replica_reads(self.reading_view()))
+        self.assertEqual(self.seen, ["replica"])
+
+    def test_view_not_opted_in_stays_on_primary(self):
+        self.call(self.reading_view())
+        self.assertEqual(self.seen, ["default"])
+
+    def test_unsafe_method_stays_on_primary(self):
+        self.call(replica_reads(self.reading_view()), method="post")
+        self.assertEqual(self.seen, ["default"])
+
+    def test_reads_after_a_write_stick_to_primary_and_pin_client(self):
+        response = self.call(replica_reads(self.reading_view(write=True)))
+        self.assertEqual(self.seen, ["replica", "default"])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_pinned_client_reads_from_primary(self):
+        self.call(replica_reads(self.reading_view()), cookies={PIN_COOKIE: "1"})
+        self.assertEqual(self.seen, ["default"])
+
+    def test_outside_a_request_reads_from_primary(self):
+        self.assertEqual(router.db_for_read(Expense), "default")
+
+
+@unittest.skipUnless("replica" in settings.DATABASES, "no replica alias configured")
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ReplicaEndToEndTests(TransactionTestCase):
+    # TransactionTestCase: rows must be committed for the replica connection to see them
+    databases = {"default", "replica"} if "replica" in settings.DATABASES else {"default"}
+
+    def setUp(self):
+        cache.clear()
+        _, _, self.chris, _ = make_parties()
+        self.client = Client()
+        self.client.force_login(User.objects.create_user("editor", password="pw", is_staff=True))
+
+    def _tracker_queries(self, ctx):
+        return [q["sql"] for q in ctx.captured_queries if "tracker_" in q["sql"]]
+
+    def test_list_get_hits_replica_and_write_hits_primary(self):
+        with CaptureQueriesContext(connections["replica"]) as replica, \
+                CaptureQueriesContext(connections["default"]) as primary:
+            self.client.get(reverse("expense-list"))
+        self.assertTrue(self._tracker_queries(replica))
+        self.assertFalse(self._tracker_queries(primary))
+
+        payload = {"date": date(2025, 1, 1).isoformat(), "description": "x", "currency": "THB",
+                   "amount": "10.00", "paid_by": self.chris.pk}
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            r = self.client.post(reverse("expense-list"), payload, content_type="application/json")
+        self.assertEqual(r.status_code, 201, r.content)
+        self.assertFalse(self._tracker_queries(replica))
+        self.assertIn(PIN_COOKIE, r.cookies)
+
+        # the client now carries the pin cookie: its next read uses the primary
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            self.client.get(reverse("expense-list"))
+        self.assertFalse(self._tracker_queries(replica))
@@ -0,0 +1,58 @@
+# --- backend/tracker/tests/test_reports.py ---
+"""The category report: SQL percentiles/top-N, cached under the ledger's data version."""
+import statistics
+import unittest
+from decimal import Decimal
+
+from django.db import connection
+from django.urls import reverse
+
+from tracker import money
+from tracker.models import Expense
+from .querycount import ApiTestCase, make_expenses
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "percentile_cont needs Postgres")
+class CategoryReportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        make_expenses(20, [self.chris, self.bev_p])               # food, THB 100..119 at 0.04
+        Expense.objects.filter(id__in=Expense.objects.order_by("id").values("id")[:5]).update(category="lodging")
+
+    def report(self, query=""):
+        r = self.client.get(reverse("report-categories") + query)
+        self.assertEqual(r.status_code, 200, r.content)
+        return {c["category"]: c for c in r.json()["categories"]}
+
+    def expected(self, category):
+        cad = sorted(Decimal(money.cad_cents(e.amount_minor, e.amount_exponent, e.fx_to_cad_e8)) / 100
+                     for e in Expense.objects.filter(category=category))
+        return cad
+
+    def test_stats_and_top_n(self):
+        report = self.report("?top=3")
+        self.assertEqual(list(report), ["food", "lodging"])       # biggest total first
+        food, cad = report["food"], self.expected("food")
+        self.assertEqual((food["count"], Decimal(str(food["total"]))), (15, sum(cad)))
+        self.assertAlmostEqual(food["median"], float(statistics.median(cad)), places=2)
+        self.assertAlmostEqual(food["p90"], float(statistics.quantiles(cad, n=10, method="inclusive")[-1]), places=2)
+        self.assertEqual([Decimal(str(t["amount_cad"])) for t in food["top"]], cad[::-1][:3])
+        self.assertEqual(food["top"][0]["amount"], "119.00")
+        self.assertEqual(len(report["lodging"]["top"]), 3)
+
+    def test_cached_until_the_ledger_changes(self):
+        self.report()
+        with self.assertNumQueries(0):
+            self.report()
+        e = Expense.objects.filter(category="food").order_by("date").first()
+        e.amount_minor = 1_000_000
+        with self.captureOnCommitCallbacks(execute=True):
+            e.save()
+        self.assertEqual(self.report()["food"]["top"][0]["id"], e.pk)  # write bumped the version
+        with self.assertNumQueries(0):
+            self.report()
+
+    def test_date_filters_and_bad_input(self):
+        self.assertEqual(self.report("?date_to=2025-01-05")["lodging"]["count"], 5)
+        self.assertNotIn("lodging", self.report("?date_from=2025-01-06"))
+        self.assertEqual(self.client.get(reverse("report-categories") + "?top=x").status_code, 400)
@@ -0,0 +1,89 @@
+# --- backend/tracker/tests/test_revalue.py ---
+"""Bulk FX revaluation: one UPDATE ... FROM, open rows only, fallback rows fixed."""
+import io
+import unittest
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from tracker import balances, jobs, revalue
+from tracker.models import Expense, FxRate, Job, PeriodClose
+from .querycount import ApiTestCase, make_expenses
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "UPDATE ... FROM ... RETURNING needs Postgres")
+class RevalueTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        make_expenses(10, [self.chris, self.bev_p])               # THB at 0.04, 2025-01-01 .. 2025-01-10
+        Expense.objects.filter(date__gte=date(2025, 1, 6)).update(fx_to_cad_e8=10 ** 8)  # saved at the fallback rate
+        for day in range(1, 11):
+            FxRate.objects.create(date=date(2025, 1, day), base="THB", quote="CAD", rate=Decimal("0.04"))
+
+    def rates(self):
+        return {e.date.day: e.fx_to_cad for e in Expense.objects.all()}
+
+    def test_fallback_rows_take_the_stored_rate_in_one_update(self):
+        # savepoint, update, spend totals, budgets (cold cache), notify, release + closed count + remaining pairs
+        with self.assertNumQueries(8):
+            report = revalue.revalue(revalue.select(only_fallback=True))
+        self.assertEqual([row[0] for row in report["changed"]],
+                         list(Expense.objects.filter(date__gte=date(2025, 1, 6)).order_by("date").values_list("id", flat=True)))
+        self.assertEqual(report["changed"][0][3:], (Decimal("1"), Decimal("0.04")))
+        self.assertEqual(set(self.rates().values()), {Decimal("0.04")})
+        self.assertEqual(revalue.revalue(revalue.select())["changed"], [])  # nothing left to change
+
+    def test_closed_rows_are_left_alone_and_balances_stay_consistent(self):
+        balances.close_period(self.household.ledger, date(2025, 1, 7), self.household, self.bev)
+        snap = PeriodClose.objects.get()
+        report = revalue.revalue(revalue.select(only_fallback=True))
+        self.assertEqual(len(report["changed"]), 3)                 # 2025-01-08 .. 2025-01-10
+        self.assertEqual(report["closed"], 2)                       # 2025-01-06 and 07 stay at 1
+        self.assertEqual(self.rates()[7], Decimal("1"))
+        snap.refresh_from_db()
+        fresh = balances.summary(self.household.ledger_id, self.household, self.bev)
+        self.assertEqual(fresh["closed_through"], date(2025, 1, 7))
+
+    def test_dry_run_rolls_back_and_missing_rates_are_reported(self):
+        FxRate.objects.filter(date=date(2025, 1, 10)).delete()
+        report = revalue.revalue(revalue.select(only_fallback=True), dry_run=True)
+        self.assertEqual(len(report["changed"]), 4)
+        self.assertEqual(report["missing"], [(date(2025, 1, 10), "THB")])
+        self.assertEqual(self.rates()[6], Decimal("1"))
+
+        with mock.patch("tracker.fx.fetch_rate", return_value=Decimal("0.05")) as fetch:
+            report = revalue.revalue(revalue.select(only_fallback=True), fetch=True)
+        fetch.assert_called_once_with(date(2025, 1, 10), "THB", "CAD")
+        self.assertEqual((report["fetched"], len(report["changed"]), report["missing"]), (1, 5, []))
+        self.assertEqual(self.rates()[10], Decimal("0.05"))
+
+    def test_admin_action_queues_missing_rates_instead_of_fetching(self):
+        self.user.is_superuser = True
+        self.user.save()
+        FxRate.objects.filter(date=date(2025, 1, 10)).delete()
+        ids = list(Expense.objects.values_list("pk", flat=True))
+        post = lambda: self.client.post(reverse("admin:tracker_expense_changelist"),
+                                        {"action": "revalue_fx", "_selected_action": ids}, follow=True)
+        with mock.patch("tracker.fx.fetch_rate") as fetch:
+            r = post()
+            post()  # a second run shares the pending fetch
+        fetch.assert_not_called()
+        self.assertContains(r, "Revalued 4 expense(s).")
+        self.assertContains(r, "Rates pending (fetch queued): 2025-01-10 THB.")
+        job = Job.objects.get()
+        self.assertEqual((job.kind, job.payload), ("fx.fetch", {"date": "2025-01-10", "base": "THB", "quote": "CAD"}))
+
+        with mock.patch("tracker.fx.fetch_rate", return_value=Decimal("0.05")):
+            jobs.run_next("w1")
+        self.assertContains(post(), "Revalued 1 expense(s).")
+        self.assertEqual(self.rates()[10], Decimal("0.05"))
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("revalue_expenses", "--fallback", "--currency", "thb", "--from", "2025-01-08", stdout=out)
+        self.assertIn("Revalued 3 expense(s).", out.getvalue())
+        self.assertEqual(self.rates()[6], Decimal("1"))
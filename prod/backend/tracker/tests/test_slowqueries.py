@@ -0,0 +1,104 @@
+# --- backend/tracker/tests/test_slowqueries.py ---
+"""The slow-query sampler: view tags, sampled EXPLAIN plans, and the slow_queries report."""
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tracker import slowqueries
+from .querycount import ApiTestCase, make_expenses
+
+
+@override_settings(SLOW_QUERY_EXPLAIN_RATE=1)
+class SlowQueryTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.log = self.dir / "slow.jsonl"
+        settings_override = override_settings(SLOW_QUERY_LOG=str(self.log))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        make_expenses(5, [self.chris, self.bev_p])
+
+    def entries(self):
+        return list(slowqueries.read_entries([self.log]))
+
+    @contextmanager
+    def everything_slow(self):
+        with override_settings(SLOW_QUERY_MS=0), self.assertLogs("tracker.slowqueries", "WARNING"):
+            yield
+
+    def get(self, name):
+        with self.everything_slow():
+            r = self.client.get(reverse(name))
+        self.assertEqual(r.status_code, 200, r.content)
+
+    def test_queries_are_tagged_with_their_view(self):
+        self.get("summary")
+        self.get("expense-list")
+        views = {e["view"] for e in self.entries()}
+        self.assertIn("summary", views)
+        self.assertIn("ExpenseViewSet.list", views)
+
+    def test_outside_a_request_is_background(self):
+        with self.everything_slow():
+            list(User.objects.all())
+        self.assertEqual(self.entries()[-1]["view"], slowqueries.BACKGROUND)
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "EXPLAIN (ANALYZE, BUFFERS) is Postgres syntax")
+    def test_sampled_selects_carry_a_plan_that_is_not_counted(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.get("expense-list")
+        self.assertFalse(any("EXPLAIN" in q["sql"] for q in ctx.captured_queries))
+        selects = [e for e in self.entries() if e["sql"].lstrip().startswith("SELECT")]
+        self.assertTrue(selects)
+        for e in selects:
+            self.assertIn("actual time", e["plan"])
+
+    def test_writes_are_never_explained(self):
+        with self.everything_slow():
+            r = self.client.post(reverse("settlement-list"), {
+                "date": "2025-02-01", "from_person_id": self.bev_p.pk, "to_person_id": self.chris.pk,
+                "amount_cad": "10.00",
+            })
+        self.assertEqual(r.status_code, 201, r.content)
+        inserts = [e for e in self.entries() if e["sql"].lstrip().startswith("INSERT")]
+        self.assertTrue(inserts)
+        self.assertTrue(all(e["plan"] is None for e in inserts))
+
+    def test_below_the_threshold_or_off_nothing_is_logged(self):
+        for ms in (60_000, None):
+            with override_settings(SLOW_QUERY_MS=ms):
+                self.client.get(reverse("summary"))
+        self.assertFalse(self.log.exists())
+
+    def test_report_ranks_by_total_time(self):
+        self.log.write_text("\n".join(json.dumps(e) for e in [
+            {"ts": "1", "view": "summary", "ms": 300, "sql": "SELECT a FROM t WHERE id IN (%s, %s)", "plan": None},
+            {"ts": "2", "view": "summary", "ms": 400, "sql": "SELECT a FROM t WHERE id IN (%s)", "plan": "Seq Scan on t"},
+            {"ts": "3", "view": "ExpenseViewSet.list", "ms": 600, "sql": "SELECT b FROM u", "plan": None},
+        ]) + "\n")
+        out = io.StringIO()
+        call_command("slow_queries", "--log", str(self.log), stdout=out)
+        text = out.getvalue()
+        self.assertLess(text.index("IN (%s)"), text.index("SELECT b FROM u"))   # 700 ms total beats 600
+        self.assertIn("2 call(s), total 700 ms, max 400 ms", text)
+        self.assertIn("Seq Scan on t", text)
+        self.assertIn("2 distinct statement(s)", text)
+
+        out = io.StringIO()
+        call_command("slow_queries", "--log", str(self.log), "--by", "max", "--top", "1", stdout=out)
+        self.assertIn("SELECT b FROM u", out.getvalue())
+        self.assertNotIn("IN (%s)", out.getvalue())
@@ -1,16 +1,32 @@
 # --- backend/tracker/urls.py ---
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    PartyViewSet, PersonViewSet, ExpenseViewSet, SettlementViewSet,
-    fx_rate, recent_currencies, csrf, auth_login, auth_logout, whoami, summary
+    LedgerViewSet, PartyViewSet, PersonViewSet, ExpenseViewSet, SettlementViewSet, PeriodCloseViewSet,
+    JobViewSet, ReceiptViewSet, ReceiptUploadViewSet, BudgetViewSet,
+    fx_rate, recent_currencies, csrf, auth_login, auth_logout, whoami, summary, bootstrap, db_pool,
+    report_totals, report_categories, report_anomalies, events,
 )
+from . import async_views
+from .metrics import metrics_view
+
+# Under ASGI the I/O-bound views run natively async; under WSGI they'd just be
+# wrapped in async_to_sync, so keep the DRF versions there (events answers 501).
+if settings.ASYNC_VIEWS:
+    fx_rate, summary, events = async_views.fx_rate, async_views.summary, async_views.events
 
 router = DefaultRouter()
+router.register(r'ledgers', LedgerViewSet, basename='ledger')
 router.register(r'parties', PartyViewSet, basename='party')
 router.register(r'people', PersonViewSet, basename='person')
 router.register(r'expenses', ExpenseViewSet, basename='expense')
 router.register(r'settlements', SettlementViewSet, basename='settlement')
+router.register(r'periods', PeriodCloseViewSet, basename='period')
+router.register(r'jobs', JobViewSet, basename='job')
+router.register(r'receipts', ReceiptViewSet, basename='receipt')
+router.register(r'uploads', ReceiptUploadViewSet, basename='upload')
+router.register(r'budgets', BudgetViewSet, basename='budget')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -21,4 +37,11 @@ urlpatterns = [
     path('auth/logout/', auth_logout, name='auth-logout'),
     path('whoami/', whoami, name='whoami'),
     path('summary/', summary, name='summary'),
+    path('bootstrap/', bootstrap, name='bootstrap'),
+    path('reports/totals/', report_totals, name='report-totals'),
+    path('reports/categories/', report_categories, name='report-categories'),
+    path('reports/anomalies/', report_anomalies, name='report-anomalies'),
+    path('events/', events, name='events'),
+    path('ops/db-pool/', db_pool, name='db-pool'),
+    path('metrics/', metrics_view, name='metrics'),
 ]
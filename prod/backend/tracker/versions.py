@@ -0,0 +1,52 @@
+# --- backend/tracker/versions.py ---
+"""
+Per-ledger data version, for caching results derived from a ledger's rows.
+
+Every expense or settlement write bumps its ledger's counter in the shared
+cache once the transaction commits. Anything computed from those rows can be
+cached under a key that includes the version and never needs invalidating;
+stale entries simply stop being read and expire. Bulk writes that skip model
+signals (bulk_create, queryset update), or that run inside live.batch(),
+call bump() themselves.
+
+A missing counter (cold or evicted cache) restarts from the clock, so it can't
+come back at a value that still has stale results cached under it.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import live
+from .models import Expense, Settlement
+
+
+def _key(ledger_id):
+    return f"data-version:{ledger_id}"
+
+
+def get(ledger_id):
+    version = cache.get(_key(ledger_id))
+    if version is None:
+        cache.add(_key(ledger_id), time.time_ns() // 1000, None)
+        version = cache.get(_key(ledger_id))
+    return version
+
+
+def bump(ledger_id):
+    try:
+        cache.incr(_key(ledger_id))
+    except ValueError:  # not set; the next get() starts a fresh counter
+        pass
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=Settlement)
+@receiver(post_delete, sender=Settlement)
+def _row_changed(sender, instance, **kwargs):
+    ledger_id = instance.ledger_id
+    if not live.batching(ledger_id):
+        transaction.on_commit(lambda: bump(ledger_id))
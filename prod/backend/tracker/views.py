@@ -1,53 +1,342 @@
 # --- backend/tracker/views.py ---
-from decimal import Decimal, InvalidOperation
-from datetime import date as dte
+from datetime import date as dte, timedelta
 
-from django.db import transaction
-from django.db.models import Sum, F, FloatField, DecimalField, ExpressionWrapper
+from django.conf import settings
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils import timezone
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.contrib.auth import authenticate, login as dj_login, logout as dj_logout
 
-from rest_framework import viewsets, permissions, decorators, response, status
+from rest_framework import viewsets, mixins, permissions, decorators, response, status, pagination, serializers
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
+from . import (
+    anomalies, balances, budgets, db, duplicates, fxmatrix, idempotency, jobs, ledgers, live, receipts, recents,
+    reports, versions,
+)
+from .metrics import FX_CACHE
 from .permissions import IsEditorOrReadOnly
-from .models import Party, Person, Expense, Settlement, FxRate, UserRecentCurrency
-from .serializers import PartySerializer, PersonSerializer, ExpenseSerializer, SettlementSerializer
+from .routers import replica_reads
+from .models import (
+    Ledger, Party, Person, Expense, Settlement, FxRate, PeriodClose, Job, Receipt, ReceiptUpload, Budget,
+)
+from .serializers import (
+    LedgerSerializer, PartySerializer, PersonSerializer, ExpenseSerializer, SettlementSerializer,
+    PeriodCloseSerializer, JobSerializer, ReceiptSerializer, ReceiptUploadSerializer, BudgetSerializer,
+)
 
 
 # -------------------------
 # ViewSets
 # -------------------------
-class PartyViewSet(viewsets.ModelViewSet):
+def _filter_dates(qs, params):
+    """?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD (inclusive); lets Postgres prune expense partitions."""
+    try:
+        if params.get("date_from"):
+            qs = qs.filter(date__gte=dte.fromisoformat(params["date_from"]))
+        if params.get("date_to"):
+            qs = qs.filter(date__lte=dte.fromisoformat(params["date_to"]))
+    except ValueError:
+        raise serializers.ValidationError({"detail": "Invalid date_from/date_to"})
+    return qs
+
+
+class LedgerScopedMixin:
+    """Limit the queryset to the request's ledger (X-Ledger / ?ledger=) and hand it to the serializer."""
+    def get_queryset(self):
+        return super().get_queryset().filter(ledger=ledgers.for_request(self.request))
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "ledger": ledgers.for_request(self.request)}
+
+    def perform_create(self, serializer):
+        serializer.save(ledger=ledgers.for_request(self.request))
+
+
+class IdempotentMixin:
+    """Honour an Idempotency-Key header on create/update/destroy (tracker/idempotency.py)."""
+    def create(self, request, *args, **kwargs):
+        return idempotency.run(request, lambda: super(IdempotentMixin, self).create(request, *args, **kwargs))
+
+    def update(self, request, *args, **kwargs):
+        return idempotency.run(request, lambda: super(IdempotentMixin, self).update(request, *args, **kwargs))
+
+    def destroy(self, request, *args, **kwargs):
+        return idempotency.run(request, lambda: super(IdempotentMixin, self).destroy(request, *args, **kwargs))
+
+
+class LedgerViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    replica_reads = True
+    queryset = Ledger.objects.order_by("pk")
+    serializer_class = LedgerSerializer
+    permission_classes = [IsEditorOrReadOnly]
+
+    def get_queryset(self):
+        return super().get_queryset().filter(members=self.request.user)  # as ledgers.resolve allows
+
+    def perform_create(self, serializer):
+        serializer.save().members.add(self.request.user)
+
+
+class PartyViewSet(LedgerScopedMixin, viewsets.ModelViewSet):
+    replica_reads = True
     queryset = Party.objects.all().order_by("-is_household", "name")
     serializer_class = PartySerializer
     permission_classes = [IsEditorOrReadOnly]
 
 
-class PersonViewSet(viewsets.ModelViewSet):
+class PersonViewSet(LedgerScopedMixin, viewsets.ModelViewSet):
+    replica_reads = True
     queryset = Person.objects.select_related("party").order_by("name")
     serializer_class = PersonSerializer
     permission_classes = [IsEditorOrReadOnly]
 
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+IMPORT_MAX_ROWS = 500
+
+
+class ExpenseViewSet(IdempotentMixin, LedgerScopedMixin, viewsets.ModelViewSet):
+    replica_reads = True
     queryset = Expense.objects.select_related("paid_by", "paid_by__party").all()
     serializer_class = ExpenseSerializer
     permission_classes = [IsEditorOrReadOnly]
+    # Only paginates when ?limit= is given; plain GETs still return the full list.
+    pagination_class = pagination.LimitOffsetPagination
 
-    def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
-
+    def get_queryset(self):
+        return _filter_dates(super().get_queryset(), self.request.query_params)
 
-class SettlementViewSet(viewsets.ModelViewSet):
+    def perform_create(self, serializer):
+        expense = serializer.save(created_by=self.request.user, ledger=ledgers.for_request(self.request))
+        duplicates.attach(expense.ledger_id, [expense])
+
+    def perform_destroy(self, instance):
+        balances.ensure_open(instance.ledger_id, instance.date)  # create/update are checked in the serializer
+        instance.delete()
+
+    @decorators.action(detail=False, methods=["post"], url_path="import", url_name="import")
+    def bulk_import(self, request):
+        """
+        POST a list of expenses (as for create) to add them all or none. Each
+        comes back with its possible_duplicates, in the ledger or the same batch.
+        """
+        return idempotency.run(request, lambda: self._import(request))
+
+    def _import(self, request):
+        if not isinstance(request.data, list) or not 0 < len(request.data) <= IMPORT_MAX_ROWS:
+            return Response({"detail": f"Expected a list of 1 to {IMPORT_MAX_ROWS} expenses."}, status=400)
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        ledger = ledgers.for_request(request)
+        with transaction.atomic():
+            with live.batch(ledger.pk):  # one "ledger.changed" event, not one per row
+                expenses = serializer.save(created_by=request.user, ledger=ledger)
+            transaction.on_commit(lambda: versions.bump(ledger.pk))
+        duplicates.attach(ledger.pk, expenses)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class SettlementViewSet(IdempotentMixin, LedgerScopedMixin, viewsets.ModelViewSet):
+    replica_reads = True
     queryset = Settlement.objects.select_related("from_party", "to_party").all()
     serializer_class = SettlementSerializer
     permission_classes = [IsEditorOrReadOnly]
+    pagination_class = pagination.LimitOffsetPagination
+
+    def get_queryset(self):
+        return _filter_dates(super().get_queryset(), self.request.query_params)
 
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        serializer.save(created_by=self.request.user, ledger=ledgers.for_request(self.request))
+
+    def perform_destroy(self, instance):
+        balances.ensure_open(instance.ledger_id, instance.date)  # create/update are checked in the serializer
+        instance.delete()
+
+
+class PeriodCloseViewSet(LedgerScopedMixin, mixins.CreateModelMixin, mixins.DestroyModelMixin,
+                         viewsets.ReadOnlyModelViewSet):
+    """POST {"through": date} closes everything up to that date; DELETE on the latest close reopens it."""
+    replica_reads = True
+    queryset = PeriodClose.objects.select_related("closed_by").all()
+    serializer_class = PeriodCloseSerializer
+    permission_classes = [IsEditorOrReadOnly]
+
+    def perform_create(self, serializer):
+        ledger = ledgers.for_request(self.request)
+        household, bev = balances.household_and_bev(list(Party.objects.filter(ledger=ledger)))
+        if not household or not bev:
+            raise serializers.ValidationError({"detail": "Parties not bootstrapped yet."})
+        serializer.instance = balances.close_period(
+            ledger, serializer.validated_data["through"], household, bev, user=self.request.user)
+
+    def perform_destroy(self, instance):
+        if PeriodClose.objects.filter(ledger_id=instance.ledger_id, through__gt=instance.through).exists():
+            raise serializers.ValidationError({"detail": "Only the latest closed period can be reopened."})
+        instance.delete()
+
+
+def _on(params):
+    """?on=YYYY-MM-DD: the day budget status is reported for (default today)."""
+    try:
+        return dte.fromisoformat(params["on"]) if params.get("on") else timezone.localdate()
+    except ValueError:
+        raise serializers.ValidationError({"on": "Expected YYYY-MM-DD."})
+
+
+class BudgetViewSet(LedgerScopedMixin, viewsets.ModelViewSet):
+    """
+    Budgets with spend, remaining and projected overrun for the current period
+    (?on= for another day), read from the running totals in tracker/budgets.py:
+    one query for the whole list.
+    """
+    replica_reads = True
+    queryset = Budget.objects.all()
+    serializer_class = BudgetSerializer
+    permission_classes = [IsEditorOrReadOnly]
+
+    def get_queryset(self):
+        return budgets.with_spent(super().get_queryset(), _on(self.request.query_params))
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "on": _on(self.request.query_params)}
+
+
+class JobViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Background job status (staff see every job, others their own). Editors can
+    POST {"kind": ..., "payload": {...}} for the public kinds in tracker/jobs.py;
+    the request's ledger and user are added to the payload. A finished export
+    is downloaded from .../file/ (file_url).
+    """
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [IsEditorOrReadOnly]
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        return qs if self.request.user.is_staff else qs.filter(created_by=self.request.user)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == "create":  # payloads are checked against the ledger they will run in
+            context["ledger"] = ledgers.for_request(self.request)
+        return context
+
+    def perform_create(self, serializer):
+        kind = serializer.validated_data["kind"]
+        payload = {**serializer.validated_data["payload"],
+                   "ledger": ledgers.for_request(self.request).pk, "user": self.request.user.pk}
+        serializer.instance = jobs.enqueue(kind, payload, user=self.request.user)
+
+    @decorators.action(detail=True, methods=["get"])
+    def file(self, request, pk=None):
+        """An export's CSV: only for its owner (or staff), and only in the ledger it was made from."""
+        job = self.get_object()
+        if job.kind != "expenses.export" or job.status != Job.DONE or not (job.result or {}).get("file"):
+            raise NotFound("This job has no file.")
+        if job.payload.get("ledger") != ledgers.for_request(request).pk:
+            raise NotFound("This job has no file in this ledger.")
+        return jobs.export_response(job)
+
+
+class ReceiptViewSet(LedgerScopedMixin, mixins.DestroyModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Receipts attached to expenses (?expense=<id>). .../file/ and .../thumbnail/
+    answer with an X-Accel-Redirect, so nginx sends the bytes (tracker/receipts.py).
+    """
+    replica_reads = True
+    queryset = Receipt.objects.select_related("blob", "uploaded_by").all()
+    serializer_class = ReceiptSerializer
+    permission_classes = [IsEditorOrReadOnly]
+
+    def get_queryset(self):
+        if self.action in ("file", "thumbnail"):
+            # <img src> sends no X-Ledger header; any signed-in user may read any ledger anyway
+            return Receipt.objects.select_related("blob")
+        qs = super().get_queryset()
+        expense = self.request.query_params.get("expense")
+        if expense:
+            if not expense.isdigit():
+                raise serializers.ValidationError({"expense": "Expected an expense id."})
+            qs = qs.filter(expense_id=int(expense))
+        return qs
+
+    @decorators.action(detail=True, methods=["get"])
+    def file(self, request, pk=None):
+        return receipts.file_response(self.get_object())
+
+    @decorators.action(detail=True, methods=["get"])
+    def thumbnail(self, request, pk=None):
+        receipt = self.get_object()
+        if not receipt.blob.has_thumbnail:
+            raise NotFound("No thumbnail for this receipt (yet).")
+        return receipts.file_response(receipt, thumbnail=True)
+
+
+class ReceiptUploadViewSet(LedgerScopedMixin, viewsets.GenericViewSet):
+    """
+    Chunked, resumable receipt uploads.
+
+    POST {"expense", "filename", "size", "sha256"?} starts one. Then PATCH the
+    bytes in order, at most chunk_size per request, as the raw body with an
+    Upload-Offset header. 409 carries the offset the server has; GET does too,
+    for resuming. The response to the last chunk (or to a POST whose sha256
+    the ledger already stores) has "complete": true and the receipt.
+    """
+    queryset = ReceiptUpload.objects.all()
+    permission_classes = [IsEditorOrReadOnly]
+
+    def _payload(self, upload=None, receipt=None):
+        return {
+            "id": upload.pk if upload and receipt is None else None,
+            "offset": upload.offset if upload else receipt.blob.size,
+            "size": upload.size if upload else receipt.blob.size,
+            "chunk_size": settings.RECEIPT_CHUNK_BYTES,
+            "complete": receipt is not None,
+            "receipt": ReceiptSerializer(receipt).data if receipt is not None else None,
+        }
+
+    def create(self, request):
+        data = ReceiptUploadSerializer(data=request.data, context=self.get_serializer_context())
+        data.is_valid(raise_exception=True)
+        upload, receipt = receipts.start(user=request.user, **data.validated_data)
+        if upload is not None:
+            jobs.enqueue("receipts.cleanup", key="receipts.cleanup",
+                         run_after=timezone.now() + timedelta(seconds=settings.RECEIPT_UPLOAD_TTL))
+        return Response(self._payload(upload, receipt), status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return Response(self._payload(self.get_object()))
+
+    def partial_update(self, request, pk=None):
+        upload = self.get_object()
+        try:
+            offset = int(request.headers["Upload-Offset"])
+        except (KeyError, ValueError):
+            raise serializers.ValidationError({"detail": "Send the chunk's position in an Upload-Offset header."})
+        try:
+            upload, receipt = receipts.append(upload.pk, offset, request.body)
+        except receipts.OffsetMismatch as e:
+            return Response({"detail": f"Expected Upload-Offset {e.offset}.", "offset": e.offset},
+                            status=status.HTTP_409_CONFLICT)
+        except ReceiptUpload.DoesNotExist:
+            raise NotFound("Upload finished or expired.")
+        if receipt is not None and receipts.needs_thumbnail(receipt.blob):
+            sha256 = receipt.blob.sha256
+            jobs.enqueue("receipts.thumbnail", {"sha256": sha256}, key=f"receipts.thumbnail:{sha256}")
+        return Response(self._payload(upload, receipt))
+
+    def destroy(self, request, pk=None):
+        upload = self.get_object()
+        receipts.part_path(upload).unlink(missing_ok=True)
+        upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 # -------------------------
@@ -78,168 +367,260 @@ def auth_logout(request):
     return response.Response({"detail": "ok"})
 
 
+def _whoami_payload(u):
+    if not u.is_authenticated:
+        return {"authenticated": False}
+    return {"authenticated": True, "username": u.username, "is_staff": u.is_staff}
+
+
 @decorators.api_view(["GET"])
 def whoami(request):
-    u = request.user
-    if not u.is_authenticated:
-        return response.Response({"authenticated": False})
-    return response.Response({"authenticated": True, "username": u.username, "is_staff": u.is_staff})
+    return response.Response(_whoami_payload(request.user))
 
 
 # -------------------------
 # FX rate (Frankfurter, no key required)
 # -------------------------
+FX_FETCH_ATTEMPTS = 2                   # a failed fetch is reported within a few seconds, while the form still polls
+FX_RETRY_AFTER = timedelta(minutes=10)  # until then a failed fetch answers with the fallback; after it, try again
+
+
+def _fx_query(params):
+    """(date, base, quote) from the query string; raises ValueError on a bad date."""
+    date_str = params.get("date")
+    base = (params.get("base") or "CAD").upper()
+    quote = (params.get("quote") or "THB").upper()
+    query_date = dte.fromisoformat(date_str) if date_str else dte.today()
+    return query_date, base, quote
+
+
+def _fx_payload(query_date, base, quote, rate, source):
+    return {
+        "date": query_date.isoformat(),
+        "base": base,
+        "quote": quote,
+        "rate": None if rate is None else str(rate),
+        "source": source,
+    }
+
+
+def _fx_fallback_payload(query_date, base, quote, error):
+    # graceful fallback
+    payload = _fx_payload(query_date, base, quote, "1", "fallback")
+    payload["note"] = f"fx upstream error: {error}"
+    return payload
+
+
+def _fx_miss(query_date, base, quote, user):
+    """
+    (payload, status) for a rate that isn't cached yet: the fetch runs in a
+    worker (one job per rate) and the client polls. Shared with the ASGI view,
+    so the response doesn't depend on SERVER_MODE.
+    """
+    key = jobs.fx_key(query_date, base, quote)
+    job = Job.objects.filter(key=key).order_by("-id").first()
+    if job is not None and job.status == Job.FAILED and job.finished_at > timezone.now() - FX_RETRY_AFTER:
+        # upstream down or a pair Frankfurter doesn't know: answer instead of 202 on every poll
+        return _fx_fallback_payload(query_date, base, quote, job.last_error), status.HTTP_200_OK
+    if job is None or job.status not in (Job.QUEUED, Job.RUNNING):
+        job = jobs.enqueue("fx.fetch", {"date": query_date.isoformat(), "base": base, "quote": quote},
+                           key=key, user=user, max_attempts=FX_FETCH_ATTEMPTS)
+    payload = _fx_payload(query_date, base, quote, None, "pending")
+    payload["job"] = job.pk
+    return payload, status.HTTP_202_ACCEPTED
+
+
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])  # temporarily allow anyone until session cookies are solid
 def fx_rate(request):
     """Return (and cache) the FX rate for a given date/base/quote."""
-    import requests
-    from decimal import Decimal, InvalidOperation
-    from datetime import date as dte
-
-    date_str = request.GET.get("date")
-    base = (request.GET.get("base") or "CAD").upper()
-    quote = (request.GET.get("quote") or "THB").upper()
-
     try:
-        query_date = dte.fromisoformat(date_str) if date_str else dte.today()
+        query_date, base, quote = _fx_query(request.GET)
     except Exception:
         return Response({"detail": "Invalid date"}, status=status.HTTP_400_BAD_REQUEST)
 
     # check cache first
     existing = FxRate.objects.filter(date=query_date, base=base, quote=quote).first()
     if existing:
-        return Response({
-            "date": str(existing.date),
-            "base": existing.base,
-            "quote": existing.quote,
-            "rate": str(existing.rate),
-            "source": "cache",
-        })
-
-    # --- call Frankfurter ---
-    url = f"https://api.frankfurter.app/{query_date.isoformat()}?from={base}&to={quote}"
-    try:
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-
-        # Frankfurter returns e.g. {"amount":1.0,"base":"CAD","date":"2025-10-23","rates":{"THB":25.3829}}
-        rate_raw = (data.get("rates") or {}).get(quote)
-        if rate_raw is None:
-            raise RuntimeError(f"Missing rate for {quote}: {data}")
-
-        try:
-            rate_val = Decimal(str(rate_raw))
-        except InvalidOperation:
-            raise RuntimeError(f"Invalid rate value: {rate_raw}")
-
-        source = "live-frankfurter"
-
-    except Exception as e:
-        # graceful fallback
-        return Response({
-            "date": query_date.isoformat(),
-            "base": base,
-            "quote": quote,
-            "rate": "1",
-            "source": "fallback",
-            "note": f"fx upstream error: {e}",
-        }, status=200)
-
-    # --- cache it ---
-    with transaction.atomic():
-        FxRate.objects.update_or_create(
-            date=query_date, base=base, quote=quote,
-            defaults={"rate": rate_val}
-        )
-
-    return Response({
-        "date": query_date.isoformat(),
-        "base": base,
-        "quote": quote,
-        "rate": str(rate_val),
-        "source": source,
-    })
+        FX_CACHE.labels("hit").inc()
+        return Response(_fx_payload(existing.date, existing.base, existing.quote, existing.rate, "cache"))
+    FX_CACHE.labels("miss").inc()
 
+    payload, code = _fx_miss(query_date, base, quote, request.user)
+    return Response(payload, status=code)
 
 
 # -------------------------
 # Recent currencies (auth)
 # -------------------------
+# Reads and writes go through the cache; the recents.flush job writes them to the DB (tracker/recents.py).
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
 def recent_currencies(request):
     if request.method == "GET":
-        qs = (UserRecentCurrency.objects
-              .filter(user=request.user)
-              .order_by("-updated_at")
-              .values_list("code", flat=True)[:5])
-        return Response(list(qs))
+        return Response(recents.recent_codes(request.user.pk))
 
     code = (request.data.get("code") or "").upper().strip()
     if not code:
         return Response({"detail": "code required"}, status=400)
-    UserRecentCurrency.objects.update_or_create(user=request.user, code=code)
+    recents.touch(request.user.pk, code)
     return Response({"ok": True})
 
 
 # -------------------------
 # Summary (paid_by is a Person)
 # -------------------------
+@replica_reads
 @decorators.api_view(["GET"])
 @decorators.permission_classes([permissions.IsAuthenticated])
 def summary(request):
-    # Identify parties
-    household = Party.objects.filter(is_household=True).first()
-    bev = Party.objects.filter(slug="bev").first()
+    # Identify the ledger's parties
+    ledger = ledgers.for_request(request)
+    household, bev = balances.household_and_bev(list(Party.objects.filter(ledger=ledger)))
     if not household or not bev:
         return response.Response({"detail": "Parties not bootstrapped yet."}, status=400)
+    # latest closed-period snapshot + aggregates over rows dated after it
+    payload = balances.summary(ledger.pk, household, bev)
+    code = _report_currency(request.query_params)
+    if code != fxmatrix.HUB:
+        rate = fxmatrix.rate_from_cad(code)  # balances are current amounts: latest rate
+        if rate is None:
+            return response.Response({"detail": f"No FX rates for {code}."}, status=400)
+        payload = balances.in_currency(payload, code, rate)
+    return response.Response(payload)
+
+
+# -------------------------
+# Reports (any currency; see tracker/reports.py)
+# -------------------------
+def _report_currency(params):
+    return (params.get("currency") or fxmatrix.HUB).strip().upper()
 
-    # Expenses paid by Household/Bev (via person.party)
-    hh_paid = Expense.objects.filter(paid_by__party=household)
-    bev_paid = Expense.objects.filter(paid_by__party=bev)
-
-    # amount_cad = amount * fx_to_cad
-    share_bev_expr = ExpressionWrapper(
-        F("amount") * F("fx_to_cad") * F("weight_bev") / (F("weight_household") + F("weight_bev")),
-        output_field=DecimalField(max_digits=18, decimal_places=8),
-    )
-    share_household_expr = ExpressionWrapper(
-        F("amount") * F("fx_to_cad") * F("weight_household") / (F("weight_household") + F("weight_bev")),
-        output_field=DecimalField(max_digits=18, decimal_places=8),
-    )
-
-    hh_b_owes = (
-        hh_paid.annotate(share_bev=share_bev_expr)
-        .aggregate(total=Sum("share_bev", output_field=DecimalField(max_digits=18, decimal_places=8)))
-        .get("total") or Decimal("0")
-    )
-
-    hh_owes = (
-        bev_paid.annotate(share_household=share_household_expr)
-        .aggregate(total=Sum("share_household", output_field=DecimalField(max_digits=18, decimal_places=8)))
-        .get("total") or Decimal("0")
-    )
-
-    # Settlements (ensure Decimal defaults; don't use 0.0)
-    bev_to_house = (
-        Settlement.objects.filter(from_party=bev, to_party=household)
-        .aggregate(total=Sum("amount_cad", output_field=DecimalField(max_digits=18, decimal_places=2)))
-        .get("total") or Decimal("0")
-    )
-    house_to_bev = (
-        Settlement.objects.filter(from_party=household, to_party=bev)
-        .aggregate(total=Sum("amount_cad", output_field=DecimalField(max_digits=18, decimal_places=2)))
-        .get("total") or Decimal("0")
-    )
-
-    net = hh_b_owes - hh_owes - (bev_to_house - house_to_bev)
+
+@replica_reads
+@decorators.api_view(["GET"])
+@decorators.permission_classes([permissions.IsAuthenticated])
+def report_totals(request):
+    """Expense totals per category for the ledger (optional date_from/date_to), in ?currency= (default CAD)."""
+    expenses = _filter_dates(Expense.objects.filter(ledger=ledgers.for_request(request)), request.query_params)
+    try:
+        return response.Response(reports.totals(expenses, _report_currency(request.query_params)))
+    except reports.UnknownCurrency as e:
+        return response.Response({"detail": f"No FX rates for {e}."}, status=400)
+
+
+@decorators.api_view(["GET"])
+@decorators.permission_classes([permissions.IsAuthenticated])
+def events(request):
+    """Live updates (Server-Sent Events) are only served by the ASGI build: see tracker/live.py."""
+    return response.Response({"detail": "Live updates need SERVER_MODE=asgi."}, status=501)
+
+
+# not @replica_reads: results are cached under the ledger's data version, so they
+# must not be computed from a replica that hasn't caught up with that version yet
+@decorators.api_view(["GET"])
+@decorators.permission_classes([permissions.IsAuthenticated])
+def report_categories(request):
+    """Per-category count/total/average/median/p90 (CAD) and the ?top= (default 5) biggest expenses in each."""
+    ledger = ledgers.for_request(request)
+    params = request.query_params
+    expenses = _filter_dates(Expense.objects.filter(ledger=ledger), params)
+    try:
+        top = min(max(int(params.get("top", 5)), 0), 50)
+    except ValueError:
+        return response.Response({"detail": "top must be a number"}, status=400)
+    filters = f"{params.get('date_from', '')}:{params.get('date_to', '')}"
+    try:
+        return response.Response(reports.categories(ledger.pk, expenses, top, key=filters))
+    except RuntimeError as e:
+        return response.Response({"detail": str(e)}, status=501)
+
+
+# not @replica_reads either: cached under the data version (see report_categories)
+@decorators.api_view(["GET"])
+@decorators.permission_classes([permissions.IsAuthenticated])
+def report_anomalies(request):
+    """
+    Expenses that stand out (robust z-scores by category, currency, weekday and
+    FX rate) and likely duplicates; ?z= (default 3.5) and ?limit= (default 100).
+    """
+    ledger = ledgers.for_request(request)
+    params = request.query_params
+    expenses = _filter_dates(Expense.objects.filter(ledger=ledger), params)
+    try:
+        threshold = min(max(float(params.get("z", anomalies.THRESHOLD)), 1.0), 50.0)
+        limit = min(max(int(params.get("limit", 100)), 1), 500)
+    except ValueError:
+        return response.Response({"detail": "z and limit must be numbers"}, status=400)
+    filters = f"{params.get('date_from', '')}:{params.get('date_to', '')}"
+    return response.Response(anomalies.cached_report(ledger.pk, expenses, threshold, limit, key=filters))
+
+
+# -------------------------
+# Bootstrap (everything the SPA needs on load, in one round trip)
+# -------------------------
+BOOTSTRAP_PAGE_SIZE = 50
+
+
+def _first_page(request, queryset, serializer_class, url_name):
+    """First BOOTSTRAP_PAGE_SIZE rows plus a ?limit/offset link to the next page (no COUNT query)."""
+    rows = list(queryset[:BOOTSTRAP_PAGE_SIZE + 1])
+    next_url = None
+    if len(rows) > BOOTSTRAP_PAGE_SIZE:
+        rows = rows[:BOOTSTRAP_PAGE_SIZE]
+        next_url = request.build_absolute_uri(reverse(url_name))
+        next_url = replace_query_param(next_url, "limit", BOOTSTRAP_PAGE_SIZE)
+        next_url = replace_query_param(next_url, "offset", BOOTSTRAP_PAGE_SIZE)
+        if request.GET.get("ledger"):
+            next_url = replace_query_param(next_url, "ledger", request.GET["ledger"])
+    data = serializer_class(rows, many=True, context={"request": request}).data
+    return {"next": next_url, "results": data}
+
+
+@replica_reads
+@decorators.api_view(["GET"])
+@decorators.permission_classes([permissions.IsAuthenticated])
+@ensure_csrf_cookie
+def bootstrap(request):
+    """
+    whoami + summary + people + parties + recent currencies + first page of
+    expenses/settlements + budget status, all for the request's ledger. Also sets the CSRF
+    cookie, so the SPA doesn't need a separate /csrf/ call when already signed in.
+    """
+    ledger = ledgers.for_request(request)
+    today = timezone.localdate()
+    parties = list(PartyViewSet.queryset.filter(ledger=ledger))
+    household, bev = balances.household_and_bev(parties)
+    # Reuse the parties we already have instead of joining them in again.
+    by_id = {p.pk: p for p in parties}
+    people = list(Person.objects.filter(ledger=ledger).order_by("name"))
+    for p in people:
+        p.party = by_id[p.party_id]
 
     return response.Response({
-        "bev_owes_from_expenses": hh_b_owes,
-        "household_owes_from_expenses": hh_owes,
-        "settlements_bev_to_household": bev_to_house,
-        "settlements_household_to_bev": house_to_bev,
-        "net": net,
+        "whoami": _whoami_payload(request.user),
+        "ledger": LedgerSerializer(ledger).data,
+        "summary": balances.summary(ledger.pk, household, bev) if household and bev else None,
+        "parties": PartySerializer(parties, many=True).data,
+        "people": PersonSerializer(people, many=True).data,
+        "recent_currencies": recents.recent_codes(request.user.pk),
+        "expenses": _first_page(request, ExpenseViewSet.queryset.filter(ledger=ledger),
+                                ExpenseSerializer, "expense-list"),
+        "settlements": _first_page(request, SettlementViewSet.queryset.filter(ledger=ledger),
+                                   SettlementSerializer, "settlement-list"),
+        "budgets": BudgetSerializer(budgets.with_spent(Budget.objects.filter(ledger=ledger), today), many=True,
+                                    context={"on": today}).data,
     })
+
+
+# -------------------------
+# Ops (staff only)
+# -------------------------
+@decorators.api_view(["GET"])
+@decorators.permission_classes([permissions.IsAdminUser])
+def db_pool(request):
+    """psycopg pool counters for the worker that served this request."""
+    stats = db.pool_stats()
+    if stats is None:
+        return response.Response({"pool": False, "conn_max_age": connection.settings_dict.get("CONN_MAX_AGE")})
+    return response.Response({"pool": True, **stats})
@@ -1,8 +1,9 @@
 // src/App.jsx
 import React, { useEffect, useState } from "react";
-import { primeCSRF, login, logout, getSummary, listExpenses, listSettlements, whoami, addExpense, addSettlement } from "./api";
+import { primeCSRF, login, logout, getBootstrap, getPage, addExpense, addSettlement, getExpense, getSettlement, listBudgets, subscribeLedger } from "./api";
 import ExpenseForm from "./components/ExpenseForm";
 import Modal from "./components/Modal";
+import Receipts from "./components/Receipts";
 import { currency, TextInput, NumberInput, Button, Card, CurrencySelect, PaidByPicker } from "./sharedControls";
 
 function Tabs({ value, onChange, items }) {
@@ -82,18 +83,53 @@ function SummaryCard({ data }) {
   );
 }
 
+function BudgetsCard({ budgets }) {
+  if (!budgets?.length) return null;
+  return (
+    <Card>
+      <h2 className="text-lg font-semibold mb-2">Budgets</h2>
+      <div className="space-y-2 text-sm">
+        {budgets.map((b) => {
+          const s = b.status || {};
+          const pct = Math.min(Number(s.percent) || 0, 100);
+          return (
+            <div key={b.id}>
+              <div className="flex justify-between">
+                <span>{b.category || "All spending"} · {b.period}</span>
+                <span className="font-semibold">{currency(s.spent_cad)} / {currency(b.amount_cad)}</span>
+              </div>
+              <div className="h-2 bg-gray-200 rounded">
+                <div className={`h-2 rounded ${s.reached >= 100 ? "bg-rose-600" : s.reached ? "bg-amber-500" : "bg-green-600"}`}
+                     style={{ width: `${pct}%` }} />
+              </div>
+              {Number(s.projected_overrun_cad) > 0 && (
+                <div className="text-xs text-rose-700">On pace to go over by {currency(s.projected_overrun_cad)}</div>
+              )}
+            </div>
+          );
+        })}
+      </div>
+    </Card>
+  );
+}
+
 // (Your AddExpense and AddSettlement components from before remain unchanged)
 
 export default function App() {
   const [authed, setAuthed] = useState(document.cookie.includes("sessionid="));
   const [me, setMe] = useState(null);
   const [summary, setSummary] = useState(null);
+  const [budgets, setBudgets] = useState([]);
   const [expenses, setExpenses] = useState([]);
   const [settlements, setSettlements] = useState([]);
+  const [nextExpenses, setNextExpenses] = useState(null);
+  const [nextSettlements, setNextSettlements] = useState(null);
   const [tab, setTab] = useState("summary");
   const [editingId, setEditingId] = useState(null); // <-- inside component
 
+  // Signed-in loads get the CSRF cookie from /bootstrap/; only the login screen needs priming.
   useEffect(() => {
+    if (authed) return;
     (async () => {
       try {
         await primeCSRF();
@@ -102,33 +138,67 @@ export default function App() {
         console.warn("CSRF prime failed:", err);
       }
     })();
-  }, []);
+  }, [authed]);
 
   const refreshAll = async () => {
     try {
-      const [s, e, st] = await Promise.all([getSummary(), listExpenses(), listSettlements()]);
-      setSummary(s.data);
-      setExpenses(e.data);
-      setSettlements(st.data);
+      const data = await getBootstrap();
+      setMe(data.whoami);
+      setSummary(data.summary);
+      setBudgets(data.budgets || []);
+      setExpenses(data.expenses.results);
+      setNextExpenses(data.expenses.next);
+      setSettlements(data.settlements.results);
+      setNextSettlements(data.settlements.next);
     } catch (e) {
+      setMe(null);
       console.warn("Refresh failed (likely not logged in):", e?.response?.status);
     }
   };
 
   useEffect(() => { if (authed) refreshAll(); }, [authed]);
 
+  // Live updates: patch the one row that changed and take the pushed summary,
+  // instead of reloading everything after every write (ours or another device's).
   useEffect(() => {
     if (!authed) return;
-    (async () => {
+    const patch = async (setRows, fetchRow, action, id) => {
+      if (action === "deleted") {
+        setRows(prev => prev.filter(r => r.id !== id));
+        return;
+      }
       try {
-        const data = await whoami();
-        setMe(data);
-      } catch {
-        setMe(null);
+        const { data } = await fetchRow(id);
+        setRows(prev => prev.some(r => r.id === id)
+          ? prev.map(r => (r.id === id ? data : r))
+          : (action === "created" ? [data, ...prev] : prev));
+      } catch (e) {
+        console.warn("Live update fetch failed:", e?.response?.status);
       }
-    })();
+    };
+    const refreshBudgets = async () => {
+      try {
+        setBudgets((await listBudgets()).data);
+      } catch (e) {
+        console.warn("Budget refresh failed:", e?.response?.status);
+      }
+    };
+    return subscribeLedger((event) => {
+      if (event.summary) setSummary(event.summary);
+      const [kind, action] = (event.type || "").split(".");
+      if (kind === "expense" || kind === "budget") refreshBudgets();
+      if (kind === "expense") patch(setExpenses, getExpense, action, event.id);
+      else if (kind === "settlement") patch(setSettlements, getSettlement, action, event.id);
+      else if (event.type === "resync" || event.type === "ledger.changed") refreshAll();
+    });
   }, [authed]);
 
+  const loadMore = async (url, setRows, setNext) => {
+    const { data } = await getPage(url);
+    setRows(prev => prev.concat(data.results));
+    setNext(data.next);
+  };
+
   const isStaff = !!me?.is_staff;
 
   if (!authed) {
@@ -167,6 +237,7 @@ export default function App() {
             content: (
               <div className="grid gap-4">
                 <SummaryCard data={summary} />
+                <BudgetsCard budgets={budgets} />
                 <Card>
                   <h3 className="font-semibold mb-2">Expenses</h3>
                   {expenses?.length ? (
@@ -197,6 +268,9 @@ export default function App() {
                       ))}
                     </div>
                   ) : <div className="text-sm text-gray-500">No expenses yet.</div>}
+                  {nextExpenses && (
+                    <Button className="mt-2" onClick={() => loadMore(nextExpenses, setExpenses, setNextExpenses)}>Load more</Button>
+                  )}
                 </Card>
                 <Card>
                   <h3 className="font-semibold mb-2">Settlements</h3>
@@ -213,6 +287,9 @@ export default function App() {
                       ))}
                     </div>
                   ) : <div className="text-sm text-gray-500">No settlements yet.</div>}
+                  {nextSettlements && (
+                    <Button className="mt-2" onClick={() => loadMore(nextSettlements, setSettlements, setNextSettlements)}>Load more</Button>
+                  )}
                 </Card>
               </div>
             )
@@ -248,6 +325,7 @@ export default function App() {
             onCancel={() => setEditingId(null)}
           />
         )}
+        {editingId && <Receipts expenseId={editingId} isStaff={isStaff} />}
       </Modal>
 
       <div className="fixed bottom-3 left-0 right-0 px-4">
@@ -35,10 +35,32 @@ export async function primeCSRF() {
   csrfPrimed = true
 }
 
-// --- attach CSRF header on mutating requests
+// --- ledger (trip): ?ledger=<slug> on the page URL; the server uses its default ledger otherwise
+const LEDGER = new URLSearchParams(window.location.search).get('ledger')
+
+// --- random v4 UUID; crypto.randomUUID only exists in secure contexts (not the plain-http dev origin)
+function uuid4() {
+  if (crypto?.randomUUID) return crypto.randomUUID()
+  const b = crypto.getRandomValues(new Uint8Array(16))
+  b[6] = (b[6] & 0x0f) | 0x40 // version 4
+  b[8] = (b[8] & 0x3f) | 0x80 // RFC 4122 variant
+  const h = Array.from(b, (x) => x.toString(16).padStart(2, '0')).join('')
+  return `${h.slice(0, 8)}-${h.slice(8, 12)}-${h.slice(12, 16)}-${h.slice(16, 20)}-${h.slice(20)}`
+}
+
+// --- attach the ledger header, and the CSRF header on mutating requests
 api.interceptors.request.use(async (config) => {
+  if (LEDGER) {
+    config.headers = config.headers || {}
+    config.headers['X-Ledger'] = LEDGER
+  }
   const method = (config.method || 'get').toLowerCase()
   if (['post', 'put', 'patch', 'delete'].includes(method)) {
+    // one key per logical write; the CSRF retry below resends this same config, so it reuses the key
+    if (!config.headers?.['Idempotency-Key']) {
+      config.headers = config.headers || {}
+      config.headers['Idempotency-Key'] = uuid4()
+    }
     // ensure cookie exists
     if (!getCookie('csrftoken')) {
       await primeCSRF()
@@ -87,14 +109,100 @@ export async function logout() {
   await api.post('/auth/logout/', {})
 }
 
+// --- startup payload: whoami, summary, people, parties, recent currencies and
+// the first page of expenses/settlements in one round trip (also sets csrftoken).
+// People and recent currencies are kept here so shared controls can skip their own fetch.
+const bootCache = {}
+export async function getBootstrap() {
+  const { data } = await api.get('/bootstrap/')
+  csrfPrimed = true
+  bootCache.people = data.people
+  bootCache.recent_currencies = data.recent_currencies
+  return data
+}
+export const bootCached = (key) => bootCache[key]
+export function rememberRecentCurrency(code) {
+  if (!bootCache.recent_currencies) return
+  bootCache.recent_currencies = [code, ...bootCache.recent_currencies.filter(c => c !== code)].slice(0, 5)
+}
+
 // --- data helpers
 export const getSummary = () => api.get('/summary/')
-export const listExpenses = () => api.get('/expenses/')
-export const listSettlements = () => api.get('/settlements/')
+export const listExpenses = (params) => api.get('/expenses/', { params })
+export const listSettlements = (params) => api.get('/settlements/', { params })
+// follow a paginated `next` link (DRF returns absolute URLs; keep the call same-origin)
+export function getPage(url) {
+  const u = new URL(url, window.location.href)
+  return api.get(u.pathname + u.search, { baseURL: '' })
+}
 export const addExpense = (payload) => api.post('/expenses/', payload)
+export const importExpenses = (rows) => api.post('/expenses/import/', rows)
 export const addSettlement = (payload) => api.post('/settlements/', payload)
 
 export const getExpense = (id) => api.get(`/expenses/${id}/`)
+export const getSettlement = (id) => api.get(`/settlements/${id}/`)
+export const listBudgets = () => api.get('/budgets/')
 export const updateExpense = (id, payload, { partial = true } = {}) =>
   (partial ? api.patch(`/expenses/${id}/`, payload) : api.put(`/expenses/${id}/`, payload))
-export const deleteExpense = (id) => api.delete(`/expenses/${id}/`)
\ No newline at end of file
+export const deleteExpense = (id) => api.delete(`/expenses/${id}/`)
+
+// --- receipts: chunked, resumable uploads (see backend tracker/receipts.py)
+export const listReceipts = (expenseId) => api.get('/receipts/', { params: { expense: expenseId } })
+export const deleteReceipt = (id) => api.delete(`/receipts/${id}/`)
+
+async function sha256Hex(file) {
+  if (!crypto?.subtle) return null // plain-http dev: the server hashes anyway
+  const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer())
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('')
+}
+
+// Sends `file` in chunk_size pieces; after a dropped connection it asks the server
+// for its offset and carries on. Resolves to the receipt; onProgress(sent, total).
+export async function uploadReceipt(expenseId, file, onProgress = () => {}) {
+  const sha256 = await sha256Hex(file)
+  let { data: state } = await api.post('/uploads/', {
+    expense: expenseId, filename: file.name, size: file.size, ...(sha256 ? { sha256 } : {}),
+  })
+  let failures = 0
+  while (!state.complete) {
+    onProgress(state.offset, state.size)
+    const chunk = file.slice(state.offset, state.offset + state.chunk_size)
+    try {
+      const { data } = await api.patch(`/uploads/${state.id}/`, chunk, {
+        headers: { 'Content-Type': 'application/offset+octet-stream', 'Upload-Offset': String(state.offset) },
+      })
+      state = data
+      failures = 0
+    } catch (err) {
+      const status = err?.response?.status
+      if (status === 409) {
+        state = { ...state, offset: err.response.data.offset }
+      } else if (!status && failures < 8) { // network drop: wait, then resume from the server's offset
+        failures += 1
+        await new Promise((r) => setTimeout(r, Math.min(30000, 1000 * 2 ** failures)))
+        try { state = (await api.get(`/uploads/${state.id}/`)).data } catch {}
+      } else {
+        throw err
+      }
+    }
+  }
+  onProgress(state.size, state.size)
+  return state.receipt
+}
+
+// --- live updates: Server-Sent Events for this ledger (ASGI + Postgres only; 501 otherwise).
+// onEvent gets {type, id, summary}; type is "ready", "expense.created|updated|deleted",
+// "settlement.*", "ledger.changed" or "resync". Returns a function that closes the stream.
+export function subscribeLedger(onEvent) {
+  if (typeof EventSource === 'undefined') return () => {}
+  const url = `${BASE}/events/` + (LEDGER ? `?ledger=${encodeURIComponent(LEDGER)}` : '')
+  const source = new EventSource(url, { withCredentials: true })
+  source.onmessage = (msg) => {
+    try {
+      onEvent(JSON.parse(msg.data))
+    } catch (err) {
+      console.warn('Bad live event:', err)
+    }
+  }
+  return () => source.close()
+}
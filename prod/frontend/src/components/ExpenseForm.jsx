@@ -13,6 +13,7 @@ export default function ExpenseForm({
 }) {
   const [busy, setBusy] = useState(false);
   const [fxBusy, setFxBusy] = useState(false);
+  const [fxNote, setFxNote] = useState("");
   const [f, setF] = useState({
     date: initialDate,
     description:"", category:"lodging",
@@ -52,12 +53,30 @@ export default function ExpenseForm({
       setFxBusy(true);
       try {
         const base = encodeURIComponent(f.currency || "CAD");
-        const r = await fetch(`/api/fx-rate/?date=${encodeURIComponent(f.date)}&base=${base}&quote=CAD`, { credentials:"include" });
-        if (r.ok) {
-          const d = await r.json();
-          setF(prev => ({ ...prev, fx_to_cad: d.rate }));
+        const url = `/api/fx-rate/?date=${encodeURIComponent(f.date)}&base=${base}&quote=CAD`;
+        setFxNote("");
+        // 202 = not cached yet; a background worker is fetching it, so ask again shortly
+        for (let attempt = 0; attempt < 10; attempt++) {
+          const r = await fetch(url, { credentials:"include" });
+          if (r.status === 202) {
+            await new Promise(res => setTimeout(res, 500 + attempt * 250));
+            continue;
+          }
+          if (r.ok) {
+            const d = await r.json();
+            if (d.source === "fallback") {
+              // the fetch failed (upstream down, or a currency Frankfurter doesn't know)
+              setFxNote("Couldn't look up this rate; enter it by hand.");
+            } else {
+              setF(prev => ({ ...prev, fx_to_cad: d.rate }));
+            }
+          }
+          return;
         }
-      } catch {} finally { setFxBusy(false); }
+        setFxNote("The rate is taking a while; enter it by hand or pick the date again.");
+      } catch {
+        setFxNote("Couldn't look up this rate; enter it by hand.");
+      } finally { setFxBusy(false); }
     };
     run();
   }, [f.date, f.currency]);
@@ -77,7 +96,14 @@ export default function ExpenseForm({
       if (mode === "edit" && expenseId) {
         await updateExpense(expenseId, payload, { partial: true });
       } else {
-        await addExpense(payload);
+        const { data } = await addExpense(payload);
+        const dupes = data.possible_duplicates || [];
+        if (dupes.length) {
+          const list = dupes.map(d => `${d.date} ${d.description} ${d.amount} ${d.currency} (${d.paid_by})`).join("\n");
+          if (!window.confirm(`This looks like an expense already entered:\n${list}\n\nKeep it anyway?`)) {
+            await deleteExpense(data.id);
+          }
+        }
       }
       onSaved?.();
     } catch (e) {
@@ -127,6 +153,7 @@ export default function ExpenseForm({
             {fxBusy && <span className="text-xs text-gray-500">auto…</span>}
           </label>
           <NumberInput step="0.00000001" value={f.fx_to_cad} onChange={e=>setF({...f, fx_to_cad:e.target.value})} />
+          {fxNote && <div className="text-xs text-amber-700 mt-1">{fxNote}</div>}
         </div>
 
         <div>
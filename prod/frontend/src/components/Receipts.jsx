@@ -0,0 +1,70 @@
+// src/components/Receipts.jsx
+import React, { useEffect, useState } from "react";
+import { listReceipts, uploadReceipt, deleteReceipt } from "../api";
+
+export default function Receipts({ expenseId, isStaff = false }) {
+  const [rows, setRows] = useState([]);
+  const [progress, setProgress] = useState(null); // {name, sent, total} while uploading
+  const [error, setError] = useState("");
+
+  useEffect(() => {
+    if (!expenseId) return;
+    listReceipts(expenseId).then(({ data }) => setRows(data)).catch(() => setRows([]));
+  }, [expenseId]);
+
+  const onPick = async (e) => {
+    const files = Array.from(e.target.files || []);
+    e.target.value = "";
+    setError("");
+    for (const file of files) {
+      try {
+        const receipt = await uploadReceipt(expenseId, file,
+          (sent, total) => setProgress({ name: file.name, sent, total }));
+        setRows(prev => (prev.some(r => r.id === receipt.id) ? prev : prev.concat(receipt)));
+      } catch (err) {
+        setError(err?.response?.data?.detail || `Upload of ${file.name} failed.`);
+      }
+    }
+    setProgress(null);
+  };
+
+  const onDelete = async (id) => {
+    if (!confirm("Remove this receipt?")) return;
+    await deleteReceipt(id);
+    setRows(prev => prev.filter(r => r.id !== id));
+  };
+
+  return (
+    <div className="mt-4">
+      <div className="text-sm font-medium mb-2">Receipts</div>
+      <div className="flex flex-wrap gap-2">
+        {rows.map(r => (
+          <div key={r.id} className="relative">
+            <a href={r.url} target="_blank" rel="noreferrer" title={r.filename}>
+              {r.thumbnail_url
+                ? <img src={r.thumbnail_url} alt={r.filename} className="h-20 w-20 object-cover rounded-md border" />
+                : <div className="h-20 w-20 rounded-md border flex items-center justify-center text-xs p-1 break-all">{r.filename}</div>}
+            </a>
+            {isStaff && (
+              <button type="button" onClick={() => onDelete(r.id)}
+                className="absolute -top-2 -right-2 bg-white border rounded-full w-6 h-6 text-xs">×</button>
+            )}
+          </div>
+        ))}
+        {!rows.length && !progress && <div className="text-xs text-gray-500">None yet.</div>}
+      </div>
+      {progress && (
+        <div className="text-xs text-gray-600 mt-2">
+          Uploading {progress.name}: {Math.round((100 * progress.sent) / (progress.total || 1))}%
+        </div>
+      )}
+      {error && <div className="text-xs text-rose-700 mt-2">{error}</div>}
+      {isStaff && (
+        <label className={`inline-block mt-2 px-4 py-2 rounded-xl border shadow-sm ${progress ? "opacity-50" : "cursor-pointer"}`}>
+          Add receipt
+          <input type="file" accept="image/*,application/pdf" multiple className="hidden" onChange={onPick} disabled={!!progress} />
+        </label>
+      )}
+    </div>
+  );
+}
@@ -1,6 +1,6 @@
 // src/sharedControls.jsx
 import React, { useEffect, useMemo, useState } from "react";
-import { api, primeCSRF } from "./api";
+import { api, primeCSRF, bootCached, rememberRecentCurrency } from "./api";
 
 export function currency(num) {
   if (num == null || Number.isNaN(num)) return "—";
@@ -22,9 +22,10 @@ export function Card({ children }) { return <div className="rounded-2xl bg-white
 const DEFAULT_CURRENCIES = ["CAD","USD","THB","JPY","EUR","GBP","AUD","NZD","SGD","PHP","VND","IDR"];
 
 export function CurrencySelect({ value, onChange, all = DEFAULT_CURRENCIES, canWrite = false }) {
-  const [recent, setRecent] = useState([]);
+  const [recent, setRecent] = useState(() => bootCached("recent_currencies") || []);
 
   useEffect(() => {
+    if (bootCached("recent_currencies")) return; // already delivered by /bootstrap/
     (async () => {
       try {
         const r = await api.get("/recent-currencies/");
@@ -41,6 +42,7 @@ export function CurrencySelect({ value, onChange, all = DEFAULT_CURRENCIES, canW
   const handleChange = async (e) => {
     const code = e.target.value;
     onChange(code);
+    rememberRecentCurrency(code);
     if (canWrite) {
       try {
         await primeCSRF();
@@ -67,10 +69,11 @@ export function CurrencySelect({ value, onChange, all = DEFAULT_CURRENCIES, canW
 
 // ---- PaidBy: Party toggle -> Person select ----
 export function PaidByPicker({ value, onChange }) {
-  const [people, setPeople] = useState([]);
+  const [people, setPeople] = useState(() => bootCached("people") || []);
   const [partyFilter, setPartyFilter] = useState("household"); // 'household' | 'bev'
 
   useEffect(() => {
+    if (bootCached("people")) return; // already delivered by /bootstrap/
     (async () => {
       try {
         const r = await api.get("/people/");